@@ -144,6 +144,15 @@ export const createBooking = async (bookingData) => {
     console.error('Error creating booking:', error.response?.data || error.message);
     throw error;
   }};
+export const createBulkBooking = async (bookingData) => {
+  try {
+    const response = await apiClient.post('/bookings/bulk/', bookingData);
+    return response.data;
+  } catch (error) {
+    console.error('Error creating bookings:', error.response?.data || error.message);
+    throw error;
+  }
+};
 export const fetchHallDetails = async (hallId) => {
   try {
     const response = await apiClient.get(`/halls/${hallId}/`);
@@ -172,6 +181,28 @@ export const fetchBookedSlots = async (hallId, date) => {
     return [];
   }
 };
+
+// Streams the taken slots of a hall on a date. `onChange` gets the full list
+// of taken slots every time a booking changes. Returns a function that stops the stream.
+export const subscribeBookedSlots = (hallId, date, onChange) => {
+  const source = new EventSource(`${apiClient.defaults.baseURL}/halls/${hallId}/live/?date=${date}`);
+  let taken = [];
+  source.addEventListener('snapshot', (event) => {
+    const [day] = JSON.parse(event.data);
+    taken = day ? day.slots : [];
+    onChange(taken);
+  });
+  source.addEventListener('slots', (event) => {
+    const { slots } = JSON.parse(event.data);
+    const changed = new Set(slots.map((slot) => slot.slot_time));
+    taken = taken
+      .filter((slot) => !changed.has(slot.slot_time))
+      .concat(slots.filter((slot) => slot.status !== 'Available'));
+    onChange(taken);
+  });
+  source.onerror = (error) => console.error('Booked slots stream error:', error);
+  return () => source.close();
+};
 export const fetchAllBookings = async () => {
   try {
     const response = await apiClient.get('/bookings/');
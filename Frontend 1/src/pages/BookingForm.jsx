@@ -6,7 +6,7 @@ import toast from 'react-hot-toast';
 import { ArrowLeft, Wifi, Monitor, Presentation, Speaker, Home } from 'lucide-react';
 import { DayPicker } from 'react-day-picker';
 import 'react-day-picker/dist/style.css';
-import { createBooking, fetchHallDetails, fetchSessions, fetchBookedSlots, fetchBlockedDates } from '../api/axios';
+import { createBulkBooking, fetchHallDetails, fetchSessions, fetchBookedSlots, fetchBlockedDates, subscribeBookedSlots } from '../api/axios';
 import apiClient from '../api/axios';
 import SimilarSpaces from '../components/booking/SimilarSpaces';
 import Select from 'react-select';
@@ -115,6 +115,15 @@ const BookingForm = () => {
     loadBookedSlots();
   }, [selectedRange, hall]);
 
+  // Keep the booked slots current while the user picks a slot
+  useEffect(() => {
+    if (!(selectedRange && selectedRange.from && hall) || typeof EventSource === 'undefined') {
+      return undefined;
+    }
+    const dateStr = selectedRange.from.toLocaleDateString('en-CA');
+    return subscribeBookedSlots(hall.id, dateStr, setBookedSlots);
+  }, [selectedRange, hall]);
+
   // Load blocked dates when hall and selected range change
   useEffect(() => {
     const loadBlockedDates = async () => {
@@ -164,16 +173,6 @@ const BookingForm = () => {
     }
   };
 
-  const getDatesInRange = (startDate, endDate) => {
-    const dates = [];
-    let currentDate = new Date(startDate);
-    while (currentDate <= endDate) {
-      dates.push(new Date(currentDate));
-      currentDate.setDate(currentDate.getDate() + 1);
-    }
-    return dates;
-  };
-
   const handleSubmit = async (e) => {
     e.preventDefault();
 
@@ -185,41 +184,27 @@ const BookingForm = () => {
 
     const toastId = toast.loading("Submitting booking...");
     try {
-      const dates = getDatesInRange(selectedRange.from, selectedRange.to);
-      let lastBookingId = null;
-
-      for (const date of dates) {
-        for (const slot of selectedSlots) {
-          const payload = {
-            slot_date: date.toLocaleDateString('en-CA'), // 'en-CA' locale formats as YYYY-MM-DD
-            slot_time: slot,
-            emp_code: bookingDetails.emp_code,
-            emp_name: bookingDetails.emp_name,
-            emp_email_id: bookingDetails.emp_email_id,
-            emp_mobile_no: bookingDetails.emp_mobile_no,
-            team_name: bookingDetails.team_name,
-            office: hall.office,
-            hall: hall.id,
-            session: bookingDetails.session,
-            description: bookingDetails.description,
-            shift: bookingDetails.shift,
-            it_support: bookingDetails.it_support,
-            hr_support: bookingDetails.hr_support,
-            fin_support: bookingDetails.fin_support,
-            caf_support: bookingDetails.cafeteria,
-            wifi: bookingDetails.wifi,
-            tv: bookingDetails.tv,
-            whiteboard: bookingDetails.whiteboard,
-            speaker: bookingDetails.speaker,
-            mic: bookingDetails.mic,
-            extension_power_box: bookingDetails.extension_power_box,
-            stationaries: bookingDetails.stationaries,
-            chairs_tables: bookingDetails.chairs_tables
-          };
-           const response = await createBooking(payload);
-          lastBookingId = response.id;
-        }
-      }
+      const payload = {
+        start_date: selectedRange.from.toLocaleDateString('en-CA'), // 'en-CA' locale formats as YYYY-MM-DD
+        end_date: selectedRange.to.toLocaleDateString('en-CA'),
+        slot_times: selectedSlots,
+        emp_code: bookingDetails.emp_code,
+        emp_name: bookingDetails.emp_name,
+        emp_email_id: bookingDetails.emp_email_id,
+        emp_mobile_no: bookingDetails.emp_mobile_no,
+        team_name: bookingDetails.team_name,
+        office: hall.office,
+        hall: hall.id,
+        session: bookingDetails.session,
+        description: bookingDetails.description,
+        shift: bookingDetails.shift,
+        it_support: bookingDetails.it_support,
+        hr_support: bookingDetails.hr_support,
+        fin_support: bookingDetails.fin_support,
+        caf_support: bookingDetails.cafeteria
+      };
+      const bookings = await createBulkBooking(payload);
+      const lastBookingId = bookings.length > 0 ? bookings[bookings.length - 1].id : null;
 
       toast.success("Booking submitted successfully!", { id: toastId });
       if (lastBookingId) {
@@ -228,7 +213,10 @@ const BookingForm = () => {
         navigate('/'); // Fallback if no booking was made
       }
     } catch (error) {
-      if (error.response && error.response.data && error.response.data.non_field_errors) {
+      if (error.response && error.response.data && error.response.data.errors) {
+        const { slot_date, slot_time, error: reason } = error.response.data.errors[0];
+        toast.error(`${slot_date} ${slot_time}: ${reason}`, { id: toastId });
+      } else if (error.response && error.response.data && error.response.data.non_field_errors) {
         toast.error(error.response.data.non_field_errors[0], { id: toastId });
       } else {
         toast.error("Booking failed. Please try again.", { id: toastId });
@@ -241,7 +229,7 @@ const BookingForm = () => {
     for (let hour = startHour; hour <= endHour; hour++) {
       for (let min of [0, 30]) {
         const formatTime = (h, m) => {
-          const ampm = h >= 12 ? "PM" : "AM";
+          const ampm = h % 24 >= 12 ? "PM" : "AM";
           const displayHour = h % 12 === 0 ? 12 : h % 12;
           const displayMin = m === 0 ? "00" : m;
           return `${displayHour}:${displayMin} ${ampm}`;
@@ -56,6 +56,12 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
+    # Used by the throttles in hall_api/throttling.py
+    'DEFAULT_THROTTLE_RATES': {
+        'otp_email': os.getenv('OTP_EMAIL_RATE', '5/hour'),
+        'otp_send_ip': os.getenv('OTP_SEND_IP_RATE', '20/hour'),
+        'otp_verify_ip': os.getenv('OTP_VERIFY_IP_RATE', '60/hour'),
+    },
 }
 from datetime import timedelta
 
@@ -100,7 +106,7 @@ SIMPLE_JWT = {
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'hall_api.middleware.AsyncWhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -108,8 +114,46 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'hall_api.middleware.QueryBudgetMiddleware',
 ]
 
+# Database queries a request may run before it is logged as over budget.
+# Views can set their own `query_budget`; strict mode raises instead of logging.
+QUERY_BUDGET_DEFAULT = int(os.getenv('QUERY_BUDGET_DEFAULT', 25))
+QUERY_BUDGET_STRICT = os.getenv('QUERY_BUDGET_STRICT', 'False') == 'True'
+# Report each request's query count in an X-Query-Count header (used by benchmark_api)
+QUERY_BUDGET_HEADER = os.getenv('QUERY_BUDGET_HEADER', str(DEBUG)) == 'True'
+
+# Keyset pagination for bookings, slots and blocked dates. Lists are paginated
+# when a client sends `cursor` or `page_size`, or always once the flag is on.
+KEYSET_PAGE_SIZE = int(os.getenv('KEYSET_PAGE_SIZE', 50))
+KEYSET_MAX_PAGE_SIZE = int(os.getenv('KEYSET_MAX_PAGE_SIZE', 500))
+KEYSET_PAGINATE_BY_DEFAULT = os.getenv('KEYSET_PAGINATE_BY_DEFAULT', 'False') == 'True'
+
+# Seconds clients and shared caches may reuse master-data responses (halls,
+# offices, sessions...) before revalidating them with their ETag
+MASTER_DATA_MAX_AGE = int(os.getenv('MASTER_DATA_MAX_AGE', 60))
+
+# Live slot updates over Server-Sent Events. The in-process broker only
+# reaches clients connected to the same worker process.
+LIVE_BROKER = os.getenv('LIVE_BROKER', 'hall_api.pubsub.InProcessBroker')
+LIVE_SUBSCRIBER_QUEUE_SIZE = int(os.getenv('LIVE_SUBSCRIBER_QUEUE_SIZE', 100))
+LIVE_HEARTBEAT_SECONDS = int(os.getenv('LIVE_HEARTBEAT_SECONDS', 15))
+# Streams are closed after this many seconds and the browser reconnects
+LIVE_STREAM_MAX_AGE = int(os.getenv('LIVE_STREAM_MAX_AGE', 300))
+
+# Booking exports read this many rows per database round trip and send
+# pieces of about this many bytes
+BOOKING_EXPORT_CHUNK_SIZE = int(os.getenv('BOOKING_EXPORT_CHUNK_SIZE', 2000))
+BOOKING_EXPORT_BUFFER_BYTES = int(os.getenv('BOOKING_EXPORT_BUFFER_BYTES', 64 * 1024))
+
+# Longest date range, in days, a free-hall search may cover
+HALL_SEARCH_MAX_DAYS = int(os.getenv('HALL_SEARCH_MAX_DAYS', 31))
+
+# Lifetime of an emailed OTP, and wrong codes allowed before it is revoked
+OTP_TTL_MINUTES = int(os.getenv('OTP_TTL_MINUTES', 5))
+OTP_MAX_ATTEMPTS = int(os.getenv('OTP_MAX_ATTEMPTS', 5))
+
 ROOT_URLCONF = 'backend.urls'
 
 TEMPLATES = [
@@ -136,10 +180,27 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+        'OPTIONS': {
+            # Take the write lock when a transaction starts, so a transaction
+            # that reads then writes waits for the busy timeout instead of
+            # failing with "database is locked" when it tries to upgrade
+            'transaction_mode': os.getenv('SQLITE_TRANSACTION_MODE', 'IMMEDIATE'),
+        },
     }
 }
 
+# Applied to every new SQLite connection (see hall_api/sqlite.py)
+SQLITE_PRAGMAS = {
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    # Negative sizes are in KiB
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -64 * 1024)),
+    'temp_store': os.getenv('SQLITE_TEMP_STORE', 'MEMORY'),
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -1,8 +1,35 @@
 from django.contrib import admin
+from django.db import transaction
 from .models import (
     Entity, OfficeMaster, AdminUser, HallMaster, 
-    SessionMaster, Infrastructure, SlotMaster, Booking
+    SessionMaster, Infrastructure, SlotMaster, Booking, EmailOutbox
 )
+from .signals import booking_snapshot, send_booking_changes
+
+
+class BookingAdmin(admin.ModelAdmin):
+    """
+    Announces admin edits the way the API does, so the daily rollup, slot
+    statuses and availability caches follow them.
+    """
+    def save_model(self, request, obj, form, change):
+        previous = Booking.objects.filter(pk=obj.pk).first() if change else None
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            send_booking_changes([(previous, obj)])
+
+    def delete_model(self, request, obj):
+        previous = booking_snapshot(obj)
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            send_booking_changes([(previous, None)])
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            previous = list(queryset)
+            super().delete_queryset(request, queryset)
+            send_booking_changes((booking, None) for booking in previous)
+
 
 admin.site.register(Entity)
 admin.site.register(OfficeMaster)
@@ -11,4 +38,5 @@ admin.site.register(HallMaster)
 admin.site.register(SessionMaster)
 admin.site.register(Infrastructure)
 admin.site.register(SlotMaster)
-admin.site.register(Booking)
\ No newline at end of file
+admin.site.register(Booking, BookingAdmin)
+admin.site.register(EmailOutbox)
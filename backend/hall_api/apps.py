@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class HallApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'hall_api'
+
+    def ready(self):
+        # Connect the booking_changed, master-data invalidation, SQLite
+        # connection setup and query counting receivers
+        from . import availability, live, master_cache, middleware, occupancy, slot_master, sqlite, stats  # noqa: F401
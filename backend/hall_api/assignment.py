@@ -0,0 +1,137 @@
+"""
+Automatic hall assignment from a session type's preferred halls.
+
+A SessionMaster names up to three preferred halls. assign_hall() tries them
+in order and picks the first that is usable and free for every requested
+date and slot, explaining why each preference before it was passed over.
+The bookings and blocked dates of all the candidates are read together in
+a single query, however many preferences, dates and slots there are.
+"""
+from django.db.models import CharField, IntegerField, Q, Value
+
+from .master_cache import get_master
+from .models import BlockedDate, Booking, HallMaster
+from .slot_master import HOLDING_STATUSES
+from .slots import format_time, parse_slot_time
+
+PREFERENCES = ('preferred_hall_1', 'preferred_hall_2', 'preferred_hall_3')
+
+# Marks blocked dates among the booking rows of _candidate_rows()
+BLOCKED = 'Blocked'
+
+
+def preferred_halls(session):
+    """
+    (rank, hall or None) for each of the session's preferences, in order.
+    """
+    halls = []
+    for rank, field in enumerate(PREFERENCES, 1):
+        hall_id = getattr(session, f'{field}_id')
+        try:
+            hall = get_master(HallMaster, hall_id) if hall_id else None
+        except HallMaster.DoesNotExist:
+            hall = None
+        halls.append((rank, hall))
+    return halls
+
+
+def _candidate_rows(halls, dates, start, end):
+    """
+    (hall_id, office_id, date, slot_start, slot_end, status) rows for the
+    holding bookings of `halls` overlapping minutes `start` to `end` on
+    `dates`, and their blocked dates with status BLOCKED. Office-wide blocks
+    have no hall_id.
+    """
+    hall_ids = {hall.id for hall in halls}
+    office_ids = {hall.office_id for hall in halls}
+    bookings = Booking.objects.filter(
+        hall_id__in=hall_ids,
+        slot_date__in=dates,
+        slot_start__lt=end,
+        slot_end__gt=start,
+        status__in=HOLDING_STATUSES,
+        is_deleted=False,
+    ).values_list('hall_id', 'office_id', 'slot_date', 'slot_start', 'slot_end', 'status')
+    blocked = BlockedDate.objects.filter(
+        Q(hall_id__in=hall_ids) | Q(hall__isnull=True, office_id__in=office_ids),
+        blocked_date__in=dates,
+    ).annotate(
+        no_start=Value(None, output_field=IntegerField()),
+        no_end=Value(None, output_field=IntegerField()),
+        kind=Value(BLOCKED, output_field=CharField()),
+    ).values_list('hall_id', 'office_id', 'blocked_date', 'no_start', 'no_end', 'kind')
+    return bookings.union(blocked, all=True)
+
+
+def _reasons(hall, slots, dates, rows):
+    """
+    Why `hall` cannot take every slot on every date; empty when it can.
+    """
+    if hall.is_deleted:
+        return ['The hall has been deleted']
+    if hall.is_freeze:
+        return ['The hall is frozen']
+
+    opening, closing = hall.bookable_hours()
+    reasons = [
+        f'{slot_time} is outside the hall\'s hours ({format_time(opening)} - {format_time(closing)})'
+        for slot_time, (start, end) in slots.items() if start < opening or end > closing
+    ]
+
+    blocked = {
+        slot_date for hall_id, office_id, slot_date, _, _, status in rows
+        if status == BLOCKED and (hall_id == hall.id or (hall_id is None and office_id == hall.office_id))
+    }
+    reasons.extend(f'The hall is blocked on {slot_date}' for slot_date in sorted(blocked))
+
+    held = {}
+    for hall_id, _, slot_date, booked_start, booked_end, status in rows:
+        if hall_id == hall.id and status != BLOCKED and slot_date not in blocked:
+            held.setdefault(slot_date, []).append((booked_start, booked_end, status))
+    for slot_date in dates:
+        for slot_time, (start, end) in slots.items():
+            statuses = sorted({
+                status for booked_start, booked_end, status in held.get(slot_date, ())
+                if booked_start < end and booked_end > start
+            })
+            if statuses:
+                reasons.append(f'{slot_time} on {slot_date} is held by a {" and ".join(statuses)} booking')
+    return reasons
+
+
+def assign_hall(session, dates, slot_times):
+    """
+    Try the session's preferred halls in order for every slot of
+    `slot_times` on every one of `dates`.
+
+    Returns (hall, rank, skipped): the first hall free for all of them and
+    its preference rank, or (None, None, skipped) when none is. `skipped`
+    lists {'preference', 'hall', 'hall_code', 'reasons'} for each preference
+    passed over.
+    """
+    slots = {slot_time: parse_slot_time(slot_time) for slot_time in slot_times}
+    preferences = preferred_halls(session)
+    halls = [hall for _, hall in preferences if hall is not None]
+    rows = []
+    if halls:
+        rows = list(_candidate_rows(
+            halls, dates,
+            min(start for start, _ in slots.values()),
+            max(end for _, end in slots.values()),
+        ))
+
+    skipped = []
+    for rank, hall in preferences:
+        if hall is None:
+            reasons = ['No hall is set for this preference']
+        else:
+            reasons = _reasons(hall, slots, dates, rows)
+            if not reasons:
+                return hall, rank, skipped
+        skipped.append({
+            'preference': rank,
+            'hall': hall.id if hall else None,
+            'hall_code': hall.hall_code if hall else None,
+            'reasons': reasons,
+        })
+    return None, None, skipped
@@ -0,0 +1,455 @@
+"""
+Async versions of the read-heavy availability and dashboard endpoints.
+
+Under an ASGI worker (see the Dockerfile) a request waiting on the database
+here holds no worker thread, so one worker keeps serving other requests.
+They answer exactly as the DRF views they replace did. All of them are
+public reads, so they skip DRF's authentication and permission layers.
+
+The live endpoints stream slot changes as Server-Sent Events. They need the
+ASGI server: under WSGI a stream would hold a worker for its whole life.
+The booking export streams too; under WSGI Django reads the whole export
+into memory before sending it, so it only stays flat under ASGI.
+"""
+import asyncio
+import csv
+import io
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_GET
+from rest_framework.renderers import JSONRenderer
+
+from .availability import aget_day
+from .live import hall_channel, office_channel, snapshot
+from .master_cache import aget_master
+from .occupancy import aget_occupancy
+from .slots import MINUTES_PER_DAY, parse_time
+from .filters import BookingFilter
+from .models import Booking, DailyBookingStats, HallMaster, OfficeMaster, SlotMaster
+from .pubsub import broker
+from .search import AMENITIES, free_halls, parse_list, search_dates, within_hours
+from .serializers import HallMasterSerializer, SlotMasterSerializer, ValuesReader, booking_reader
+
+slot_reader = ValuesReader(SlotMasterSerializer)
+
+
+def json_response(data, status=200):
+    """
+    Render like DRF's JSONRenderer, so clients get the same bytes as before.
+    """
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+def error_response(message, status=400):
+    return json_response({'error': message}, status=status)
+
+
+def not_found(model):
+    return json_response({'detail': f'No {model.__name__} matches the given query.'}, status=404)
+
+
+def date_param(request):
+    """
+    The required `date` query parameter, or the 400 response to send instead.
+    """
+    date_str = request.GET.get('date')
+    if not date_str:
+        return None, error_response('Date parameter is required')
+    try:
+        slot_date = parse_date(date_str)
+    except ValueError:
+        slot_date = None
+    if not slot_date:
+        return None, error_response('Date must be in YYYY-MM-DD format')
+    return slot_date, None
+
+
+async def alive_master(model, pk):
+    """
+    A non-deleted master row, or None.
+    """
+    try:
+        instance = await aget_master(model, pk)
+    except model.DoesNotExist:
+        return None
+    return None if instance.is_deleted else instance
+
+
+@require_GET
+async def booked_slots(request, pk):
+    """
+    Get all booked time slots for a specific hall and date with status information.
+    """
+    hall = await alive_master(HallMaster, pk)
+    if hall is None:
+        return not_found(HallMaster)
+    slot_date, error = date_param(request)
+    if error:
+        return error
+
+    # Served from the cached availability bitmap for this hall and date
+    day = await aget_day(hall.id, slot_date)
+    return json_response(day.slots())
+
+
+@require_GET
+async def available_halls(request):
+    """
+    Get available halls with filtering options.
+    Query parameters: office, min_capacity
+    """
+    office_id = request.GET.get('office')
+    min_capacity = request.GET.get('min_capacity')
+
+    queryset = HallMasterSerializer.eager_load(HallMaster.objects.filter(is_deleted=False))
+    try:
+        if office_id:
+            queryset = queryset.filter(office_id=int(office_id))
+        if min_capacity:
+            queryset = queryset.filter(capacity__gte=int(min_capacity))
+    except ValueError:
+        return error_response('office and min_capacity must be integers')
+
+    halls = [hall async for hall in queryset]
+    return json_response(HallMasterSerializer(halls, many=True, context={'request': request}).data)
+
+
+def date_range_params(request):
+    """
+    The searched dates from `date`, or from `start_date` to `end_date`, or
+    the 400 response to send instead.
+    """
+    if request.GET.get('date'):
+        slot_date, error = date_param(request)
+        return (slot_date, slot_date), error
+    try:
+        start_date = parse_date(request.GET.get('start_date') or '')
+        end_date = parse_date(request.GET.get('end_date') or '')
+    except ValueError:
+        start_date = end_date = None
+    if not start_date or not end_date:
+        return None, error_response('date, or start_date and end_date, are required in YYYY-MM-DD format')
+    if end_date < start_date:
+        return None, error_response('end_date must not be before start_date')
+    max_days = getattr(settings, 'HALL_SEARCH_MAX_DAYS', 31)
+    if (end_date - start_date).days >= max_days:
+        return None, error_response(f'Search at most {max_days} days at a time')
+    return (start_date, end_date), None
+
+
+@require_GET
+async def search_halls(request):
+    """
+    Halls free for a whole time window on every date of a range.
+    Query parameters: date (or start_date and end_date), start_time,
+    end_time, office, min_capacity, category and amenities (comma-separated)
+    """
+    date_range, error = date_range_params(request)
+    if error:
+        return error
+    office_id, error = office_param(request)
+    if error:
+        return error
+    try:
+        start = parse_time(request.GET.get('start_time', ''))
+        end = parse_time(request.GET.get('end_time', ''))
+    except ValueError:
+        return error_response('start_time and end_time are required, e.g. "9:00 AM" or "09:00"')
+    if end == 0:
+        # "12:00 AM" ends a window at the end of the day
+        end = MINUTES_PER_DAY
+    if end <= start:
+        return error_response('end_time must be after start_time')
+    try:
+        min_capacity = int(request.GET['min_capacity']) if request.GET.get('min_capacity') else None
+    except ValueError:
+        return error_response('min_capacity must be an integer')
+    try:
+        categories = parse_list(request.GET.get('category'), HallMaster.Categories.values)
+    except ValueError as unknown:
+        return error_response(f'Unknown category: {unknown}')
+    try:
+        amenities = parse_list(request.GET.get('amenities'), AMENITIES)
+    except ValueError as unknown:
+        return error_response(f'Unknown amenities: {unknown}')
+
+    dates = search_dates(*date_range)
+    if not dates:
+        # Only Sundays, which are never bookable
+        return json_response([])
+    queryset = free_halls(
+        HallMasterSerializer.eager_load(HallMaster.objects.all()), dates, start, end,
+        office_id=office_id, min_capacity=min_capacity, categories=categories, amenities=amenities,
+    )
+    halls = [hall async for hall in queryset if within_hours(hall, start, end)]
+    return json_response(HallMasterSerializer(halls, many=True, context={'request': request}).data)
+
+
+@require_GET
+async def available_slots(request):
+    """
+    Get available slots, optionally for a specific date.
+    """
+    queryset = SlotMaster.objects.filter(slot_status='Available')
+    date = request.GET.get('date')
+    try:
+        # Building the filter is what rejects a malformed date
+        if date:
+            queryset = queryset.filter(slot_date=date)
+        return json_response(await slot_reader.aserialize(queryset))
+    except DjangoValidationError:
+        return error_response('date must be in YYYY-MM-DD format')
+
+
+@require_GET
+async def dashboard_stats(request):
+    """
+    Get statistics for the admin dashboard, optionally filtered by office, date, category, and session.
+    """
+    category = request.GET.get('category')
+    try:
+        office_id = int(request.GET['office_id']) if request.GET.get('office_id') else None
+    except ValueError:
+        return error_response('office_id must be an integer')
+    try:
+        session_id = int(request.GET['session_id']) if request.GET.get('session_id') else None
+    except ValueError:
+        return error_response('session_id must be an integer')
+    slot_date = request.GET.get('slot_date')
+    if slot_date:
+        try:
+            slot_date = parse_date(slot_date)
+        except ValueError:
+            slot_date = None
+        if not slot_date:
+            return error_response('slot_date must be in YYYY-MM-DD format')
+
+    # Base querysets; booking counts come from the DailyBookingStats rollup
+    halls_queryset = HallMaster.objects.filter(is_deleted=False)
+    stats_queryset = DailyBookingStats.objects.all()
+    bookings_queryset = Booking.objects.filter(is_deleted=False)
+
+    if office_id:
+        halls_queryset = halls_queryset.filter(office_id=office_id)
+        stats_queryset = stats_queryset.filter(office_id=office_id)
+        bookings_queryset = bookings_queryset.filter(office_id=office_id)
+
+    if slot_date:
+        stats_queryset = stats_queryset.filter(slot_date=slot_date)
+        bookings_queryset = bookings_queryset.filter(slot_date=slot_date)
+
+    if category:
+        halls_queryset = halls_queryset.filter(category=category)
+        stats_queryset = stats_queryset.filter(hall__category=category)
+        bookings_queryset = bookings_queryset.filter(hall__category=category)
+
+    if session_id:
+        stats_queryset = stats_queryset.filter(session_id=session_id)
+        bookings_queryset = bookings_queryset.filter(session_id=session_id)
+
+    today = timezone.now().date()
+    hall_counts = await halls_queryset.aaggregate(
+        total_halls=Count('id'),
+        available_halls=Count('id', filter=Q(is_freeze=False)),
+        working_halls=Count('id', filter=Q(is_freeze=True)),
+    )
+    booking_counts = await stats_queryset.aaggregate(
+        upcoming_booked_halls=Coalesce(Sum('approved', filter=Q(slot_date__gte=today)), 0),
+        pending_bookings=Coalesce(Sum('pending'), 0),
+        approved_bookings=Coalesce(Sum('approved'), 0),
+        rejected_bookings=Coalesce(Sum('rejected'), 0),
+        cancelled_bookings=Coalesce(Sum('cancelled'), 0),
+    )
+    upcoming_bookings = await booking_reader.aserialize(
+        bookings_queryset.filter(status='Approved', slot_date__gte=today).order_by('slot_date', 'slot_start')[:5]
+    )
+
+    return json_response({
+        **hall_counts,
+        'upcoming_booked_halls': booking_counts['upcoming_booked_halls'],
+        'upcoming_bookings': upcoming_bookings,
+        'pending_bookings': booking_counts['pending_bookings'],
+        'approved_bookings': booking_counts['approved_bookings'],
+        'rejected_bookings': booking_counts['rejected_bookings'],
+        'cancelled_bookings': booking_counts['cancelled_bookings'],
+    })
+
+
+def office_param(request):
+    """
+    The optional `office` query parameter, or the 400 response to send instead.
+    """
+    office_id = request.GET.get('office')
+    if not office_id:
+        return None, None
+    try:
+        return int(office_id), None
+    except ValueError:
+        return None, error_response('office must be an integer')
+
+
+@require_GET
+async def current_working_halls(request):
+    """
+    Get halls that are currently in use (booked for the current time slot with approved status).
+    """
+    office_id, error = office_param(request)
+    if error:
+        return error
+    snapshot = await aget_occupancy(office_id)
+    return json_response(snapshot['current'])
+
+
+@require_GET
+async def occupancy(request):
+    """
+    Who is in each hall during the current slot and who is booked for the
+    next one, optionally for one office. Cheap enough for display boards to
+    poll often: it is served from a snapshot until the slot ends or a
+    booking changes.
+    """
+    office_id, error = office_param(request)
+    if error:
+        return error
+    return json_response(await aget_occupancy(office_id))
+
+def server_sent_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+async def slot_event_stream(channels, hall_ids, slot_date):
+    """
+    A `snapshot` event with the taken slots of every hall, then a `slots`
+    event with the new state of the changed slots whenever bookings change.
+    """
+    # Subscribe before taking the snapshot, so no change falls in between
+    subscription = broker.subscribe(channels)
+    take_snapshot = sync_to_async(snapshot)
+    try:
+        yield 'retry: 3000\n\n'
+        yield server_sent_event('snapshot', await take_snapshot(hall_ids, slot_date))
+
+        loop = asyncio.get_running_loop()
+        closes_at = loop.time() + getattr(settings, 'LIVE_STREAM_MAX_AGE', 300)
+        heartbeat = getattr(settings, 'LIVE_HEARTBEAT_SECONDS', 15)
+        while (remaining := closes_at - loop.time()) > 0:
+            try:
+                _, message = await asyncio.wait_for(subscription.get(), timeout=min(heartbeat, remaining))
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle connection
+                yield ': keepalive\n\n'
+                continue
+            if subscription.overflowed:
+                # Too far behind: the messages in between were dropped
+                subscription.overflowed = False
+                yield server_sent_event('snapshot', await take_snapshot(hall_ids, slot_date))
+            else:
+                yield server_sent_event('slots', message)
+    finally:
+        subscription.close()
+
+
+def event_stream_response(stream):
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@require_GET
+async def hall_live_slots(request, pk):
+    """
+    Stream slot changes of one hall on the `date` query parameter.
+    """
+    hall = await alive_master(HallMaster, pk)
+    if hall is None:
+        return not_found(HallMaster)
+    slot_date, error = date_param(request)
+    if error:
+        return error
+    return event_stream_response(slot_event_stream([hall_channel(hall.id, slot_date)], [hall.id], slot_date))
+
+
+@require_GET
+async def office_live_slots(request, pk):
+    """
+    Stream slot changes of every hall in an office on the `date` query parameter.
+    """
+    office = await alive_master(OfficeMaster, pk)
+    if office is None:
+        return not_found(OfficeMaster)
+    slot_date, error = date_param(request)
+    if error:
+        return error
+    hall_ids = [
+        hall_id async for hall_id in
+        HallMaster.objects.filter(office_id=office.id, is_deleted=False).order_by('id').values_list('id', flat=True)
+    ]
+    return event_stream_response(slot_event_stream([office_channel(office.id, slot_date)], hall_ids, slot_date))
+
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+async def export_stream(rows, names, export_format):
+    """
+    Encode rows of field values as CSV with a header line, or as one JSON
+    object per line, in pieces of about BOOKING_EXPORT_BUFFER_BYTES.
+    """
+    buffer_bytes = getattr(settings, 'BOOKING_EXPORT_BUFFER_BYTES', 64 * 1024)
+    buffer = io.StringIO()
+    if export_format == 'csv':
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+        write = writer.writerow
+    else:
+        def write(row):
+            buffer.write(json.dumps(dict(zip(names, row)), ensure_ascii=False, separators=(',', ':')))
+            buffer.write('\n')
+
+    async for row in rows:
+        write(row)
+        if buffer.tell() >= buffer_bytes:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+@require_GET
+async def booking_export(request):
+    """
+    Stream every booking matching the BookingFilter query parameters
+    (date_range, office_name, status...) as CSV or, with format=ndjson,
+    newline-delimited JSON. Rows are read from the database in chunks as
+    the client downloads them, so memory use does not grow with the export.
+    """
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_CONTENT_TYPES:
+        return error_response(f"format must be one of: {', '.join(EXPORT_CONTENT_TYPES)}")
+    filterset = BookingFilter(request.GET, queryset=Booking.objects.filter(is_deleted=False))
+    if not filterset.is_valid():
+        return json_response(filterset.errors, status=400)
+
+    bookings = filterset.qs.order_by('slot_date', 'slot_start', 'id')
+    rows = booking_reader.aiterate(bookings, chunk_size=getattr(settings, 'BOOKING_EXPORT_CHUNK_SIZE', 2000))
+    response = StreamingHttpResponse(
+        export_stream(rows, booking_reader.names, export_format),
+        content_type=EXPORT_CONTENT_TYPES[export_format],
+    )
+    filename = f'bookings-{timezone.localdate():%Y%m%d}.{export_format}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,205 @@
+"""
+Per-hall daily availability bitmaps.
+
+Each (hall, date) is summarised by two 48-bit masks, one bit per half-hour
+slot: `booked` for approved bookings and `pending` for bookings awaiting
+approval. The masks are cached, so availability checks are bit operations
+instead of booking scans.
+
+Cached days are keyed by a per-hall generation number, which is bumped once
+a booking change to the hall commits. Later reads miss and reload from the
+database, and a reload that raced the change is written under the old
+generation where nothing reads it. Workers only see each other's bumps
+through a shared cache: with the default per-process locmem cache other
+workers serve stale days for up to AVAILABILITY_CACHE_TIMEOUT, so point
+CACHES at Redis or Memcached when running more than one worker. Either way
+the process-local tier may lag by AVAILABILITY_LOCAL_CACHE_TTL seconds.
+"""
+import time
+from typing import NamedTuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.dispatch import receiver
+
+from .caching import TieredCache
+from .models import Booking
+from .signals import booking_changed
+from .slots import SLOT_MINUTES, MINUTES_PER_DAY, format_slot_time
+
+SLOTS_PER_DAY = MINUTES_PER_DAY // SLOT_MINUTES
+FULL_DAY_MASK = (1 << SLOTS_PER_DAY) - 1
+
+cache = TieredCache(
+    timeout=getattr(settings, 'AVAILABILITY_CACHE_TIMEOUT', 300),
+    local_size=getattr(settings, 'AVAILABILITY_LOCAL_CACHE_SIZE', 4096),
+    local_ttl=getattr(settings, 'AVAILABILITY_LOCAL_CACHE_TTL', 5),
+)
+
+
+def slot_mask(start, end):
+    """
+    Bits of every half-hour slot that the interval [start, end) touches.
+    """
+    first = start // SLOT_MINUTES
+    last = -(-end // SLOT_MINUTES)  # round up
+    return ((1 << last) - 1) ^ ((1 << first) - 1)
+
+
+class DayAvailability(NamedTuple):
+    booked: int = 0
+    pending: int = 0
+
+    def is_free(self, start, end):
+        return not self.booked & slot_mask(start, end)
+
+    def is_pending(self, start, end):
+        return bool(self.pending & slot_mask(start, end))
+
+    def free_mask(self):
+        return FULL_DAY_MASK & ~self.booked
+
+    def slots(self):
+        """
+        List the taken slots as {'slot_time', 'status'} dicts in time order.
+        """
+        taken = []
+        for index in range(SLOTS_PER_DAY):
+            bit = 1 << index
+            if self.booked & bit:
+                status = 'Approved'
+            elif self.pending & bit:
+                status = 'Pending'
+            else:
+                continue
+            start = index * SLOT_MINUTES
+            taken.append({'slot_time': format_slot_time(start, start + SLOT_MINUTES), 'status': status})
+        return taken
+
+
+def _key(hall_id, generation, slot_date):
+    return f'availability:{hall_id}:{generation}:{slot_date.isoformat()}'
+
+
+def _generation_key(hall_id):
+    return f'availability:generation:{hall_id}'
+
+
+def _generation(hall_id):
+    """
+    The hall's current generation. A hall without one starts from the clock,
+    so an evicted generation is never reused while its days are cached.
+    """
+    key = _generation_key(hall_id)
+    generation = cache.get(key)
+    if generation is None:
+        # add() keeps a generation another worker set in the meantime
+        cache.shared.add(key, time.time_ns(), None)
+        generation = cache.shared.get(key)
+        cache.local.set(key, generation)
+    return generation
+
+
+def invalidate_halls(hall_ids):
+    """
+    Make every cached day of these halls unreachable.
+    """
+    for hall_id in hall_ids:
+        key = _generation_key(hall_id)
+        cache.local.delete(key)
+        try:
+            cache.shared.incr(key)
+        except ValueError:
+            # No generation, so no day of the hall can be read
+            pass
+
+
+def _load(pairs):
+    """
+    Build the bitmaps for a set of (hall_id, date) pairs with a single query.
+    """
+    pairs = set(pairs)
+    masks = {pair: [0, 0] for pair in pairs}
+    if not pairs:
+        return {}
+
+    rows = Booking.objects.filter(
+        hall_id__in={hall_id for hall_id, _ in pairs},
+        slot_date__in={slot_date for _, slot_date in pairs},
+        status__in=['Approved', 'Pending'],
+        is_deleted=False,
+        slot_start__isnull=False
+    ).values_list('hall_id', 'slot_date', 'slot_start', 'slot_end', 'status')
+
+    for hall_id, slot_date, start, end, status in rows:
+        day = masks.get((hall_id, slot_date))
+        if day is not None:
+            day[0 if status == 'Approved' else 1] |= slot_mask(start, end)
+
+    return {pair: DayAvailability(*day) for pair, day in masks.items()}
+
+
+def get_days(hall_id, dates):
+    """
+    Get the availability of a hall for several dates, keyed by date. Cached
+    days come from one get_many and the rest from one booking query.
+    """
+    # Read before any reload, so a reload racing a booking change is stored
+    # under the generation the change retires
+    generation = _generation(hall_id)
+    keys = {_key(hall_id, generation, slot_date): slot_date for slot_date in dates}
+    cached = cache.get_many(keys)
+    days = {keys[key]: DayAvailability(*value) for key, value in cached.items()}
+
+    missing = [slot_date for key, slot_date in keys.items() if key not in cached]
+    if missing:
+        loaded = _load((hall_id, slot_date) for slot_date in missing)
+        cache.set_many({_key(hall_id, generation, slot_date): tuple(day) for (_, slot_date), day in loaded.items()})
+        days.update({slot_date: day for (_, slot_date), day in loaded.items()})
+    return days
+
+
+def get_day(hall_id, slot_date):
+    return get_days(hall_id, [slot_date])[slot_date]
+
+
+async def aget_day(hall_id, slot_date):
+    """
+    get_day for async views. Days in the local tier are returned without
+    leaving the event loop.
+    """
+    generation = cache.local.get(_generation_key(hall_id))
+    cached = cache.local.get(_key(hall_id, generation, slot_date)) if generation is not None else None
+    if cached is not None:
+        return DayAvailability(*cached)
+    return await sync_to_async(get_day)(hall_id, slot_date)
+
+
+def _footprint(booking):
+    """
+    The (hall_id, date) a booking occupies, which mask it sets and its bits.
+    """
+    if booking is None or booking.is_deleted or booking.slot_start is None:
+        return None
+    if booking.status == 'Approved':
+        mask_index = 0
+    elif booking.status == 'Pending':
+        mask_index = 1
+    else:
+        return None
+    return (booking.hall_id, booking.slot_date), mask_index, slot_mask(booking.slot_start, booking.slot_end)
+
+
+@receiver(booking_changed)
+def update_availability(sender, changes, **kwargs):
+    """
+    Retire the cached days of every hall whose bitmaps the changes touch.
+    Cached masks are never patched in place: with a shared cache two workers
+    patching the same day could lose one another's update.
+    """
+    halls = set()
+    for previous, current in changes:
+        before, after = _footprint(previous), _footprint(current)
+        if before != after:
+            halls.update(footprint[0][0] for footprint in (before, after) if footprint)
+    invalidate_halls(halls)
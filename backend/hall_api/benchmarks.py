@@ -0,0 +1,360 @@
+"""
+Scratch databases filled with synthetic bookings, shared by the benchmark
+management commands, plus helpers to load-test the app over HTTP.
+"""
+import http.client
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.db import connections
+
+from .models import AdminUser, Booking, HallMaster, OfficeMaster, SessionMaster, SlotMaster
+from .slots import SLOT_MINUTES, format_slot_time
+
+BENCHMARK_MODELS = (OfficeMaster, HallMaster, SessionMaster, SlotMaster, Booking)
+
+HALLS = 20
+OFFICES = 4
+EMPLOYEES = 5000
+SLOT_STARTS = range(9 * 60, 18 * 60, SLOT_MINUTES)
+STATUSES = ['Approved'] * 6 + ['Pending'] * 2 + ['Rejected', 'Cancelled']
+
+# Username and password of the admin seeded_database_file creates
+BENCHMARK_ADMIN = ('bench-admin', 'bench-password')
+
+BOOKING_COLUMNS = [
+    'book_date', 'slot_date', 'slot_time', 'slot_start', 'slot_end', 'office_id', 'hall_id',
+    'session_id', 'emp_code', 'emp_name', 'emp_email_id', 'emp_mobile_no', 'team_name', 'shift',
+    'it_support', 'hr_support', 'fin_support', 'caf_support', 'status', 'approved',
+    'created_at', 'updated_at', 'is_deleted',
+]
+
+
+@contextmanager
+def scratch_database(alias):
+    """
+    A throwaway SQLite database registered under `alias`, holding only the
+    booking tables. Migrations are not run since they seed data we do not want.
+    """
+    fd, path = tempfile.mkstemp(suffix='.sqlite3', prefix=f'{alias}-')
+    os.close(fd)
+    connections.settings[alias] = {
+        **connections.settings['default'],
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+    }
+    try:
+        connection = connections[alias]
+        with connection.schema_editor() as editor:
+            for model in BENCHMARK_MODELS:
+                editor.create_model(model)
+        yield connection
+    finally:
+        connections[alias].close()
+        del connections[alias]
+        del connections.settings[alias]
+        os.remove(path)
+
+
+def load_bookings(connection, rows, seed=1):
+    """
+    Insert `rows` bookings spread over HALLS halls, centred on today, plus a
+    SlotMaster row per slot of each day for the first hall. Returns sample
+    filter values (hall, office, today, emp_code, emp_email) for queries,
+    and what writers need: the {hall: office} ids, the session id and the
+    last day holding bookings.
+    """
+    alias = connection.alias
+    rng = random.Random(seed)
+    with connection.cursor() as cursor:
+        # Tables referenced from these (AdminUser, Entity) do not exist here.
+        # Set on every load, as the schema editor turns the checks back on.
+        cursor.execute('PRAGMA foreign_keys = OFF')
+        cursor.execute('PRAGMA journal_mode = OFF')
+        cursor.execute('PRAGMA synchronous = OFF')
+
+    offices = [
+        OfficeMaster.objects.using(alias).create(
+            office_code=f'BO{i}', office_name=f'Office {i}', office_tag='bench', office_street='-',
+            office_area='-', office_city='-', office_state='-', office_country='-', office_pin_code='-'
+        )
+        for i in range(OFFICES)
+    ]
+    halls = [
+        HallMaster.objects.using(alias).create(
+            office=offices[i % OFFICES], hall_code=f'BH{i}', hall_name=f'Hall {i}', capacity=10 + i
+        )
+        for i in range(HALLS)
+    ]
+    session = SessionMaster.objects.using(alias).create(session_code='BS', session_type='bench')
+
+    # Each (hall, day, slot) gets at most one booking, so the unique
+    # approved-slot constraint always holds
+    per_day = HALLS * len(SLOT_STARTS)
+    today = date.today()
+    first_day = today - timedelta(days=rows // per_day // 2)
+    now = datetime.now().isoformat(sep=' ')
+    labels = {start: format_slot_time(start, start + SLOT_MINUTES) for start in SLOT_STARTS}
+
+    def booking_rows():
+        for i in range(rows):
+            day, rest = divmod(i, per_day)
+            hall = halls[rest % HALLS]
+            start = SLOT_STARTS[rest // HALLS]
+            status = rng.choice(STATUSES)
+            emp = rng.randrange(EMPLOYEES)
+            yield (
+                today, first_day + timedelta(days=day), labels[start], start, start + SLOT_MINUTES,
+                hall.office_id, hall.id, session.id, f'E{emp}', f'Employee {emp}',
+                f'employee{emp}@example.com', '0', 'Team', 'Day', False, False, False, False,
+                status, status == 'Approved', now, now, rng.random() < 0.05,
+            )
+
+    placeholders = ', '.join(['%s'] * len(BOOKING_COLUMNS))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {Booking._meta.db_table} ({', '.join(BOOKING_COLUMNS)}) VALUES ({placeholders})",
+            booking_rows()
+        )
+        cursor.executemany(
+            f'INSERT INTO {SlotMaster._meta.db_table} '
+            '(slot_date, hall_id, slot_time, slot_start, slot_end, slot_status, created_at, updated_at, is_deleted) '
+            'VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)',
+            (
+                (first_day + timedelta(days=day), halls[0].id, labels[start], start, start + SLOT_MINUTES,
+                 rng.choice(['Available', 'Booked']), now, now, False)
+                for day in range(rows // per_day + 1) for start in SLOT_STARTS
+            )
+        )
+
+    return {
+        'hall': halls[3].id,
+        'office': offices[1].id,
+        'today': today,
+        'emp_code': 'E42',
+        'emp_email': 'employee42@example.com',
+        'halls': {hall.id: hall.office_id for hall in halls},
+        'session': session.id,
+        'last_day': first_day + timedelta(days=(rows - 1) // per_day),
+    }
+
+
+@contextmanager
+def registered_database(alias, path):
+    """
+    Register the SQLite file at `path` under `alias` for the duration.
+    """
+    connections.settings[alias] = {**connections.settings['default'], 'NAME': path}
+    try:
+        yield connections[alias]
+    finally:
+        connections[alias].close()
+        del connections[alias]
+        del connections.settings[alias]
+
+
+@contextmanager
+def seeded_database_file(rows, seed=1):
+    """
+    A migrated SQLite file holding `rows` synthetic bookings and an admin
+    user, for running real server processes against (they find it through
+    SQLITE_PATH). Yields the path and the sample values of load_bookings,
+    plus the admin's credentials.
+    """
+    directory = tempfile.mkdtemp(prefix='loadtest-')
+    path = os.path.join(directory, 'db.sqlite3')
+    alias = 'loadtest_seed'
+    try:
+        manage(path, 'migrate', '--noinput')
+        with registered_database(alias, path) as connection:
+            params = load_bookings(connection, rows, seed=seed)
+            AdminUser.objects.db_manager(alias).create_user(
+                username=BENCHMARK_ADMIN[0], password=BENCHMARK_ADMIN[1], admin_code='BENCH',
+                role=AdminUser.Roles.ADMIN, office_id=params['office'],
+            )
+        params['admin'] = BENCHMARK_ADMIN
+        manage(path, 'rebuild_booking_stats')
+        yield path, params
+    finally:
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+
+
+def manage(database_path, *args):
+    """
+    Run a management command in a child process against `database_path`.
+    """
+    subprocess.run(
+        [sys.executable, 'manage.py', *args], cwd=settings.BASE_DIR, check=True,
+        env={**os.environ, 'SQLITE_PATH': database_path}, stdout=subprocess.DEVNULL
+    )
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def running_server(database_path, interface='wsgi', workers=1, threads=1, environment=None):
+    """
+    Serve the app with gunicorn on a free local port: sync workers for
+    'wsgi' (gthread when threads > 1) or uvicorn workers for 'asgi', with
+    `environment` added to the server's environment variables. Yields the port once the server accepts connections.
+    """
+    port = free_port()
+    command = [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', '--workers', str(workers)]
+    if interface == 'asgi':
+        command += ['--worker-class', 'uvicorn.workers.UvicornWorker', 'backend.asgi:application']
+    else:
+        command += ['--threads', str(threads), 'backend.wsgi:application']
+    process = subprocess.Popen(
+        command, cwd=settings.BASE_DIR,
+        env={**os.environ, **(environment or {}), 'SQLITE_PATH': database_path},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f'{interface} server did not start')
+                time.sleep(0.1)
+        yield port
+    finally:
+        process.terminate()
+        process.wait()
+
+
+class Sample:
+    """
+    What one client saw of one endpoint.
+    """
+    def __init__(self):
+        self.latencies = []
+        self.queries = []
+        self.errors = 0
+        self.rejected = 0
+
+
+def load(port, client_requests, concurrency, duration):
+    """
+    Run `concurrency` clients for `duration` seconds, each sending the
+    requests of `client_requests(client_index)` in turn and waiting for each
+    response before the next. Requests are (name, method, path, body,
+    headers) tuples, with body a JSON-serialisable value or None.
+
+    Returns {name: Sample}. Latencies are kept for 2xx/3xx responses only;
+    4xx responses count as rejected and 5xx or connection failures as
+    errors. Query counts come from the X-Query-Count header, so the server
+    needs QUERY_BUDGET_HEADER on.
+    """
+    deadline = time.perf_counter() + duration
+    per_client = [defaultdict(Sample) for _ in range(concurrency)]
+
+    def client(index):
+        samples = per_client[index]
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        for name, method, path, body, headers in client_requests(index):
+            if time.perf_counter() >= deadline:
+                break
+            sample = samples[name]
+            headers = dict(headers or {})
+            if body is not None:
+                body = json.dumps(body)
+                headers['Content-Type'] = 'application/json'
+            started = time.perf_counter()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                sample.errors += 1
+                continue
+            if response.status >= 500:
+                sample.errors += 1
+            elif response.status >= 400:
+                sample.rejected += 1
+            else:
+                sample.latencies.append(time.perf_counter() - started)
+                queries = response.getheader('X-Query-Count')
+                if queries is not None:
+                    sample.queries.append(int(queries))
+        connection.close()
+
+    clients = [threading.Thread(target=client, args=(index,)) for index in range(concurrency)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+
+    results = defaultdict(Sample)
+    for samples in per_client:
+        for name, sample in samples.items():
+            merged = results[name]
+            merged.latencies += sample.latencies
+            merged.queries += sample.queries
+            merged.errors += sample.errors
+            merged.rejected += sample.rejected
+    return dict(results)
+
+
+def drive(port, paths, concurrency, duration):
+    """
+    Have `concurrency` clients cycle through GETs of `paths` for `duration`
+    seconds. Returns {path: (latencies in seconds, error count)}, counting
+    every 4xx or 5xx response as an error.
+    """
+    def client_requests(index):
+        for path in itertools.islice(itertools.cycle(paths), index, None):
+            yield path, 'GET', path, None, None
+
+    results = load(port, client_requests, concurrency, duration)
+    return {
+        path: (results[path].latencies, results[path].errors + results[path].rejected)
+        if path in results else ([], 0)
+        for path in paths
+    }
+
+
+def summarise(sample, duration):
+    """
+    Throughput, latency percentiles and mean queries per request of a Sample.
+    mean_queries is None when the server did not report query counts.
+    """
+    latencies = sample.latencies
+    return {
+        'requests': len(latencies),
+        'requests_per_second': len(latencies) / duration,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'errors': sample.errors,
+        'rejected': sample.rejected,
+        'mean_queries': sum(sample.queries) / len(sample.queries) if sample.queries else None,
+    }
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
@@ -0,0 +1,104 @@
+"""
+A small process-local LRU that sits in front of one of Django's caches.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+
+
+class LocalLRUCache:
+    """
+    Process-local LRU with a per-entry TTL.
+    """
+    def __init__(self, maxsize=1024, ttl=5):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class TieredCache:
+    """
+    Reads go to the local LRU first and then to the shared Django cache, so
+    hot keys are served without a cache round-trip. Writes go to both.
+    """
+    def __init__(self, alias='default', timeout=3600, local_size=1024, local_ttl=5):
+        self.alias = alias
+        self.timeout = timeout
+        self.local = LocalLRUCache(maxsize=local_size, ttl=local_ttl)
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def get(self, key, default=None):
+        value = self.local.get(key)
+        if value is None:
+            value = self.shared.get(key)
+            if value is None:
+                return default
+            self.local.set(key, value)
+        return value
+
+    def get_many(self, keys):
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.local.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            shared_values = self.shared.get_many(missing)
+            for key, value in shared_values.items():
+                self.local.set(key, value)
+            found.update(shared_values)
+        return found
+
+    def set(self, key, value):
+        self.local.set(key, value)
+        self.shared.set(key, value, self.timeout)
+
+    def set_many(self, values):
+        for key, value in values.items():
+            self.local.set(key, value)
+        self.shared.set_many(values, self.timeout)
+
+    def delete(self, key):
+        self.local.delete(key)
+        self.shared.delete(key)
+
+    def delete_many(self, keys):
+        for key in keys:
+            self.local.delete(key)
+        self.shared.delete_many(keys)
@@ -0,0 +1,94 @@
+"""
+Conditional GET for master-data endpoints.
+
+The ETag of a response is derived from the data it is built from: for every
+model involved, the row count and the latest updated_at. Those are read
+with one small query, so a matching If-None-Match is answered with a 304
+before the list query runs or the serializer is touched. Being computed
+from the database, ETags agree across worker processes.
+"""
+import hashlib
+
+from django.conf import settings
+from django.db import connection
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+
+from .models import AdminUser
+
+# Columns whose latest value identifies a model's current state
+VERSION_FIELDS = {
+    # Rendered in the nested SPOC details, and not covered by updated_at
+    AdminUser: ('updated_at', 'last_login'),
+}
+
+
+def data_version(models):
+    """
+    A fingerprint of the current rows of `models`; it changes whenever a row
+    is added, saved or deleted.
+    """
+    quote = connection.ops.quote_name
+    fields = [VERSION_FIELDS.get(model, ('updated_at',)) for model in models]
+    width = max((len(names) for names in fields), default=0)
+    selects = []
+    for position, (model, names) in enumerate(zip(models, fields)):
+        columns = [f'MAX({quote(model._meta.get_field(name).column)})' for name in names]
+        columns += ['NULL'] * (width - len(columns))
+        selects.append(f"SELECT {position}, COUNT(*), {', '.join(columns)} FROM {quote(model._meta.db_table)}")
+    if not selects:
+        return ''
+    with connection.cursor() as cursor:
+        cursor.execute(' UNION ALL '.join(selects))
+        rows = sorted(cursor.fetchall())
+    return repr(rows)
+
+
+def conditional_response(request, version, respond, public=False):
+    """
+    Answer with 304 when If-None-Match carries the current ETag, otherwise
+    build the response with `respond`. Both get ETag and Cache-Control headers.
+
+    Public responses may be cached by shared caches such as a CDN; the rest
+    only by the client, and vary on the Authorization header.
+    """
+    basis = f'{request.build_absolute_uri()}|{request.accepted_renderer.format}|{version}'
+    etag = quote_etag(hashlib.sha1(basis.encode('utf-8')).hexdigest())
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = respond()
+    if response.status_code not in (200, 304):
+        return response
+
+    response['ETag'] = etag
+    max_age = getattr(settings, 'MASTER_DATA_MAX_AGE', 60)
+    if public:
+        patch_cache_control(response, public=True, max_age=max_age)
+    else:
+        patch_cache_control(response, private=True, max_age=max_age)
+        patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    ETag and Cache-Control support for list and retrieve on a viewset.
+    `etag_models` lists every model whose rows end up in the response.
+    """
+    etag_models = ()
+    cache_public = False
+
+    def list(self, request, *args, **kwargs):
+        return conditional_response(
+            request, data_version(self.etag_models),
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+            public=self.cache_public
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return conditional_response(
+            request, data_version(self.etag_models),
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs),
+            public=self.cache_public
+        )
@@ -0,0 +1,186 @@
+"""
+Synthetic datasets at production scale, for capacity testing.
+
+generate_dataset() builds entities, offices, halls, session types and a
+booking history from scale parameters. The same seed always gives the same
+rows. Everything is written with chunked bulk_create, so a million bookings
+take minutes. Bookings skip the booking_changed receivers; the
+DailyBookingStats rollup is rebuilt once at the end instead.
+"""
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.db import transaction
+
+from .models import Booking, Entity, HallMaster, OfficeMaster, SessionMaster
+from .search import AMENITIES
+from .slots import SLOT_MINUTES, day_slot_starts, format_slot_time, local_now
+from .stats import rebuild_daily_stats
+
+DEFAULT_STATUS_MIX = {'Approved': 60, 'Pending': 15, 'Rejected': 10, 'Cancelled': 15}
+
+CITIES = ['Chennai', 'Bengaluru', 'Hyderabad', 'Pune', 'Mumbai', 'Noida', 'Kolkata', 'Coimbatore']
+SESSION_TYPES = ['Meeting', 'Training', 'Interview', 'Town Hall', 'Workshop', 'Client Call', 'Review']
+TEAMS = ['Finance', 'Facilities', 'HR', 'IT', 'Operations', 'Sales', 'Support', 'Engineering']
+SHIFTS = [choice for choice, _ in Booking.SHIFT_CHOICES]
+
+
+def _bulk_create(model, rows, chunk_size, progress, total):
+    """
+    Insert `rows` in transactions of `chunk_size`, reporting progress after
+    each. Returns the number of rows inserted.
+    """
+    batch = []
+    done = 0
+
+    def flush():
+        nonlocal batch, done
+        with transaction.atomic():
+            model.objects.bulk_create(batch)
+        done += len(batch)
+        batch = []
+        if progress:
+            progress(model, done, total)
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            flush()
+    if batch:
+        flush()
+    return done
+
+
+def generate_dataset(
+    entities=3, offices=5, halls_per_office=20, days=365, future_days=30, bookings_per_hall_day=6,
+    status_mix=None, sessions=10, employees=5000, deleted_ratio=0.02, seed=1, prefix='GEN',
+    anchor_date=None, chunk_size=5000, progress=None,
+):
+    """
+    Create a dataset whose codes all start with `prefix`:
+
+    - `entities` entities, each office linked to one of them
+    - `offices` offices with `halls_per_office` halls of mixed category,
+      capacity and amenities
+    - `sessions` session types, each with up to three preferred halls
+    - `bookings_per_hall_day` bookings on distinct slots of every hall for
+      each non-Sunday of the `days` before `anchor_date` (default today)
+      and the `future_days` from it on, with statuses drawn by weight from `status_mix` and
+      `deleted_ratio` of them soft-deleted
+
+    `progress(model, done, total)` is called after every chunk. Returns the
+    number of rows created per model name.
+    """
+    rng = random.Random(seed)
+    status_mix = status_mix or DEFAULT_STATUS_MIX
+    statuses = list(status_mix)
+    cum_weights = list(accumulate(status_mix.values()))
+
+    _bulk_create(Entity, (
+        Entity(entity_code=f'{prefix}-E{i:03}', entity_name=f'Entity {i}', location=rng.choice(CITIES))
+        for i in range(1, entities + 1)
+    ), chunk_size, progress, entities)
+    entity_rows = list(Entity.objects.filter(entity_code__startswith=f'{prefix}-E').order_by('entity_code'))
+
+    office_rows = []
+    for i in range(1, offices + 1):
+        city = rng.choice(CITIES)
+        office_rows.append(OfficeMaster(
+            office_code=f'{prefix}-O{i:03}', office_name=f'{city} Office {i}', office_tag=prefix,
+            office_street=f'{rng.randrange(1, 500)} Main Road', office_area=f'Area {rng.randrange(1, 50)}',
+            office_city=city, office_state='-', office_country='India',
+            office_pin_code=str(rng.randrange(600_000, 700_000)),
+        ))
+    _bulk_create(OfficeMaster, office_rows, chunk_size, progress, offices)
+    office_rows = list(OfficeMaster.objects.filter(office_code__startswith=f'{prefix}-O').order_by('office_code'))
+    OfficeMaster.entities.through.objects.bulk_create([
+        OfficeMaster.entities.through(officemaster_id=office.id, entity_id=entity_rows[i % len(entity_rows)].id)
+        for i, office in enumerate(office_rows)
+    ] if entity_rows else [])
+
+    categories = [choice for choice, _ in HallMaster.Categories.choices]
+    hall_rows = []
+    for office_number, office in enumerate(office_rows, 1):
+        for i in range(1, halls_per_office + 1):
+            category = rng.choice(categories)
+            hall_rows.append(HallMaster(
+                office_id=office.id, hall_code=f'{prefix}-H{office_number:03}-{i:03}',
+                hall_name=f'{category.title()} {office_number}.{i}', category=category,
+                capacity=rng.choice([4, 6, 8, 10, 12, 20, 30, 50, 100, 200]),
+                **{amenity: rng.random() < 0.6 for amenity in AMENITIES},
+            ))
+    _bulk_create(HallMaster, hall_rows, chunk_size, progress, len(hall_rows))
+    hall_rows = list(
+        HallMaster.objects.filter(hall_code__startswith=f'{prefix}-H').order_by('hall_code')
+        .only('id', 'office_id', 'opening_time', 'closing_time')
+    )
+
+    session_rows = []
+    for i in range(1, sessions + 1):
+        preferred = rng.sample(hall_rows, min(3, len(hall_rows)))
+        preferred += [None] * (3 - len(preferred))
+        session_rows.append(SessionMaster(
+            session_code=f'{prefix}-S{i:03}', session_type=SESSION_TYPES[(i - 1) % len(SESSION_TYPES)],
+            preferred_hall_1=preferred[0], preferred_hall_2=preferred[1], preferred_hall_3=preferred[2],
+        ))
+    _bulk_create(SessionMaster, session_rows, chunk_size, progress, sessions)
+    session_ids = list(
+        SessionMaster.objects.filter(session_code__startswith=f'{prefix}-S').order_by('session_code')
+        .values_list('id', flat=True)
+    )
+
+    anchor_date = anchor_date or local_now().date()
+    dates = [
+        anchor_date + timedelta(days=offset) for offset in range(-days, future_days)
+        if (anchor_date + timedelta(days=offset)).weekday() != 6
+    ]
+    starts_by_hours = {}
+    labels = {}
+    total = 0
+    for hall in hall_rows:
+        hours = hall.operating_hours()
+        if hours not in starts_by_hours:
+            starts_by_hours[hours] = day_slot_starts(*hours)
+            labels.update((start, format_slot_time(start, start + SLOT_MINUTES)) for start in starts_by_hours[hours])
+        total += len(dates) * min(bookings_per_hall_day, len(starts_by_hours[hours]))
+
+    def booking_rows():
+        for hall in hall_rows:
+            starts = starts_by_hours[hall.operating_hours()]
+            per_day = min(bookings_per_hall_day, len(starts))
+            for slot_date in dates:
+                # Distinct slots per hall and day, so approved bookings never clash
+                for start in sorted(rng.sample(starts, per_day)):
+                    status = rng.choices(statuses, cum_weights=cum_weights)[0]
+                    emp = rng.randrange(employees)
+                    yield Booking(
+                        slot_date=slot_date,
+                        slot_time=labels[start],
+                        slot_start=start,
+                        slot_end=start + SLOT_MINUTES,
+                        office_id=hall.office_id,
+                        hall_id=hall.id,
+                        session_id=rng.choice(session_ids),
+                        emp_code=f'{prefix}{emp:06}',
+                        emp_name=f'Employee {emp}',
+                        emp_email_id=f'{prefix.lower()}.employee{emp}@example.com',
+                        emp_mobile_no=f'9{emp:09}',
+                        team_name=TEAMS[emp % len(TEAMS)],
+                        shift=SHIFTS[emp % len(SHIFTS)],
+                        status=status,
+                        approved=status == 'Approved',
+                        is_deleted=rng.random() < deleted_ratio,
+                    )
+
+    bookings = _bulk_create(Booking, booking_rows(), chunk_size, progress, total)
+    stats = rebuild_daily_stats()
+
+    return {
+        'Entity': entities,
+        'OfficeMaster': offices,
+        'HallMaster': len(hall_rows),
+        'SessionMaster': sessions,
+        'Booking': bookings,
+        'DailyBookingStats': stats,
+    }
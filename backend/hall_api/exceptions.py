@@ -0,0 +1,26 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class BookingConflict(APIException):
+    """
+    Raised when a booking would take a slot that another approved booking holds.
+    """
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'This slot is already booked.'
+    default_code = 'booking_conflict'
+
+    def __init__(self, conflicting_booking_id=None):
+        super().__init__()
+        # Set directly so the id is not coerced to a string
+        self.detail = {
+            'error': str(self.default_detail),
+            'conflicting_booking_id': conflicting_booking_id,
+        }
+
+
+class QueryBudgetExceeded(Exception):
+    """
+    Raised by QueryBudgetMiddleware in strict mode when a request runs more
+    queries than its budget allows.
+    """
@@ -0,0 +1,359 @@
+"""
+Bulk upsert of master data (offices, users, halls, sessions, infrastructure)
+from CSV or JSON files.
+
+Rows are matched to existing records by their natural code, and foreign keys
+are given as the code of the row they point to (office_code, hall_code,
+admin_code). plan_import() validates every row and works out what would
+change with a handful of bulk queries, whatever the file size;
+apply_import() then writes the new and changed rows with
+bulk_create(update_conflicts=True), one transaction per chunk.
+
+Only the columns present in a file are written, so a file of hall_code and
+category updates just the categories of existing halls. New rows need every
+required column. Headers are matched case-insensitively with spaces read as
+underscores ("Hall Code" is hall_code), and a foreign key column may also be
+named after the code it holds (office_code for office) when no other foreign
+key holds the same kind of code.
+"""
+import copy
+import csv
+import json
+import re
+from typing import NamedTuple
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+
+from .master_cache import MASTER_MODELS, invalidate
+from .models import AdminUser, HallMaster, Infrastructure, OfficeMaster, SessionMaster
+
+# Managed by the application rather than imported
+EXCLUDED_FIELDS = {
+    'id', 'created_at', 'updated_at', 'deleted_at', 'last_login', 'date_joined', 'image', 'password',
+}
+
+
+class ImportSpec(NamedTuple):
+    model: type
+    # The natural code rows are matched on
+    key: str
+    # Foreign key field -> (target model, target code field)
+    references: dict
+
+
+SPECS = {
+    'offices': ImportSpec(OfficeMaster, 'office_code', {'office_spoc': (AdminUser, 'admin_code')}),
+    'users': ImportSpec(AdminUser, 'admin_code', {'office': (OfficeMaster, 'office_code')}),
+    'halls': ImportSpec(HallMaster, 'hall_code', {
+        'office': (OfficeMaster, 'office_code'),
+        'day_spoc': (AdminUser, 'admin_code'),
+        'mid_spoc': (AdminUser, 'admin_code'),
+        'night_spoc': (AdminUser, 'admin_code'),
+    }),
+    'sessions': ImportSpec(SessionMaster, 'session_code', {
+        'hall': (HallMaster, 'hall_code'),
+        'preferred_hall_1': (HallMaster, 'hall_code'),
+        'preferred_hall_2': (HallMaster, 'hall_code'),
+        'preferred_hall_3': (HallMaster, 'hall_code'),
+    }),
+    'infrastructure': ImportSpec(Infrastructure, 'infra_code', {'hall': (HallMaster, 'hall_code')}),
+}
+
+
+class ImportFileError(ValueError):
+    """
+    The file as a whole cannot be imported (unreadable, unknown columns...).
+    """
+
+
+class ImportPlan(NamedTuple):
+    spec: ImportSpec
+    # Columns written for every row, in file order
+    fields: list
+    # (row number, instance)
+    creates: list
+    # (row number, instance, {field: (old, new)})
+    updates: list
+    unchanged: int
+    # (row number, code, [messages])
+    errors: list
+
+
+def normalise_header(header):
+    return re.sub(r'\W+', '_', str(header).strip().lower()).strip('_')
+
+
+def read_rows(file, file_format):
+    """
+    The rows of a CSV file with a header line, or of a JSON array of
+    objects, as (row number, {column: value}) pairs. CSV row numbers are
+    file line numbers.
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(file)
+        if reader.fieldnames is None:
+            return []
+        if len(set(map(normalise_header, reader.fieldnames))) != len(reader.fieldnames):
+            raise ImportFileError('Duplicate columns in the header')
+        return [
+            (reader.line_num, {normalise_header(column): value for column, value in row.items() if column is not None})
+            for row in reader
+        ]
+    try:
+        data = json.load(file)
+    except json.JSONDecodeError as error:
+        raise ImportFileError(f'Invalid JSON: {error}')
+    if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+        raise ImportFileError('JSON imports must be an array of objects')
+    return [(number, {normalise_header(column): value for column, value in row.items()})
+            for number, row in enumerate(data, 1)]
+
+
+def _columns(spec, rows):
+    """
+    Map the file's columns to model field names, rejecting unknown ones.
+    """
+    model = spec.model
+    importable = {
+        field.name for field in model._meta.concrete_fields if field.name not in EXCLUDED_FIELDS
+    }
+    # A code column stands for a foreign key only when one key holds that code
+    targets = [code_field for _, code_field in spec.references.values()]
+    aliases = {
+        code_field: name for name, (_, code_field) in spec.references.items()
+        if targets.count(code_field) == 1 and code_field != spec.key
+    }
+    if model is AdminUser:
+        # Only used as the initial password of new users
+        importable.add('password')
+
+    columns = {}
+    for row_number, row in rows:
+        for column in row:
+            if column in columns:
+                continue
+            name = column if column in importable else aliases.get(column)
+            if name is None:
+                raise ImportFileError(f"Unknown column '{column}' for {model.__name__}")
+            if name in columns.values():
+                raise ImportFileError(f"Columns '{column}' and another both set {name}")
+            columns[column] = name
+    if spec.key not in columns.values():
+        raise ImportFileError(f"The '{spec.key}' column is required")
+    return columns
+
+
+BOOLEAN_WORDS = {
+    'true': True, 'yes': True, 'y': True, 't': True, '1': True,
+    'false': False, 'no': False, 'n': False, 'f': False, '0': False,
+}
+
+
+def _parse(field, value):
+    if isinstance(value, str):
+        value = value.strip()
+    if value in ('', None):
+        if field.null:
+            return None
+        if field.has_default():
+            return field.get_default()
+        return ''
+    if isinstance(field, models.BooleanField) and isinstance(value, str):
+        value = BOOLEAN_WORDS.get(value.lower(), value)
+    return field.to_python(value)
+
+
+def _resolve_references(spec, rows, columns):
+    """
+    {field: {code: pk}} for every code the rows refer to, one query per target.
+    """
+    wanted = {}
+    for _, row in rows:
+        for column, name in columns.items():
+            value = row.get(column)
+            if name in spec.references and value not in ('', None):
+                wanted.setdefault(spec.references[name], set()).add(str(value).strip())
+    found = {
+        target: {code: instance.pk for code, instance in target[0].objects.in_bulk(codes, field_name=target[1]).items()}
+        for target, codes in wanted.items()
+    }
+    return {name: found.get(target, {}) for name, target in spec.references.items()}
+
+
+def _unique_clashes(spec, instances, fields):
+    """
+    Errors for rows whose other unique values (e.g. a user's username) are
+    taken by a different record or by an earlier row of the file.
+    """
+    model = spec.model
+    errors = {}
+    for field in model._meta.concrete_fields:
+        if not field.unique or field.primary_key or field.name == spec.key or field.name not in fields:
+            continue
+        values = {getattr(instance, field.attname) for _, instance in instances}
+        owners = dict(
+            model.objects.filter(**{f'{field.name}__in': values}).values_list(field.attname, spec.key)
+        )
+        seen = {}
+        for row_number, instance in instances:
+            value = getattr(instance, field.attname)
+            code = getattr(instance, spec.key)
+            if value in (None, ''):
+                continue
+            owner = seen.get(value) or owners.get(value)
+            if owner is not None and owner != code:
+                errors.setdefault(row_number, []).append(f'{field.name}: {value!r} already belongs to {owner}')
+            seen.setdefault(value, code)
+    return errors
+
+
+def _show_codes(spec, updates, references):
+    """
+    Report changed foreign keys by the codes they point to rather than by pk.
+    """
+    previous = {}
+    for _, _, changes in updates:
+        for name, (old, _) in changes.items():
+            if name in spec.references and old is not None:
+                previous.setdefault(spec.references[name], set()).add(old)
+    codes = {
+        (target_model, code_field): dict(target_model.objects.filter(pk__in=pks).values_list('pk', code_field))
+        for (target_model, code_field), pks in previous.items()
+    }
+    new_codes = {name: {pk: code for code, pk in found.items()} for name, found in references.items()}
+    for _, _, changes in updates:
+        for name, (old, new) in changes.items():
+            if name in spec.references:
+                changes[name] = (codes.get(spec.references[name], {}).get(old, old), new_codes[name].get(new, new))
+
+
+def plan_import(spec, rows):
+    """
+    Validate `rows` from read_rows() and work out which records they create
+    or change. Nothing is written.
+    """
+    model = spec.model
+    columns = _columns(spec, rows)
+    fields = list(dict.fromkeys(columns.values()))
+    key_column = next(column for column, name in columns.items() if name == spec.key)
+    references = _resolve_references(spec, rows, columns)
+
+    codes = [str(row.get(key_column) or '').strip() for _, row in rows]
+    existing = model.objects.in_bulk([code for code in codes if code], field_name=spec.key)
+
+    creates, updates, errors, seen = [], [], [], {}
+    unchanged = 0
+    checked = []
+    for (row_number, row), code in zip(rows, codes):
+        messages = []
+        if not code:
+            errors.append((row_number, code, [f'{spec.key}: This field is required.']))
+            continue
+        if code in seen:
+            errors.append((row_number, code, [f'{spec.key}: Repeats row {seen[code]}']))
+            continue
+        seen[code] = row_number
+
+        instance = existing.get(code)
+        is_new = instance is None
+        if is_new:
+            instance = model(**{spec.key: code})
+            if model is AdminUser:
+                instance.password = make_password(None)
+        previous = {name: getattr(instance, model._meta.get_field(name).attname) for name in fields}
+
+        for column, name in columns.items():
+            if column not in row or name == spec.key:
+                continue
+            value = row[column]
+            field = model._meta.get_field(name)
+            try:
+                if name == 'password':
+                    if is_new and value not in ('', None):
+                        instance.password = make_password(str(value))
+                elif name in spec.references:
+                    code_value = str(value).strip() if value is not None else ''
+                    if code_value and code_value not in references[name]:
+                        target_model, code_field = spec.references[name]
+                        messages.append(f"{name}: No {target_model.__name__} with {code_field} '{code_value}'")
+                    else:
+                        setattr(instance, field.attname, references[name].get(code_value))
+                else:
+                    setattr(instance, field.attname, _parse(field, value))
+            except ValidationError as error:
+                messages.extend(f'{name}: {message}' for message in error.messages)
+
+        if not messages:
+            try:
+                # References were checked above without a query per row
+                instance.full_clean(exclude=list(spec.references), validate_unique=False, validate_constraints=False)
+            except ValidationError as error:
+                messages.extend(
+                    f'{name}: {message}' for name, field_messages in error.message_dict.items()
+                    for message in field_messages
+                )
+        if messages:
+            errors.append((row_number, code, messages))
+            continue
+
+        checked.append((row_number, instance))
+        if is_new:
+            creates.append((row_number, instance))
+            continue
+        changes = {
+            name: (previous[name], getattr(instance, model._meta.get_field(name).attname))
+            for name in fields if name != 'password'
+            and previous[name] != getattr(instance, model._meta.get_field(name).attname)
+        }
+        if changes:
+            updates.append((row_number, instance, changes))
+        else:
+            unchanged += 1
+
+    _show_codes(spec, updates, references)
+    clashes = _unique_clashes(spec, checked, fields)
+    if clashes:
+        errors.extend(
+            (row_number, getattr(instance, spec.key), clashes[row_number])
+            for row_number, instance in checked if row_number in clashes
+        )
+        creates = [(row_number, instance) for row_number, instance in creates if row_number not in clashes]
+        updates = [update for update in updates if update[0] not in clashes]
+        errors.sort(key=lambda error: error[0])
+
+    return ImportPlan(spec, fields, creates, updates, unchanged, errors)
+
+
+def apply_import(plan, chunk_size=500):
+    """
+    Write the creates and updates of `plan`, `chunk_size` rows per
+    transaction. Returns the number of rows written.
+    """
+    spec = plan.spec
+    model = spec.model
+    update_fields = [name for name in plan.fields if name not in (spec.key, 'password')] + ['updated_at']
+    keyed_by_pk = model._meta.pk.name == spec.key
+    rows = [instance for _, instance in plan.creates] + [instance for _, instance, _ in plan.updates]
+    updated_pks = [instance.pk for _, instance, _ in plan.updates]
+
+    written = 0
+    for offset in range(0, len(rows), chunk_size):
+        chunk = rows[offset:offset + chunk_size]
+        if not keyed_by_pk:
+            # Insert without the surrogate id, so an existing row is matched
+            # on its code alone and updated in place
+            chunk = [copy.copy(instance) for instance in chunk]
+            for instance in chunk:
+                instance.pk = None
+        with transaction.atomic():
+            model.objects.bulk_create(
+                chunk, update_conflicts=True, unique_fields=[spec.key], update_fields=update_fields
+            )
+        written += len(chunk)
+
+    if model in MASTER_MODELS:
+        for pk in updated_pks:
+            invalidate(model, pk)
+    return written
@@ -0,0 +1,88 @@
+"""
+Live slot availability.
+
+When bookings change, the new state of every slot they touched is published
+on a channel per (hall, date) and one per (office, date), which the
+Server-Sent Events streams in async_views relay to browsers.
+"""
+from collections import defaultdict
+
+from django.dispatch import receiver
+
+from .availability import SLOTS_PER_DAY, _footprint, get_day, get_days
+from .pubsub import broker
+from .signals import booking_changed
+from .slots import SLOT_MINUTES, format_slot_time
+
+
+def hall_channel(hall_id, slot_date):
+    return f'hall:{hall_id}:{slot_date.isoformat()}'
+
+
+def office_channel(office_id, slot_date):
+    return f'office:{office_id}:{slot_date.isoformat()}'
+
+
+def slot_states(day, mask):
+    """
+    The state of each slot in `mask` as {'slot_time', 'status'} dicts, where
+    status is 'Approved', 'Pending' or 'Available'.
+    """
+    states = []
+    for index in range(SLOTS_PER_DAY):
+        bit = 1 << index
+        if not mask & bit:
+            continue
+        if day.booked & bit:
+            status = 'Approved'
+        elif day.pending & bit:
+            status = 'Pending'
+        else:
+            status = 'Available'
+        start = index * SLOT_MINUTES
+        states.append({'slot_time': format_slot_time(start, start + SLOT_MINUTES), 'status': status})
+    return states
+
+
+def snapshot(hall_ids, slot_date):
+    """
+    The taken slots of each hall on `slot_date`, in the shape of the
+    published messages.
+    """
+    return [
+        {'hall_id': hall_id, 'slot_date': slot_date.isoformat(), 'slots': get_day(hall_id, slot_date).slots()}
+        for hall_id in hall_ids
+    ]
+
+
+@receiver(booking_changed)
+def publish_slot_changes(sender, changes, **kwargs):
+    """
+    Runs after availability.update_availability (connected on import above),
+    so the bitmaps already reflect the changes.
+    """
+    touched = defaultdict(int)
+    offices = {}
+    for previous, current in changes:
+        before, after = _footprint(previous), _footprint(current)
+        if before == after:
+            continue
+        for booking, footprint in ((previous, before), (current, after)):
+            if footprint:
+                pair, _, bits = footprint
+                touched[pair] |= bits
+                offices[pair] = booking.office_id
+
+    dates_by_hall = defaultdict(list)
+    for hall_id, slot_date in touched:
+        dates_by_hall[hall_id].append(slot_date)
+    for hall_id, dates in dates_by_hall.items():
+        for slot_date, day in get_days(hall_id, dates).items():
+            pair = (hall_id, slot_date)
+            message = {
+                'hall_id': hall_id,
+                'slot_date': slot_date.isoformat(),
+                'slots': slot_states(day, touched[pair]),
+            }
+            broker.publish(hall_channel(hall_id, slot_date), message)
+            broker.publish(office_channel(offices[pair], slot_date), message)
@@ -0,0 +1,271 @@
+import http.client
+import json
+import os
+import random
+import subprocess
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from hall_api.benchmarks import (
+    SLOT_STARTS, Sample, load, registered_database, running_server, seeded_database_file, summarise
+)
+from hall_api.models import Booking
+from hall_api.slots import SLOT_MINUTES, format_slot_time
+
+SCENARIOS = ('availability', 'dashboard', 'booking', 'approval')
+DEFAULT_MIX = 'availability=45,dashboard=25,booking=20,approval=10'
+
+
+class Workload:
+    """
+    The request mixes of a run, as generators of load() request tuples.
+    Each endpoint is named by its route so results line up across runs.
+    """
+    def __init__(self, params, token, pending, burst_size):
+        self.params = params
+        self.halls = sorted(params['halls'])
+        self.auth = {'Authorization': f'Bearer {token}'}
+        self.pending = pending
+        self.burst_size = burst_size
+
+    def availability(self, rng, approvals):
+        hall = rng.choice(self.halls)
+        slot_date = self.params['today'] + timedelta(days=rng.randrange(14))
+        yield rng.choice([
+            ('GET /api/halls/{id}/booked_slots/', 'GET',
+             f'/api/halls/{hall}/booked_slots/?date={slot_date}', None, None),
+            ('GET /api/available-halls/', 'GET',
+             f"/api/available-halls/?office={self.params['halls'][hall]}", None, None),
+            ('GET /api/available-slots/', 'GET',
+             f'/api/available-slots/?date={slot_date}', None, None),
+            ('GET /api/halls/{id}/next-free/', 'GET', f'/api/halls/{hall}/next-free/', None, None),
+        ])
+
+    def dashboard(self, rng, approvals):
+        # An admin dashboard refresh fetches all of these at once
+        office = self.params['halls'][rng.choice(self.halls)]
+        yield 'GET /api/dashboard-stats/', 'GET', '/api/dashboard-stats/', None, self.auth
+        yield 'GET /api/booking-stats/', 'GET', '/api/booking-stats/', None, self.auth
+        yield 'GET /api/current-working-halls/', 'GET', '/api/current-working-halls/', None, self.auth
+        yield 'GET /api/occupancy/', 'GET', f'/api/occupancy/?office={office}', None, self.auth
+        yield 'GET /api/pending-approvals/', 'GET', '/api/pending-approvals/', None, self.auth
+
+    def booking(self, rng, approvals):
+        # A burst of bookings for one hall and day past the seeded range,
+        # occasionally made as a single bulk request instead
+        hall = rng.choice(self.halls)
+        slot_date = self.params['last_day'] + timedelta(days=1 + rng.randrange(60))
+        emp = rng.randrange(100_000)
+        fields = {
+            'hall': hall,
+            'office': self.params['halls'][hall],
+            'session': self.params['session'],
+            'emp_code': f'L{emp}',
+            'emp_name': f'Load {emp}',
+            'emp_email_id': f'load{emp}@example.com',
+            'emp_mobile_no': '0',
+            'team_name': 'Load',
+        }
+        first = rng.randrange(len(SLOT_STARTS) - self.burst_size + 1)
+        labels = [format_slot_time(start, start + SLOT_MINUTES)
+                  for start in SLOT_STARTS[first:first + self.burst_size]]
+        if rng.random() < 0.2:
+            yield 'POST /api/bookings/bulk/', 'POST', '/api/bookings/bulk/', {
+                **fields, 'start_date': str(slot_date), 'end_date': str(slot_date + timedelta(days=4)),
+                'slot_times': labels[:2],
+            }, None
+            return
+        for label in labels:
+            yield 'POST /api/bookings/', 'POST', '/api/bookings/', {
+                **fields, 'slot_date': str(slot_date), 'slot_time': label,
+            }, None
+
+    def approval(self, rng, approvals):
+        booking_id = next(approvals, None)
+        if booking_id is not None:
+            yield ('POST /api/bookings/{id}/approve/', 'POST',
+                   f'/api/bookings/{booking_id}/approve/', None, self.auth)
+
+    def client_requests(self, mix, seed, concurrency):
+        """
+        The request stream of each client: scenarios drawn by weight from
+        `mix`, repeatable for a given seed. Clients approve disjoint shares
+        of the pending bookings.
+        """
+        names, weights = zip(*mix.items())
+
+        def requests(index):
+            rng = random.Random(seed * 1000 + index)
+            approvals = iter(self.pending[index::concurrency])
+            while True:
+                scenario = rng.choices(names, weights)[0]
+                yield from getattr(self, scenario)(rng, approvals)
+
+        return requests
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS or not weight.strip().isdigit():
+            raise CommandError(f'Bad --mix entry {part!r}; use e.g. {DEFAULT_MIX}')
+        mix[name] = int(weight)
+    if not any(mix.values()):
+        raise CommandError('--mix needs at least one positive weight')
+    return mix
+
+
+def obtain_token(port, username, password):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        connection.request('POST', '/api/token/', body=json.dumps({'username': username, 'password': password}),
+                           headers={'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        body = response.read()
+    finally:
+        connection.close()
+    if response.status != 200:
+        raise CommandError(f'Could not log the benchmark admin in: {response.status} {body[:200]!r}')
+    return json.loads(body)['access']
+
+
+def current_commit():
+    """
+    The checked-out commit, suffixed with -dirty when the tree has changes.
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=settings.BASE_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f'{commit}-dirty' if dirty else commit
+
+
+class Command(BaseCommand):
+    help = ('Load-tests the API against a seeded scratch database with a weighted mix of availability '
+            'lookups, dashboard refreshes, booking bursts and approvals. Reports throughput, p50/p95/p99 '
+            'latency and queries per request for each endpoint, and saves the results as JSON so runs '
+            'can be compared across commits')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000, help='Bookings loaded before the run')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to measure for')
+        parser.add_argument('--warmup', type=float, default=2, help='Seconds of unmeasured load first')
+        parser.add_argument('--mix', default=DEFAULT_MIX,
+                            help='Scenario weights: availability, dashboard, booking, approval')
+        parser.add_argument('--burst-size', type=int, default=4, help='Bookings per booking burst')
+        parser.add_argument('--seed', type=int, default=1, help='Seed for the data and the request mix')
+        parser.add_argument('--interface', choices=['wsgi', 'asgi'], default='wsgi', help='Server to run')
+        parser.add_argument('--workers', type=int, default=1, help='Server worker processes')
+        parser.add_argument('--threads', type=int, default=1, help='Threads per wsgi worker')
+        parser.add_argument('--output', help='Results file (default: benchmark-results/<time>-<commit>.json)')
+        parser.add_argument('--compare', help='Earlier results file to report changes against')
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options['mix'])
+        if not 1 <= options['burst_size'] <= len(SLOT_STARTS):
+            raise CommandError(f'--burst-size must be between 1 and {len(SLOT_STARTS)}')
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as previous:
+                baseline = json.load(previous)
+
+        started_at = datetime.now()
+        with seeded_database_file(options['rows'], seed=options['seed']) as (path, params):
+            with registered_database('benchmark_api', path):
+                pending = list(
+                    Booking.objects.using('benchmark_api')
+                    .filter(status='Pending', is_deleted=False, slot_date__gte=params['today'])
+                    .order_by('id').values_list('id', flat=True)
+                )
+            with running_server(path, options['interface'], workers=options['workers'],
+                                threads=options['threads'], environment={'QUERY_BUDGET_HEADER': 'True'}) as port:
+                token = obtain_token(port, *params['admin'])
+                read_mix = {name: weight for name, weight in mix.items() if name in ('availability', 'dashboard')}
+                if options['warmup'] and read_mix:
+                    warmup = Workload(params, token, [], options['burst_size'])
+                    load(port, warmup.client_requests(read_mix, options['seed'], 1), 1, options['warmup'])
+                workload = Workload(params, token, pending, options['burst_size'])
+                samples = load(
+                    port, workload.client_requests(mix, options['seed'], options['concurrency']),
+                    options['concurrency'], options['duration']
+                )
+
+        results = {name: summarise(sample, options['duration']) for name, sample in sorted(samples.items())}
+        total = summarise_total(samples.values(), options['duration'])
+        report = {
+            'commit': current_commit(),
+            'started_at': started_at.isoformat(timespec='seconds'),
+            'options': {key: options[key] for key in (
+                'rows', 'concurrency', 'duration', 'mix', 'burst_size', 'seed', 'interface', 'workers', 'threads'
+            )},
+            'total': total,
+            'results': results,
+        }
+
+        self.write_report(report, baseline)
+        output = options['output'] or os.path.join(
+            settings.BASE_DIR, 'benchmark-results',
+            f"{started_at:%Y%m%d-%H%M%S}-{report['commit'] or 'unknown'}.json"
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as destination:
+            json.dump(report, destination, indent=2)
+        self.stdout.write(f'Results saved to {output}')
+
+    def write_report(self, report, baseline):
+        options = report['options']
+        self.stdout.write(
+            f"{options['interface']}, {options['workers']} worker(s) x {options['threads']} thread(s), "
+            f"{options['concurrency']} clients, {options['rows']:,} bookings, {options['duration']:g}s, "
+            f"mix {options['mix']}, commit {report['commit'] or 'unknown'}"
+        )
+        self.stdout.write(
+            f"  {'endpoint':<36} {'requests':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'errors':>6} {'4xx':>5} {'queries':>7}"
+        )
+        rows = list(report['results'].items()) + [('total', report['total'])]
+        for name, row in rows:
+            queries = 'n/a' if row['mean_queries'] is None else f"{row['mean_queries']:.1f}"
+            self.stdout.write(
+                f"  {name:<36} {row['requests']:>8} {row['requests_per_second']:>8.1f} {row['p50_ms']:>8.1f} "
+                f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['errors']:>6} {row['rejected']:>5} {queries:>7}"
+            )
+
+        if baseline is None:
+            return
+        self.stdout.write(f"Change against {baseline.get('commit') or 'baseline'} (req/s, p95, queries):")
+        previous_rows = {**baseline['results'], 'total': baseline['total']}
+        for name, row in rows:
+            previous = previous_rows.get(name)
+            if previous is None:
+                self.stdout.write(f'  {name:<36} new')
+                continue
+            queries = ''
+            if row['mean_queries'] is not None and previous['mean_queries'] is not None:
+                queries = f"{row['mean_queries'] - previous['mean_queries']:>+7.1f}"
+            self.stdout.write(
+                f"  {name:<36} {change(row['requests_per_second'], previous['requests_per_second']):>8} "
+                f"{change(row['p95_ms'], previous['p95_ms']):>8} {queries}"
+            )
+
+
+def summarise_total(samples, duration):
+    merged = Sample()
+    merged.latencies = [value for sample in samples for value in sample.latencies]
+    merged.queries = [value for sample in samples for value in sample.queries]
+    merged.errors = sum(sample.errors for sample in samples)
+    merged.rejected = sum(sample.rejected for sample in samples)
+    return summarise(merged, duration)
+
+
+def change(current, previous):
+    if not previous:
+        return 'n/a'
+    return f'{(current - previous) / previous:+.0%}'
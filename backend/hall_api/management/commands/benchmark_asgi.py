@@ -0,0 +1,70 @@
+import json
+
+from django.core.management.base import BaseCommand
+from hall_api.benchmarks import drive, percentile, running_server, seeded_database_file
+
+
+class Command(BaseCommand):
+    help = ('Load-tests the async read endpoints on one gunicorn worker, sync (WSGI) and then uvicorn '
+            '(ASGI), at rising concurrency against a seeded scratch database, and reports '
+            'throughput and latency')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000, help='Bookings loaded before the run')
+        parser.add_argument('--concurrency', default='1,4,16,64', help='Comma-separated client counts')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per concurrency level')
+        parser.add_argument('--wsgi-threads', type=int, default=1,
+                            help='Threads of the WSGI worker; more than 1 uses gthread')
+        parser.add_argument('--p99-ms', type=float, default=250,
+                            help='Latency target for the concurrency summary')
+        parser.add_argument('--json', dest='json_path', help='Also write the results to this file')
+
+    def handle(self, *args, **options):
+        levels = [int(level) for level in options['concurrency'].split(',')]
+        report = {}
+        with seeded_database_file(options['rows']) as (path, params):
+            paths = [
+                f"/api/halls/{params['hall']}/booked_slots/?date={params['today']}",
+                f"/api/available-halls/?office={params['office']}",
+                f"/api/available-slots/?date={params['today']}",
+                '/api/dashboard-stats/',
+                '/api/current-working-halls/',
+            ]
+            for interface in ('wsgi', 'asgi'):
+                report[interface] = []
+                with running_server(path, interface, threads=options['wsgi_threads']) as port:
+                    # Warm the worker's caches and connection before measuring
+                    drive(port, paths, 1, 1)
+                    for level in levels:
+                        results = drive(port, paths, level, options['duration'])
+                        latencies = [value for values, _ in results.values() for value in values]
+                        report[interface].append({
+                            'concurrency': level,
+                            'requests_per_second': len(latencies) / options['duration'],
+                            'p50_ms': percentile(latencies, 0.50) * 1000,
+                            'p99_ms': percentile(latencies, 0.99) * 1000,
+                            'errors': sum(errors for _, errors in results.values()),
+                        })
+
+        self.stdout.write(
+            f"1 worker, {options['rows']:,} bookings, {options['duration']:g}s per level, "
+            f"{len(paths)} endpoints round-robin"
+        )
+        self.stdout.write(f"  {'server':<6} {'clients':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for interface, rows in report.items():
+            for row in rows:
+                self.stdout.write(
+                    f"  {interface:<6} {row['concurrency']:>7} {row['requests_per_second']:>9.1f} "
+                    f"{row['p50_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['errors']:>7}"
+                )
+        for interface, rows in report.items():
+            within = [row['concurrency'] for row in rows if row['p99_ms'] <= options['p99_ms'] and not row['errors']]
+            self.stdout.write(
+                f"{interface}: up to {max(within) if within else 0} concurrent clients "
+                f"with p99 <= {options['p99_ms']:g} ms"
+            )
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as output:
+                json.dump({'options': {key: options[key] for key in ('rows', 'duration', 'wsgi_threads')},
+                           'results': report}, output, indent=2)
@@ -0,0 +1,96 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from hall_api.benchmarks import load_bookings, scratch_database
+from hall_api.models import Booking, SlotMaster
+
+ALIAS = 'index_benchmark'
+
+# Indexes from migration 0025; they are dropped for the "before" run
+INDEXES = {
+    Booking: [
+        'booking_hall_day_active_idx',
+        'booking_status_day_active_idx',
+        'booking_office_day_active_idx',
+        'booking_emp_code_active_idx',
+        'booking_emp_email_active_idx',
+    ],
+    SlotMaster: ['slot_status_date_idx'],
+}
+
+
+class Command(BaseCommand):
+    help = ('Loads a throwaway SQLite database with synthetic bookings and prints the query plan '
+            'and timing of the hot booking queries without and with the access-path indexes')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Bookings to generate')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        with scratch_database(ALIAS) as connection:
+            self.set_indexes(connection, 'remove_index')
+            self.stdout.write(f"Generating {options['rows']:,} bookings...")
+            self.params = load_bookings(connection, options['rows'], options['seed'])
+
+            before = self.measure(connection, options['repeat'])
+            self.set_indexes(connection, 'add_index')
+            after = self.measure(connection, options['repeat'])
+
+        for name, (plan_before, ms_before) in before.items():
+            plan_after, ms_after = after[name]
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n{name}'))
+            self.stdout.write(f'  without indexes  {ms_before:9.2f} ms  {plan_before}')
+            self.stdout.write(f'  with indexes     {ms_after:9.2f} ms  {plan_after}')
+
+    def set_indexes(self, connection, operation):
+        with connection.schema_editor() as editor:
+            for model, names in INDEXES.items():
+                for index in model._meta.indexes:
+                    if index.name in names:
+                        getattr(editor, operation)(model, index)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def queries(self):
+        """
+        The booking reads the API makes most often, written as the views write them.
+        """
+        p = self.params
+        live = Booking.objects.using(ALIAS).filter(is_deleted=False)
+        return {
+            'availability bitmap load (hall, day)': live.filter(
+                hall_id__in=[p['hall']], slot_date__in=[p['today']], status__in=['Approved', 'Pending'],
+                slot_start__isnull=False
+            ).values_list('hall_id', 'slot_date', 'slot_start', 'slot_end', 'status'),
+            'hall bookings from a date': live.filter(hall_id=p['hall'], slot_date__gte=p['today'])[:50],
+            'pending approvals': live.filter(status='Pending').order_by('slot_date', 'slot_start')[:50],
+            'current working halls': live.filter(
+                status='Approved', slot_date=p['today'], slot_start__lte=600, slot_end__gt=600
+            ),
+            'dashboard upcoming approved': live.filter(
+                status='Approved', slot_date__gte=p['today']
+            ).order_by('slot_date', 'slot_start')[:5],
+            'office bookings on a day': live.filter(office_id=p['office'], slot_date=p['today']),
+            'employee bookings': live.filter(emp_code=p['emp_code']),
+            'bookings by email': live.filter(emp_email_id=p['emp_email']),
+            'available slots on a day': SlotMaster.objects.using(ALIAS).filter(
+                slot_date=p['today'], slot_status='Available'
+            ),
+        }
+
+    def measure(self, connection, repeat):
+        results = {}
+        for name, queryset in self.queries().items():
+            plan = ' | '.join(
+                line.strip() for line in queryset.explain().splitlines() if line.strip() and line.strip() != 'QUERY PLAN'
+            )
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = (plan, statistics.median(timings))
+        return results
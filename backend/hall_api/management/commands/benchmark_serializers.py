@@ -0,0 +1,49 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from hall_api.benchmarks import load_bookings, scratch_database
+from hall_api.models import Booking
+from hall_api.serializers import BookingSerializer, booking_reader
+
+ALIAS = 'serializer_benchmark'
+
+
+class Command(BaseCommand):
+    help = 'Compares rows/second of BookingSerializer against the values() read path on synthetic bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help='Bookings to generate and serialize')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per serializer')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        with scratch_database(ALIAS) as connection:
+            load_bookings(connection, options['rows'], options['seed'])
+            queryset = Booking.objects.using(ALIAS).order_by('slot_date', 'slot_start', 'id')
+
+            renderer = JSONRenderer()
+            model_data = BookingSerializer(BookingSerializer.eager_load(queryset), many=True).data
+            if renderer.render(model_data) != renderer.render(booking_reader.serialize(queryset)):
+                raise CommandError('The values() read path does not match BookingSerializer output')
+
+            paths = {
+                'BookingSerializer': lambda: BookingSerializer(BookingSerializer.eager_load(queryset), many=True).data,
+                'values() reader': lambda: booking_reader.serialize(queryset),
+            }
+            results = {name: self.rows_per_second(serialize, options) for name, serialize in paths.items()}
+
+        self.stdout.write(f"Serialized {options['rows']:,} bookings, median of {options['repeat']} run(s); output is byte-identical")
+        for name, rate in results.items():
+            self.stdout.write(f'  {name:<20} {rate:>12,.0f} rows/s')
+        baseline = results['BookingSerializer']
+        self.stdout.write(self.style.SUCCESS(f"  speed-up: {results['values() reader'] / baseline:.1f}x"))
+
+    def rows_per_second(self, serialize, options):
+        timings = []
+        for _ in range(options['repeat']):
+            started = time.perf_counter()
+            serialize()
+            timings.append(time.perf_counter() - started)
+        return options['rows'] / statistics.median(timings)
@@ -0,0 +1,145 @@
+import multiprocessing
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+from hall_api.benchmarks import HALLS, SLOT_STARTS, load_bookings, scratch_database
+from hall_api.models import Booking, HallMaster, SessionMaster
+from hall_api.slots import SLOT_MINUTES, format_slot_time
+from hall_api.sqlite import apply_pragmas
+
+ALIAS = 'sqlite_benchmark'
+
+# SQLite as it behaves without the tuning layer: rollback journal, full
+# fsync, deferred transactions and Python's default 5 second busy timeout
+MODES = {
+    'untuned': {'pragmas': {'journal_mode': 'DELETE', 'synchronous': 'FULL'}, 'options': {}},
+    'tuned': {
+        'pragmas': settings.SQLITE_PRAGMAS,
+        'options': settings.DATABASES['default'].get('OPTIONS', {}),
+    },
+}
+
+
+def _worker(role, mode, duration, seed, results):
+    """
+    Runs in a forked process: repeat the reader or writer operation for
+    `duration` seconds and report counts and latencies.
+    """
+    # Read by the connection_created hook when the connection opens
+    settings.SQLITE_PRAGMAS = MODES[mode]['pragmas']
+    connection = connections[ALIAS]
+    connection.settings_dict['OPTIONS'] = dict(MODES[mode]['options'])
+
+    rng = random.Random(seed)
+    halls = list(HallMaster.objects.using(ALIAS).values_list('id', 'office_id'))
+    session_id = SessionMaster.objects.using(ALIAS).values_list('id', flat=True).first()
+    operation = _write if role == 'writer' else _read
+
+    ops = errors = 0
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            operation(rng, halls, session_id)
+        except OperationalError:
+            # "database is locked" / "database is busy"
+            errors += 1
+        else:
+            ops += 1
+            latencies.append(time.perf_counter() - started)
+    connection.close()
+    results.put((role, ops, errors, latencies))
+
+
+def _read(rng, halls, session_id):
+    """
+    The availability bitmap load and the first page of pending approvals.
+    """
+    hall_id, _ = rng.choice(halls)
+    live = Booking.objects.using(ALIAS).filter(is_deleted=False)
+    list(live.filter(
+        hall_id=hall_id, slot_date=date.today() + timedelta(days=rng.randrange(30)),
+        status__in=['Approved', 'Pending']
+    ).values_list('slot_start', 'slot_end', 'status'))
+    list(live.filter(status='Pending').order_by('slot_date', 'slot_start').values_list('id')[:50])
+
+
+def _write(rng, halls, session_id):
+    """
+    What creating a booking does: an approved-slot check, then the insert.
+    """
+    hall_id, office_id = rng.choice(halls)
+    slot_date = date.today() + timedelta(days=rng.randrange(30))
+    start = rng.choice(SLOT_STARTS)
+    with transaction.atomic(using=ALIAS):
+        Booking.objects.using(ALIAS).filter(
+            hall_id=hall_id, slot_date=slot_date, slot_start=start, status='Approved', is_deleted=False
+        ).exists()
+        Booking.objects.using(ALIAS).create(
+            slot_date=slot_date, slot_time=format_slot_time(start, start + SLOT_MINUTES),
+            office_id=office_id, hall_id=hall_id, session_id=session_id,
+            emp_code='BENCH', emp_name='Bench', emp_email_id='bench@example.com',
+            emp_mobile_no='0', team_name='Bench'
+        )
+
+
+class Command(BaseCommand):
+    help = ('Runs N reader and M booking-writer processes against a scratch SQLite file, first '
+            'untuned and then with SQLITE_PRAGMAS, and reports throughput and lock errors (Unix only)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per mode')
+        parser.add_argument('--rows', type=int, default=50_000, help='Bookings loaded before the run')
+
+    def handle(self, *args, **options):
+        with scratch_database(ALIAS) as connection:
+            load_bookings(connection, options['rows'])
+            report = {mode: self.run_mode(connection, mode, options) for mode in MODES}
+
+        self.stdout.write(
+            f"{options['readers']} reader(s), {options['writers']} writer(s), {options['duration']:g}s per mode, "
+            f"{options['rows']:,} bookings preloaded"
+        )
+        self.stdout.write(f"  {'mode':<8} {'role':<7} {'ops/s':>9} {'errors':>7} {'error %':>8} {'p50 ms':>8} {'p99 ms':>8}")
+        for mode, roles in report.items():
+            for role, (ops, errors, latencies) in roles.items():
+                total = ops + errors
+                p50 = statistics.median(latencies) * 1000 if latencies else 0
+                p99 = statistics.quantiles(latencies, n=100)[98] * 1000 if len(latencies) > 1 else p50
+                self.stdout.write(
+                    f"  {mode:<8} {role:<7} {ops / options['duration']:>9.1f} {errors:>7} "
+                    f"{100 * errors / total if total else 0:>7.1f}% {p50:>8.2f} {p99:>8.2f}"
+                )
+
+    def run_mode(self, connection, mode, options):
+        # The journal mode is stored in the database file, so switch it here
+        apply_pragmas(connection, {'journal_mode': MODES[mode]['pragmas'].get('journal_mode', 'DELETE')})
+        # Children must open their own connections
+        connection.close()
+
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        roles = ['reader'] * options['readers'] + ['writer'] * options['writers']
+        processes = [
+            context.Process(target=_worker, args=(role, mode, options['duration'], seed, results))
+            for seed, role in enumerate(roles)
+        ]
+        for process in processes:
+            process.start()
+        totals = {'reader': [0, 0, []], 'writer': [0, 0, []]}
+        for _ in processes:
+            role, ops, errors, latencies = results.get()
+            totals[role][0] += ops
+            totals[role][1] += errors
+            totals[role][2].extend(latencies)
+        for process in processes:
+            process.join()
+        return {role: tuple(values) for role, values in totals.items()}
@@ -0,0 +1,98 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from hall_api.dataset import DEFAULT_STATUS_MIX, generate_dataset
+from hall_api.models import Booking, Entity, HallMaster, OfficeMaster, SessionMaster
+
+
+def status_mix(value):
+    mix = {}
+    statuses = {choice for choice, _ in Booking.STATUS_CHOICES}
+    for part in value.split(','):
+        status, _, weight = part.partition('=')
+        status = status.strip()
+        if status not in statuses or not weight.strip().isdigit():
+            raise ValueError(part)
+        mix[status] = int(weight)
+    if not any(mix.values()):
+        raise ValueError(value)
+    return mix
+
+
+class Command(BaseCommand):
+    help = ('Generates a synthetic dataset at a chosen scale (entities, offices, halls, sessions and '
+            'a booking history) for capacity testing. The same --seed and --anchor-date give the same data')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entities', type=int, default=3)
+        parser.add_argument('--offices', type=int, default=5)
+        parser.add_argument('--halls-per-office', type=int, default=20)
+        parser.add_argument('--sessions', type=int, default=10, help='Session types')
+        parser.add_argument('--days', type=int, default=365, help='Days of booking history')
+        parser.add_argument('--future-days', type=int, default=30, help='Days of upcoming bookings')
+        parser.add_argument('--bookings-per-hall-day', type=int, default=6,
+                            help="At most one per slot of the hall's operating hours")
+        parser.add_argument('--status-mix', type=status_mix,
+                            default=','.join(f'{status}={weight}' for status, weight in DEFAULT_STATUS_MIX.items()),
+                            help='Booking status weights, e.g. Approved=60,Pending=15,Rejected=10,Cancelled=15')
+        parser.add_argument('--deleted-ratio', type=float, default=0.02, help='Share of soft-deleted bookings')
+        parser.add_argument('--employees', type=int, default=5000, help='Distinct employees making bookings')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--anchor-date', type=date.fromisoformat,
+                            help='Date history ends and upcoming bookings start, YYYY-MM-DD (default: today)')
+        parser.add_argument('--prefix', default='GEN', help='Prefix of every generated code')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per transaction')
+
+    def handle(self, *args, **options):
+        for option in ('offices', 'halls_per_office', 'sessions', 'employees', 'chunk_size'):
+            if options[option] < 1:
+                raise CommandError(f"--{option.replace('_', '-')} must be at least 1")
+        for option in ('entities', 'days', 'future_days', 'bookings_per_hall_day'):
+            if options[option] < 0:
+                raise CommandError(f"--{option.replace('_', '-')} must not be negative")
+        if not 0 <= options['deleted_ratio'] <= 1:
+            raise CommandError('--deleted-ratio must be between 0 and 1')
+
+        prefix = options['prefix']
+        for model, field in ((Entity, 'entity_code'), (OfficeMaster, 'office_code'),
+                             (HallMaster, 'hall_code'), (SessionMaster, 'session_code')):
+            if model.objects.filter(**{f'{field}__startswith': f'{prefix}-'}).exists():
+                raise CommandError(f'{model.__name__} rows with prefix {prefix} already exist; pick another --prefix')
+
+        started = time.monotonic()
+        reported = {}
+
+        def progress(model, done, total):
+            # Report about every 5% of each model and always its last chunk
+            step = max(total // 20, 1)
+            if done < total and done // step == reported.get(model, -1):
+                return
+            reported[model] = done // step
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'{model.__name__}: {done:,}/{total:,} ({done / total:.0%}) after {elapsed:.1f}s'
+            )
+
+        created = generate_dataset(
+            entities=options['entities'],
+            offices=options['offices'],
+            halls_per_office=options['halls_per_office'],
+            days=options['days'],
+            future_days=options['future_days'],
+            bookings_per_hall_day=options['bookings_per_hall_day'],
+            status_mix=options['status_mix'],
+            sessions=options['sessions'],
+            employees=options['employees'],
+            deleted_ratio=options['deleted_ratio'],
+            seed=options['seed'],
+            prefix=prefix,
+            anchor_date=options['anchor_date'],
+            chunk_size=options['chunk_size'],
+            progress=progress,
+        )
+        summary = ', '.join(f'{count:,} {name}' for name, count in created.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {summary} in {time.monotonic() - started:.1f}s. '
+            'Run generate_slots to materialise SlotMaster rows for the new halls.'
+        ))
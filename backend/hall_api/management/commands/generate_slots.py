@@ -0,0 +1,33 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from hall_api.models import HallMaster
+from hall_api.slot_master import generate_slots
+from hall_api.slots import local_now
+
+class Command(BaseCommand):
+    help = "Creates the SlotMaster rows of every hall's operating hours for the coming days"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Days to generate, starting with --start')
+        parser.add_argument('--start', type=date.fromisoformat, help='First date, YYYY-MM-DD (default: today)')
+        parser.add_argument('--hall', action='append', dest='hall_codes', metavar='HALL_CODE',
+                            help='Only this hall; repeat for several (default: all open halls)')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per INSERT')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+        start_date = options['start'] or local_now().date()
+
+        halls = None
+        if options['hall_codes']:
+            halls = list(HallMaster.objects.filter(hall_code__in=options['hall_codes'], is_deleted=False))
+            missing = set(options['hall_codes']) - {hall.hall_code for hall in halls}
+            if missing:
+                raise CommandError(f"Unknown hall code(s): {', '.join(sorted(missing))}")
+
+        created = generate_slots(start_date, options['days'], halls=halls, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {created} slot(s) from {start_date} for {options['days']} day(s)."
+        ))
@@ -0,0 +1,70 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from hall_api.importers import SPECS, ImportFileError, apply_import, plan_import, read_rows
+from hall_api.models import HallMaster
+
+
+class Command(BaseCommand):
+    help = ('Creates or updates offices, users, halls, sessions or infrastructure in bulk from a CSV or '
+            'JSON file, matching rows and foreign keys by their codes. Prints what would change with '
+            '--dry-run')
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(SPECS), help='What the file holds')
+        parser.add_argument('path', help='CSV file with a header line, or JSON array of objects')
+        parser.add_argument('--format', choices=['csv', 'json'], help='Default: from the file extension')
+        parser.add_argument('--dry-run', action='store_true', help='Report the changes without writing them')
+        parser.add_argument('--skip-invalid', action='store_true',
+                            help='Import the valid rows even if others fail validation')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows per transaction')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        path = options['path']
+        file_format = options['format'] or os.path.splitext(path)[1].lower().lstrip('.')
+        if file_format not in ('csv', 'json'):
+            raise CommandError('Cannot tell the file format from its extension; pass --format')
+
+        spec = SPECS[options['kind']]
+        try:
+            with open(path, newline='', encoding='utf-8-sig') as file:
+                rows = read_rows(file, file_format)
+            plan = plan_import(spec, rows)
+        except OSError as error:
+            raise CommandError(f'Cannot read {path}: {error}')
+        except ImportFileError as error:
+            raise CommandError(f'{path}: {error}')
+
+        dry_run = options['dry_run']
+        if dry_run or options['verbosity'] > 1:
+            self.write_diff(plan)
+        for row_number, code, messages in plan.errors:
+            self.stderr.write(f"  ! row {row_number} {code or ''}: {'; '.join(messages)}")
+        self.stdout.write(
+            f'{path}: {len(plan.creates)} to create, {len(plan.updates)} to update, '
+            f'{plan.unchanged} unchanged, {len(plan.errors)} invalid'
+        )
+
+        if dry_run:
+            self.stdout.write('Dry run: nothing was written.')
+            return
+        if plan.errors and not options['skip_invalid']:
+            raise CommandError('Nothing was written because of the invalid rows; fix them or pass --skip-invalid')
+
+        written = apply_import(plan, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {written} {spec.model.__name__} row(s): '
+            f'{len(plan.creates)} created, {len(plan.updates)} updated.'
+        ))
+        if spec.model is HallMaster and plan.creates:
+            self.stdout.write('Run generate_slots to create SlotMaster rows for the new halls.')
+
+    def write_diff(self, plan):
+        key = plan.spec.key
+        for row_number, instance in plan.creates:
+            self.stdout.write(self.style.SUCCESS(f'  + row {row_number} {getattr(instance, key)}'))
+        for row_number, instance, changes in plan.updates:
+            described = ', '.join(f'{name}: {old!r} -> {new!r}' for name, (old, new) in changes.items())
+            self.stdout.write(self.style.WARNING(f'  ~ row {row_number} {getattr(instance, key)}: {described}'))
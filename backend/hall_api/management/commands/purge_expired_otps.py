@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from hall_api.models import EmailOTP, EmailOutbox
+
+class Command(BaseCommand):
+    help = ('Deletes expired email OTPs, and the outbox emails that carried them, in one statement '
+            'each on the expires_at indexes')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep purging instead of exiting after one pass')
+        parser.add_argument('--interval', type=float, default=300, help='Seconds between purges when --loop is set')
+
+    def handle(self, *args, **options):
+        while True:
+            now = timezone.now()
+            deleted, _ = EmailOTP.objects.filter(expires_at__lte=now).delete()
+            emails, _ = EmailOutbox.objects.filter(expires_at__lte=now).delete()
+            self.stdout.write(f'Purged {deleted} expired OTP(s) and {emails} OTP email(s)')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from hall_api.stats import rebuild_daily_stats
+
+class Command(BaseCommand):
+    help = ('Recomputes the DailyBookingStats rollup from the Booking table. Run it after writing '
+            'bookings outside the API and admin, e.g. with QuerySet.update() or raw SQL')
+
+    def handle(self, *args, **options):
+        rows = rebuild_daily_stats()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} daily booking stats row(s).'))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from hall_api.outbox import send_batch
+
+class Command(BaseCommand):
+    help = 'Sends queued emails from the outbox in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Emails to send per SMTP connection')
+        parser.add_argument('--loop', action='store_true', help='Keep polling the outbox instead of exiting once it is drained')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds to wait between polls when --loop is set')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        while True:
+            sent, failed = send_batch(batch_size)
+            if sent or failed:
+                self.stdout.write(f'Sent {sent} email(s), {failed} failed')
+
+            if sent + failed < batch_size:
+                # The outbox is drained for now
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS('Outbox drained.'))
@@ -0,0 +1,108 @@
+"""
+Read-through cache of master-data rows: halls, offices, sessions and admin
+users (the hall and office SPOCs).
+
+Rows are cached by primary key, and halls, offices and sessions can also be
+found by their code. Entries are dropped on post_save and post_delete. The
+process-local tier is only trusted for MASTER_LOCAL_CACHE_TTL seconds, and
+with the default per-process locmem cache other workers see a change after at
+most MASTER_CACHE_TIMEOUT; point CACHES at Redis or Memcached to share
+invalidation between workers.
+
+Callers get their own copy of a cached row, so changing or saving it does
+not alter what other requests in the process read.
+"""
+import copy
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import TieredCache
+from .models import AdminUser, HallMaster, OfficeMaster, SessionMaster
+
+# Cached models and their natural code field (AdminUser is keyed by its code)
+MASTER_MODELS = {
+    HallMaster: 'hall_code',
+    OfficeMaster: 'office_code',
+    SessionMaster: 'session_code',
+    AdminUser: None,
+}
+
+cache = TieredCache(
+    timeout=getattr(settings, 'MASTER_CACHE_TIMEOUT', 300),
+    local_size=getattr(settings, 'MASTER_LOCAL_CACHE_SIZE', 1024),
+    local_ttl=getattr(settings, 'MASTER_LOCAL_CACHE_TTL', 5),
+)
+
+
+def _key(model, field, value):
+    return f'master:{model._meta.label_lower}:{field}:{value}'
+
+
+def get_master(model, pk):
+    """
+    The row of a master model with primary key `pk`.
+    Raises model.DoesNotExist like a normal lookup.
+    """
+    pk = model._meta.pk.to_python(pk)
+    key = _key(model, 'pk', pk)
+    instance = cache.get(key)
+    if instance is None:
+        instance = model._default_manager.get(pk=pk)
+        cache.set(key, instance)
+    return copy.copy(instance)
+
+
+async def aget_master(model, pk):
+    """
+    get_master for async views. Rows in the local tier are returned without
+    leaving the event loop.
+    """
+    instance = cache.local.get(_key(model, 'pk', model._meta.pk.to_python(pk)))
+    if instance is not None:
+        return copy.copy(instance)
+    return await sync_to_async(get_master)(model, pk)
+
+
+def get_master_by_code(model, code):
+    """
+    The row of a master model with the given natural code, e.g. a hall_code.
+    """
+    field = MASTER_MODELS[model]
+    if field is None:
+        return get_master(model, code)
+
+    # The code maps to a pk, so an entry only has to be dropped under its pk
+    key = _key(model, field, code)
+    pk = cache.get(key)
+    if pk is not None:
+        try:
+            instance = get_master(model, pk)
+        except model.DoesNotExist:
+            instance = None
+        # The code may have been moved to another row since it was cached
+        if instance is not None and getattr(instance, field) == code:
+            return instance
+
+    instance = model._default_manager.get(**{field: code})
+    cache.set(key, instance.pk)
+    cache.set(_key(model, 'pk', instance.pk), instance)
+    return copy.copy(instance)
+
+
+def invalidate(model, pk):
+    cache.delete(_key(model, 'pk', pk))
+
+
+@receiver([post_save, post_delete], sender=HallMaster)
+@receiver([post_save, post_delete], sender=OfficeMaster)
+@receiver([post_save, post_delete], sender=SessionMaster)
+@receiver([post_save, post_delete], sender=AdminUser)
+def invalidate_master(sender, instance, **kwargs):
+    pk = instance.pk
+    invalidate(sender, pk)
+    # Again once committed, in case a concurrent read cached the old row meanwhile
+    transaction.on_commit(lambda: invalidate(sender, pk))
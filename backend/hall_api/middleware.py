@@ -0,0 +1,137 @@
+"""
+Per-request query budget.
+
+Every request is counted against a budget of database queries: the view's
+`query_budget` attribute (an int, or a dict keyed by viewset action) or
+QUERY_BUDGET_DEFAULT. Requests over budget are logged, and fail outright
+when QUERY_BUDGET_STRICT is on, which is how tests catch N+1 regressions.
+
+Sync and async requests are both counted. Database connections belong to a
+thread, and under ASGI a request's queries run on worker threads, so every
+connection gets one execute wrapper that counts into the current request's
+counter, kept in a context variable that asgiref carries into those threads.
+"""
+import logging
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .exceptions import QueryBudgetExceeded
+
+logger = logging.getLogger(__name__)
+
+
+def query_budget(budget):
+    """
+    Set the query budget of a function view. Apply it above @api_view.
+    """
+    def decorator(view):
+        view.query_budget = budget
+        return view
+    return decorator
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+
+_request_counter = ContextVar('query_budget_counter', default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    counter = _request_counter.get()
+    if counter is not None:
+        counter.count += 1
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_counter(sender, connection, **kwargs):
+    # Also sent on reconnects of the same connection object
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+class QueryBudgetMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        counter = QueryCounter()
+        token = _request_counter.set(counter)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_counter.reset(token)
+        return self.check_budget(request, response, counter)
+
+    async def __acall__(self, request):
+        counter = QueryCounter()
+        token = _request_counter.set(counter)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_counter.reset(token)
+        return self.check_budget(request, response, counter)
+
+    def check_budget(self, request, response, counter):
+        budget = getattr(request, 'query_budget', getattr(settings, 'QUERY_BUDGET_DEFAULT', 25))
+        if getattr(settings, 'QUERY_BUDGET_HEADER', settings.DEBUG):
+            response['X-Query-Count'] = str(counter.count)
+        if counter.count > budget:
+            message = f'{request.method} {request.path} ran {counter.count} queries (budget {budget})'
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        budget = getattr(view_func, 'query_budget', None)
+        view_class = getattr(view_func, 'cls', None)
+        if budget is None and view_class is not None:
+            budget = getattr(view_class, 'query_budget', None)
+        if isinstance(budget, dict):
+            actions = getattr(view_func, 'actions', None) or {}
+            budget = budget.get(actions.get(request.method.lower()))
+        if budget is not None:
+            request.query_budget = budget
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that keeps an ASGI request async all the way to the view,
+    rather than making Django run the whole chain in a worker thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hall_api', '0018_auto_20250908_1031'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='caf_support',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='fin_support',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='hr_support',
+            field=models.BooleanField(default=False),
+        ),
+    ]
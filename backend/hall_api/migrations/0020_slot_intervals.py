@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hall_api', '0019_booking_support_flags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='slot_end',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='slot_start',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='slotmaster',
+            name='slot_end',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='slotmaster',
+            name='slot_start',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['slot_date', 'slot_start', 'slot_end'], name='booking_interval_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='slotmaster',
+            index=models.Index(fields=['slot_date', 'slot_start', 'slot_end'], name='slot_interval_idx'),
+        ),
+    ]
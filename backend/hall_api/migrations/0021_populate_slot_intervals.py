@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:40
+
+import re
+
+from django.db import migrations
+
+# A frozen copy of hall_api.slots.parse_slot_time as of this migration, so
+# later changes to the app's parser do not change what it did
+_TIME_PATTERN = re.compile(r'^(\d{1,2}):(\d{1,2})\s*([AaPp][Mm])?$')
+MINUTES_PER_DAY = 24 * 60
+
+
+def parse_time(value):
+    match = _TIME_PATTERN.match(value.strip())
+    if not match:
+        raise ValueError(f'Invalid time: {value!r}')
+
+    hour, minute, period = int(match.group(1)), int(match.group(2)), match.group(3)
+    if period:
+        if not 1 <= hour <= 12:
+            raise ValueError(f'Invalid time: {value!r}')
+        hour = hour % 12 + (12 if period.upper() == 'PM' else 0)
+    if hour > 23 or minute > 59:
+        raise ValueError(f'Invalid time: {value!r}')
+    return hour * 60 + minute
+
+
+def parse_slot_time(label):
+    parts = label.split('-')
+    if len(parts) != 2:
+        raise ValueError(f'Invalid slot time: {label!r}')
+
+    start, end = parse_time(parts[0]), parse_time(parts[1])
+    if end <= start:
+        end = MINUTES_PER_DAY
+    return start, end
+
+
+def populate_slot_intervals(apps, schema_editor):
+    for model_name in ('Booking', 'SlotMaster'):
+        model = apps.get_model('hall_api', model_name)
+        rows = []
+        for row in model.objects.only('id', 'slot_time').iterator(chunk_size=2000):
+            try:
+                row.slot_start, row.slot_end = parse_slot_time(row.slot_time)
+            except ValueError:
+                # Leave unparseable legacy labels without an interval
+                continue
+            rows.append(row)
+        model.objects.bulk_update(rows, ['slot_start', 'slot_end'], batch_size=2000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hall_api', '0020_slot_intervals'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_slot_intervals, migrations.RunPython.noop),
+    ]
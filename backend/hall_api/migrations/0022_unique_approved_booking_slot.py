@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:36
+
+from django.db import migrations, models
+
+def reopen_duplicate_approvals(apps, schema_editor):
+    """
+    Existing double bookings would stop the constraint from being created.
+    Keep the earliest approval for each slot and send the rest back to Pending
+    so an admin can decide on them again.
+    """
+    Booking = apps.get_model('hall_api', 'Booking')
+    seen = set()
+    duplicates = []
+    approved = Booking.objects.filter(
+        status='Approved', is_deleted=False, slot_start__isnull=False
+    ).order_by('id').values_list('id', 'hall_id', 'slot_date', 'slot_start')
+    for booking_id, hall_id, slot_date, slot_start in approved.iterator():
+        key = (hall_id, slot_date, slot_start)
+        if key in seen:
+            duplicates.append(booking_id)
+        else:
+            seen.add(key)
+    Booking.objects.filter(id__in=duplicates).update(status='Pending', approved=False)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hall_api', '0021_populate_slot_intervals'),
+    ]
+
+    operations = [
+        migrations.RunPython(reopen_duplicate_approvals, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_deleted', False), ('status', 'Approved')), fields=('hall', 'slot_date', 'slot_start'), name='unique_approved_booking_slot'),
+        ),
+    ]
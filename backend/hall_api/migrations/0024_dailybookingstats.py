@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+def populate_daily_stats(apps, schema_editor):
+    Booking = apps.get_model('hall_api', 'Booking')
+    DailyBookingStats = apps.get_model('hall_api', 'DailyBookingStats')
+    grouped = (
+        Booking.objects.filter(is_deleted=False)
+        .values('office_id', 'hall_id', 'session_id', 'slot_date')
+        .annotate(
+            pending=models.Count('id', filter=models.Q(status='Pending')),
+            approved=models.Count('id', filter=models.Q(status='Approved')),
+            rejected=models.Count('id', filter=models.Q(status='Rejected')),
+            cancelled=models.Count('id', filter=models.Q(status='Cancelled')),
+        )
+        .order_by()
+    )
+    DailyBookingStats.objects.bulk_create(
+        [DailyBookingStats(**row) for row in grouped],
+        batch_size=1000
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hall_api', '0023_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyBookingStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot_date', models.DateField()),
+                ('pending', models.IntegerField(default=0)),
+                ('approved', models.IntegerField(default=0)),
+                ('rejected', models.IntegerField(default=0)),
+                ('cancelled', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('hall', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='hall_api.hallmaster')),
+                ('office', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='hall_api.officemaster')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='hall_api.sessionmaster')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['slot_date', 'office'], name='daily_stats_date_office_idx')],
+                'constraints': [models.UniqueConstraint(fields=('office', 'hall', 'session', 'slot_date'), name='unique_daily_booking_stats')],
+            },
+        ),
+        migrations.RunPython(populate_daily_stats, migrations.RunPython.noop),
+    ]
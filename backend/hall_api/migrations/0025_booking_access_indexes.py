@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hall_api', '0024_dailybookingstats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hall', 'slot_date', 'status', 'slot_start', 'slot_end'], name='booking_hall_day_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['status', 'slot_date', 'slot_start'], name='booking_status_day_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['office', 'slot_date'], name='booking_office_day_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['emp_code', 'slot_date'], name='booking_emp_code_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['emp_email_id', 'slot_date'], name='booking_emp_email_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='slotmaster',
+            index=models.Index(fields=['slot_status', 'slot_date'], name='slot_status_date_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def delete_pending_otps(apps, schema_editor):
+    # Plain-text codes cannot be hashed into the new layout, and they expire
+    # within minutes anyway; users simply request a new one
+    apps.get_model('hall_api', 'EmailOTP').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hall_api', '0025_booking_access_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_pending_otps, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='emailotp',
+            name='otp',
+        ),
+        migrations.AddField(
+            model_name='emailotp',
+            name='otp_hash',
+            field=models.CharField(default='', max_length=64),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='emailotp',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='emailotp',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='emailotp',
+            name='email',
+            field=models.EmailField(max_length=254, unique=True),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:06
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_slots(apps, schema_editor):
+    """
+    Keep one row per (hall, slot_date, slot_start): the oldest, marked
+    Booked if any of the duplicates was.
+    """
+    SlotMaster = apps.get_model('hall_api', 'SlotMaster')
+    duplicates = (
+        SlotMaster.objects.exclude(slot_start=None)
+        .values('hall_id', 'slot_date', 'slot_start')
+        .annotate(rows=Count('id'), keep=Min('id'))
+        .filter(rows__gt=1)
+    )
+    for group in duplicates:
+        rows = SlotMaster.objects.filter(
+            hall_id=group['hall_id'], slot_date=group['slot_date'], slot_start=group['slot_start']
+        )
+        if rows.filter(slot_status='Booked').exists():
+            rows.filter(id=group['keep']).update(slot_status='Booked')
+        rows.exclude(id=group['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hall_api', '0026_hashed_email_otp'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='slotmaster',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='hallmaster',
+            name='closing_time',
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='hallmaster',
+            name='opening_time',
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(merge_duplicate_slots, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='slotmaster',
+            constraint=models.UniqueConstraint(fields=('hall', 'slot_date', 'slot_start'), name='unique_hall_slot'),
+        ),
+    ]
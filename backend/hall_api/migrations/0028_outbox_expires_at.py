@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:50
+
+from django.db import migrations, models
+
+
+def delete_otp_emails(apps, schema_editor):
+    # These hold plain-text codes; 0026 already invalidated every one of them
+    apps.get_model('hall_api', 'EmailOutbox').objects.filter(
+        subject='Your OTP for Hall Booking System'
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hall_api', '0027_slot_master_per_hall'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailoutbox',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(delete_otp_emails, migrations.RunPython.noop),
+    ]
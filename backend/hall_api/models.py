@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from .slots import DAY_END, DAY_START, MINUTES_PER_DAY, minute_of_day, parse_slot_time
 
 class Entity(models.Model):
     entity_code = models.CharField(max_length=50, unique=True)
@@ -85,10 +86,36 @@ class HallMaster(models.Model):
     extension_power_box = models.BooleanField(default=False)
     stationaries = models.BooleanField(default=False)
     chairs_tables = models.BooleanField(default=False) 
+    # Bookable hours; BOOKING_DAY_START/BOOKING_DAY_END apply when unset
+    opening_time = models.TimeField(blank=True, null=True)
+    closing_time = models.TimeField(blank=True, null=True)
 
 
     def __str__(self):
         return f"{self.hall_code} - {self.hall_name}"
+
+    def operating_hours(self):
+        """
+        The hall's bookable hours as a (start, end) pair of minutes since
+        midnight. A closing time at or before the opening time means midnight.
+        """
+        start = minute_of_day(self.opening_time) if self.opening_time else DAY_START
+        end = minute_of_day(self.closing_time) if self.closing_time else DAY_END
+        if end <= start:
+            end = MINUTES_PER_DAY
+        return start, end
+
+    def bookable_hours(self):
+        """
+        The hours bookings must fall within. Unlike operating_hours(), which
+        lays out the slots offered by default, an unset opening or closing
+        time leaves that end of the day unrestricted.
+        """
+        start = minute_of_day(self.opening_time) if self.opening_time else 0
+        end = minute_of_day(self.closing_time) if self.closing_time else MINUTES_PER_DAY
+        if end <= start:
+            end = MINUTES_PER_DAY
+        return start, end
 class BlockedDate(models.Model):
     office = models.ForeignKey(OfficeMaster, on_delete=models.CASCADE)
     hall = models.ForeignKey(HallMaster, on_delete=models.CASCADE, null=True, blank=True)
@@ -133,7 +160,17 @@ class Infrastructure(models.Model):
     def __str__(self):
         return f"{self.infra_code} - {self.infra_item}"
 
-class SlotMaster(models.Model):
+class SlotIntervalMixin:
+    """
+    Keeps the slot_start/slot_end minute columns in step with the slot_time label.
+    """
+    def set_slot_interval(self):
+        try:
+            self.slot_start, self.slot_end = parse_slot_time(self.slot_time)
+        except ValueError:
+            self.slot_start = self.slot_end = None
+
+class SlotMaster(SlotIntervalMixin, models.Model):
     SLOT_STATUS_CHOICES = [
         ('Available', 'Available'),
         ('Booked', 'Booked'),
@@ -142,18 +179,32 @@ class SlotMaster(models.Model):
     slot_date = models.DateField()
     hall = models.ForeignKey(HallMaster, on_delete=models.CASCADE)
     slot_time = models.CharField(max_length=50)
+    slot_start = models.PositiveSmallIntegerField(blank=True, null=True)
+    slot_end = models.PositiveSmallIntegerField(blank=True, null=True)
     slot_status = models.CharField(max_length=20, choices=SLOT_STATUS_CHOICES, default='Available')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(blank=True, null=True)
     is_deleted = models.BooleanField(default=False)
     class Meta:
-        unique_together = ('slot_date', 'slot_time')
+        constraints = [
+            # One row per slot of each hall; also the index slot status updates use
+            models.UniqueConstraint(fields=['hall', 'slot_date', 'slot_start'], name='unique_hall_slot'),
+        ]
+        indexes = [
+            models.Index(fields=['slot_date', 'slot_start', 'slot_end'], name='slot_interval_idx'),
+            # Available-slot lookups
+            models.Index(fields=['slot_status', 'slot_date'], name='slot_status_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.slot_date} - {self.slot_time}"
 
-class Booking(models.Model):
+    def save(self, *args, **kwargs):
+        self.set_slot_interval()
+        super().save(*args, **kwargs)
+
+class Booking(SlotIntervalMixin, models.Model):
     STATUS_CHOICES = [
         ('Pending', 'Pending'),
         ('Approved', 'Approved'),
@@ -170,6 +221,8 @@ class Booking(models.Model):
     book_date = models.DateField(auto_now_add=True)
     slot_date = models.DateField()
     slot_time = models.CharField(max_length=50)
+    slot_start = models.PositiveSmallIntegerField(blank=True, null=True)
+    slot_end = models.PositiveSmallIntegerField(blank=True, null=True)
     office = models.ForeignKey(OfficeMaster, on_delete=models.CASCADE)
     hall = models.ForeignKey(HallMaster, on_delete=models.CASCADE)
     session = models.ForeignKey(SessionMaster, on_delete=models.CASCADE, default='meeting')
@@ -190,6 +243,48 @@ class Booking(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(blank=True, null=True)
     is_deleted = models.BooleanField(default=False)
+
+    class Meta:
+        # Hot paths only read live bookings, so most indexes skip soft-deleted rows
+        indexes = [
+            models.Index(fields=['slot_date', 'slot_start', 'slot_end'], name='booking_interval_idx'),
+            # Covers the availability bitmap load and per-hall booking lists
+            models.Index(
+                fields=['hall', 'slot_date', 'status', 'slot_start', 'slot_end'],
+                condition=models.Q(is_deleted=False),
+                name='booking_hall_day_active_idx',
+            ),
+            # Pending approvals, current working halls, upcoming approved bookings
+            models.Index(
+                fields=['status', 'slot_date', 'slot_start'],
+                condition=models.Q(is_deleted=False),
+                name='booking_status_day_active_idx',
+            ),
+            models.Index(
+                fields=['office', 'slot_date'],
+                condition=models.Q(is_deleted=False),
+                name='booking_office_day_active_idx',
+            ),
+            models.Index(
+                fields=['emp_code', 'slot_date'],
+                condition=models.Q(is_deleted=False),
+                name='booking_emp_code_active_idx',
+            ),
+            models.Index(
+                fields=['emp_email_id', 'slot_date'],
+                condition=models.Q(is_deleted=False),
+                name='booking_emp_email_active_idx',
+            ),
+        ]
+        constraints = [
+            # At most one live approved booking may hold a hall's slot
+            models.UniqueConstraint(
+                fields=['hall', 'slot_date', 'slot_start'],
+                condition=models.Q(status='Approved', is_deleted=False),
+                name='unique_approved_booking_slot',
+            ),
+        ]
+
     def __str__(self):
         return f"{self.emp_code} - {self.slot_date} - {self.slot_time}"
 
@@ -201,18 +296,98 @@ class Booking(models.Model):
             self.approved = False
         else:
             self.approved = False
+        self.set_slot_interval()
         super().save(*args, **kwargs)
         
 
 class EmailOTP(models.Model):
-    email = models.EmailField()
-    otp = models.CharField(max_length=6)
+    """
+    The pending OTP of an email address. Only a keyed hash of the code is
+    stored; rows past expires_at are removed by the purge_expired_otps command.
+    """
+    email = models.EmailField(unique=True)
+    otp_hash = models.CharField(max_length=64)
+    attempts = models.PositiveSmallIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    @staticmethod
+    def hash_otp(email, otp):
+        from django.utils.crypto import salted_hmac
+        return salted_hmac('hall_api.EmailOTP', f'{email}:{otp}', algorithm='sha256').hexdigest()
+
+    def check_otp(self, otp):
+        from django.utils.crypto import constant_time_compare
+        return constant_time_compare(self.otp_hash, self.hash_otp(self.email, otp))
 
     def is_expired(self):
         from django.utils import timezone
-        from datetime import timedelta
-        return timezone.now() > self.created_at + timedelta(minutes=5)
+        return timezone.now() > self.expires_at
+
+    def __str__(self):
+        return self.email
+
+class EmailOutbox(models.Model):
+    """
+    Outgoing email queued inside the request transaction and delivered later
+    by the send_outbox command.
+
+    Emails with an expires_at (OTPs) carry a secret: they are not sent after
+    it, their message is cleared once sent, and purge_expired_otps deletes
+    them once expired.
+    """
+    STATUS_CHOICES = [
+        ('Pending', 'Pending'),
+        ('Sent', 'Sent'),
+        ('Dead', 'Dead'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True, null=True)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(auto_now_add=True)
+    last_error = models.TextField(blank=True, null=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    expires_at = models.DateTimeField(blank=True, null=True, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.status} - {self.subject}"
+
+class DailyBookingStats(models.Model):
+    """
+    Live booking counts per office, hall, session and date, by status.
+    Kept up to date as bookings change so the dashboard never scans Booking.
+    """
+    office = models.ForeignKey(OfficeMaster, on_delete=models.CASCADE)
+    hall = models.ForeignKey(HallMaster, on_delete=models.CASCADE)
+    session = models.ForeignKey(SessionMaster, on_delete=models.CASCADE)
+    slot_date = models.DateField()
+    pending = models.IntegerField(default=0)
+    approved = models.IntegerField(default=0)
+    rejected = models.IntegerField(default=0)
+    cancelled = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['office', 'hall', 'session', 'slot_date'],
+                name='unique_daily_booking_stats',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['slot_date', 'office'], name='daily_stats_date_office_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.email} - {self.otp}"
+        return f"{self.hall_id} - {self.session_id} - {self.slot_date}"
@@ -0,0 +1,135 @@
+"""
+"Now occupancy" snapshots for admin display boards.
+
+A snapshot lists who is in each hall during the current half-hour slot and
+who is booked for the next one. Snapshots are cached per office under the
+slot boundary they were taken at. The first request after a boundary takes
+a new one, and any change to an approved booking for today or tomorrow
+drops the office's snapshot so the next request retakes it. With the default
+per-process locmem cache that only reaches the worker that made the change;
+point CACHES at Redis or Memcached to share snapshots between workers.
+"""
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Q
+from django.dispatch import receiver
+
+from .caching import TieredCache
+from .models import Booking
+from .signals import booking_changed
+from .slots import SLOT_MINUTES, format_slot_time, local_now, minute_of_day
+
+cache = TieredCache(
+    timeout=SLOT_MINUTES * 60,
+    local_size=getattr(settings, 'OCCUPANCY_LOCAL_CACHE_SIZE', 256),
+    local_ttl=getattr(settings, 'OCCUPANCY_LOCAL_CACHE_TTL', 5),
+)
+
+# Stands in for the office id in the key of the all-offices snapshot
+ALL_OFFICES = 'all'
+
+OCCUPANT_FIELDS = ('hall_id', 'hall__hall_name', 'team_name', 'slot_time', 'emp_name')
+
+
+def current_boundary():
+    """
+    The local start time of the slot in progress.
+    """
+    now = local_now()
+    start = minute_of_day(now) // SLOT_MINUTES * SLOT_MINUTES
+    return now.replace(hour=start // 60, minute=start % 60, second=0, microsecond=0)
+
+
+def _key(office_id, boundary):
+    return f'occupancy:{office_id or ALL_OFFICES}:{boundary.isoformat()}'
+
+
+def _slot(boundary):
+    start = minute_of_day(boundary)
+    return boundary.date(), start, format_slot_time(start, start + SLOT_MINUTES)
+
+
+def take_snapshot(office_id, boundary):
+    """
+    The occupants of the slot starting at `boundary` and of the one after
+    it, from a single booking query.
+    """
+    slots = [_slot(boundary), _slot(boundary + timedelta(minutes=SLOT_MINUTES))]
+    covers = Q()
+    for slot_date, start, _ in slots:
+        covers |= Q(slot_date=slot_date, slot_start__lte=start, slot_end__gt=start)
+    bookings = Booking.objects.filter(covers, status='Approved', is_deleted=False)
+    if office_id:
+        bookings = bookings.filter(office_id=office_id)
+
+    occupants = [[], []]
+    rows = bookings.order_by('hall__hall_name').values(*OCCUPANT_FIELDS, 'slot_date', 'slot_start', 'slot_end')
+    for row in rows:
+        occupant = {
+            'hall_id': row['hall_id'],
+            'hall_name': row['hall__hall_name'],
+            'team_name': row['team_name'],
+            'slot_time': row['slot_time'],
+            'emp_name': row['emp_name'],
+        }
+        for index, (slot_date, start, _) in enumerate(slots):
+            if row['slot_date'] == slot_date and row['slot_start'] <= start < row['slot_end']:
+                occupants[index].append(occupant)
+
+    (current_date, _, current_label), (next_date, _, next_label) = slots
+    return {
+        'office_id': office_id,
+        'slot_date': current_date.isoformat(),
+        'slot_time': current_label,
+        'valid_until': (boundary + timedelta(minutes=SLOT_MINUTES)).isoformat(),
+        'current': occupants[0],
+        'next': {
+            'slot_date': next_date.isoformat(),
+            'slot_time': next_label,
+            'occupants': occupants[1],
+        },
+    }
+
+
+def get_occupancy(office_id=None):
+    """
+    The snapshot for the current slot, for one office or all of them.
+    """
+    boundary = current_boundary()
+    key = _key(office_id, boundary)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = take_snapshot(office_id, boundary)
+        cache.set(key, snapshot)
+    return snapshot
+
+
+async def aget_occupancy(office_id=None):
+    """
+    get_occupancy for async views. Snapshots in the local tier are returned
+    without leaving the event loop.
+    """
+    snapshot = cache.local.get(_key(office_id, current_boundary()))
+    if snapshot is not None:
+        return snapshot
+    return await sync_to_async(get_occupancy)(office_id)
+
+
+@receiver(booking_changed)
+def invalidate_occupancy(sender, changes, **kwargs):
+    """
+    Drop the current snapshots that an approved booking was added to or
+    removed from. Only today and tomorrow can hold the current or next slot.
+    """
+    boundary = current_boundary()
+    dates = {boundary.date(), boundary.date() + timedelta(days=1)}
+    offices = set()
+    for previous, current in changes:
+        for booking in (previous, current):
+            if (booking is not None and booking.status == 'Approved' and not booking.is_deleted
+                    and booking.slot_date in dates):
+                offices.add(booking.office_id)
+    if offices:
+        cache.delete_many([_key(office_id, boundary) for office_id in offices | {None}])
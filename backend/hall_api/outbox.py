@@ -0,0 +1,88 @@
+"""
+Delivery of queued EmailOutbox rows over a single reused SMTP connection.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+MAX_ATTEMPTS = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+BACKOFF_SECONDS = getattr(settings, 'EMAIL_OUTBOX_BACKOFF_SECONDS', 60)
+MAX_BACKOFF_SECONDS = getattr(settings, 'EMAIL_OUTBOX_MAX_BACKOFF_SECONDS', 3600)
+
+
+def retry_delay(attempts):
+    """
+    Exponential backoff: 1, 2, 4 ... times the base delay, capped.
+    """
+    return timedelta(seconds=min(BACKOFF_SECONDS * 2 ** (attempts - 1), MAX_BACKOFF_SECONDS))
+
+
+def send_batch(batch_size=50):
+    """
+    Send up to batch_size due emails. Failures are retried with backoff and
+    dead-lettered after MAX_ATTEMPTS. Returns (sent, failed) counts.
+
+    Rows are not claimed, so run a single sender per database.
+    """
+    now = timezone.now()
+    batch = list(
+        EmailOutbox.objects.filter(status='Pending', next_attempt_at__lte=now)
+        # Expired OTPs are useless to the recipient; purge_expired_otps deletes them
+        .filter(Q(expires_at__isnull=True) | Q(expires_at__gt=now))
+        .order_by('next_attempt_at', 'id')[:batch_size]
+    )
+    if not batch:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        # Nothing can be delivered, so count it against every email in the batch
+        for email in batch:
+            _record_failure(email, e)
+        return 0, len(batch)
+
+    try:
+        for email in batch:
+            message = EmailMessage(
+                email.subject,
+                email.message,
+                email.from_email or settings.DEFAULT_FROM_EMAIL,
+                email.recipients,
+                connection=connection,
+            )
+            try:
+                message.send(fail_silently=False)
+            except Exception as e:
+                _record_failure(email, e)
+                failed += 1
+            else:
+                email.status = 'Sent'
+                email.attempts += 1
+                email.sent_at = timezone.now()
+                email.last_error = None
+                if email.expires_at is not None:
+                    # Do not keep the secret once it has been delivered
+                    email.message = ''
+                email.save(update_fields=['status', 'attempts', 'sent_at', 'last_error', 'message', 'updated_at'])
+                sent += 1
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def _record_failure(email, error):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= MAX_ATTEMPTS:
+        email.status = 'Dead'
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+    email.save(update_fields=['status', 'attempts', 'next_attempt_at', 'last_error', 'updated_at'])
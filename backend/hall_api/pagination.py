@@ -0,0 +1,130 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are walked in a fixed order, by default (slot_date, slot_start, id),
+and the cursor holds the sort key of the last row on the previous page. The
+next page is fetched with a "rows after this key" filter, so every page costs
+one indexed range scan however deep it is, and rows created or deleted while
+a client pages through do not shift the pages after them.
+
+Clients that send neither `cursor` nor `page_size` still get a plain list
+unless KEYSET_PAGINATE_BY_DEFAULT is on, so existing callers keep working.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering = ('slot_date', 'slot_start', 'id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.page_size = getattr(settings, 'KEYSET_PAGE_SIZE', 50)
+        self.max_page_size = getattr(settings, 'KEYSET_MAX_PAGE_SIZE', 500)
+        self.paginate_by_default = getattr(settings, 'KEYSET_PAGINATE_BY_DEFAULT', False)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if not (self.paginate_by_default or self.cursor_query_param in params
+                or self.page_size_query_param in params):
+            return None
+
+        self.request = request
+        self.ordering = getattr(view, 'keyset_ordering', self.ordering)
+        self.page_size = self.get_page_size(request)
+        self.model = model = queryset.model
+
+        # Unparsed legacy slot labels have no slot_start; they sort first
+        queryset = queryset.order_by(*(F(field).asc(nulls_first=True) for field in self.ordering))
+        cursor = self.decode_cursor(request, model)
+        if cursor is not None:
+            queryset = queryset.filter(self.after(cursor))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def after(self, cursor):
+        """
+        Filter for rows sorting strictly after the cursor key.
+        """
+        condition = Q(pk__in=[])
+        equal = Q()
+        for field, value in zip(self.ordering, cursor):
+            if value is None:
+                greater, same = Q(**{f'{field}__isnull': False}), Q(**{f'{field}__isnull': True})
+            else:
+                greater, same = Q(**{f'{field}__gt': value}), Q(**{field: value})
+            condition |= equal & greater
+            equal &= same
+        return condition
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                None if value is None else self.key_field(model, field).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, UnicodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row):
+        if isinstance(row, dict):
+            # A values() page; the ordering fields must be among its keys
+            values = [row[field] for field in self.ordering]
+        else:
+            values = [getattr(row, self.key_field(self.model, field).attname) for field in self.ordering]
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+        return urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def key_field(model, field):
+        return model._meta.pk if field == 'pk' else model._meta.get_field(field)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
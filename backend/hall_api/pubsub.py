@@ -0,0 +1,94 @@
+"""
+Publish/subscribe for live updates.
+
+Messages are published from sync code (signal receivers) and read by async
+views. The broker class is settings.LIVE_BROKER. The default InProcessBroker
+only reaches subscribers in the publishing process, so with several workers
+point LIVE_BROKER at a broker backed by something shared, such as Redis
+pub/sub, that implements the same publish() and subscribe().
+"""
+import asyncio
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """
+    Messages for a set of channels, read with `async for`. If the reader
+    falls more than `maxsize` messages behind, the backlog is dropped and
+    `overflowed` is set, so the reader knows to resynchronise.
+    """
+    def __init__(self, broker, channels, maxsize):
+        self.broker = broker
+        self.channels = frozenset(channels)
+        self.overflowed = False
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, channel, message):
+        # Called from any thread
+        try:
+            self._loop.call_soon_threadsafe(self._put, (channel, message))
+        except RuntimeError:
+            # The reader's event loop has gone away without closing this
+            self.close()
+
+    def _put(self, item):
+        if self._queue.full():
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self.overflowed = True
+        self._queue.put_nowait(item)
+
+    async def get(self):
+        """
+        The next (channel, message) pair.
+        """
+        return await self._queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.get()
+
+
+class InProcessBroker:
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize or getattr(settings, 'LIVE_SUBSCRIBER_QUEUE_SIZE', 100)
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(channel, message)
+
+    def subscribe(self, channels):
+        """
+        Start receiving messages for `channels`. Call from the event loop
+        that will read them, and close() the subscription when done.
+        """
+        subscription = Subscription(self, channels, self.maxsize)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+
+broker = import_string(getattr(settings, 'LIVE_BROKER', 'hall_api.pubsub.InProcessBroker'))()
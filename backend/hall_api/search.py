@@ -0,0 +1,82 @@
+"""
+Free-hall search: the halls that are free for a whole time window on every
+date of a range.
+
+The search is one query. Candidate halls are filtered on their own columns,
+and halls with a holding booking overlapping the window, or blocked on one
+of the dates (directly or office-wide), are excluded with EXISTS subqueries
+that are answered from the booking and blocked-date indexes. Only the
+bookable-hours check runs in Python, on the halls that are left.
+"""
+from datetime import timedelta
+
+from django.db.models import Exists, OuterRef, Q
+
+from .models import BlockedDate, Booking
+from .slot_master import HOLDING_STATUSES
+
+AMENITIES = ('wifi', 'tv', 'whiteboard', 'speaker', 'mic', 'extension_power_box', 'stationaries', 'chairs_tables')
+
+
+def search_dates(start_date, end_date):
+    """
+    The bookable dates from start_date to end_date; Sundays are skipped, as
+    in get_next_available_slots.
+    """
+    return [
+        start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)
+        if (start_date + timedelta(days=i)).weekday() != 6
+    ]
+
+
+def free_halls(queryset, dates, start, end, office_id=None, min_capacity=None, categories=(), amenities=()):
+    """
+    The halls of `queryset` that are open, neither deleted nor frozen, match
+    the filters and are free from minute `start` to `end` on every one of
+    `dates`. Returns a queryset; filter the result with within_hours().
+    """
+    halls = queryset.filter(is_deleted=False, is_freeze=False)
+    if office_id is not None:
+        halls = halls.filter(office_id=office_id)
+    if min_capacity is not None:
+        halls = halls.filter(capacity__gte=min_capacity)
+    if categories:
+        halls = halls.filter(category__in=categories)
+    if amenities:
+        halls = halls.filter(**{amenity: True for amenity in amenities})
+
+    booked = Booking.objects.filter(
+        hall_id=OuterRef('pk'),
+        slot_date__in=dates,
+        slot_start__lt=end,
+        slot_end__gt=start,
+        status__in=HOLDING_STATUSES,
+        is_deleted=False,
+    )
+    blocked = BlockedDate.objects.filter(
+        Q(hall_id=OuterRef('pk')) | Q(hall__isnull=True, office_id=OuterRef('office_id')),
+        blocked_date__in=dates,
+    )
+    return halls.exclude(Exists(booked)).exclude(Exists(blocked))
+
+
+def within_hours(hall, start, end):
+    """
+    Whether the window from minute `start` to `end` is inside the hall's
+    bookable hours.
+    """
+    opening, closing = hall.bookable_hours()
+    return opening <= start and end <= closing
+
+
+def parse_list(value, allowed):
+    """
+    A comma-separated query parameter as a list, or ValueError naming the
+    entries not in `allowed`.
+    """
+    items = [item.strip() for item in value.split(',') if item.strip()] if value else []
+    unknown = [item for item in items if item not in allowed]
+    if unknown:
+        raise ValueError(', '.join(unknown))
+    return items
+
@@ -1,6 +1,148 @@
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, ValidationError as DjangoValidationError
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from .models import *
+from .master_cache import MASTER_MODELS, get_master
+from .slots import normalize_slot_time, parse_slot_time
+
+INVALID_SLOT_TIME = 'Slot time must be a single half-hour slot like "3:00 PM - 3:30 PM".'
+
+class SlotTimeValidationMixin:
+    """
+    Accepts the legacy slot_time label and stores it in its canonical form.
+    """
+    def validate_slot_time(self, value):
+        try:
+            return normalize_slot_time(value)
+        except ValueError:
+            raise serializers.ValidationError(INVALID_SLOT_TIME)
+
+class EagerLoadingMixin:
+    """
+    Declares the relations a serializer reads so that every queryset it is
+    given can load them up front instead of once per row.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    @classmethod
+    def eager_load(cls, queryset):
+        return queryset.select_related(*cls.select_related_fields).prefetch_related(*cls.prefetch_related_fields)
+
+def nested(prefix, fields):
+    """
+    Prefix relation names for a serializer nested under the `prefix` field.
+    """
+    return [f'{prefix}__{field}' for field in fields]
+
+class CachedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Looks related halls, offices, sessions and admin users up through the
+    master-data cache instead of querying for them on every write.
+    """
+    def to_internal_value(self, data):
+        queryset = self.get_queryset()
+        model = queryset.model
+        if model not in MASTER_MODELS or self.pk_field is not None or queryset.query.has_filters():
+            return super().to_internal_value(data)
+
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return get_master(model, data)
+        except model.DoesNotExist:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError, DjangoValidationError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+class ValuesReader:
+    """
+    Produces the same output as a ModelSerializer, field for field and in the
+    same order, straight from .values_list() rows. No model instances are
+    built and the per-field work is worked out once, up front, so read-only
+    list endpoints can return thousands of rows cheaply.
+
+    Only plain model fields, dotted sources and primary key relations are
+    supported.
+    """
+    # Field types whose representation is the database value itself
+    PASS_THROUGH = (
+        serializers.CharField,
+        serializers.BooleanField,
+        serializers.IntegerField,
+        serializers.ChoiceField,
+        serializers.PrimaryKeyRelatedField,
+    )
+
+    def __init__(self, serializer_class):
+        self.names = []
+        self.lookups = []
+        converters = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if (field.source == '*' or isinstance(field, (serializers.BaseSerializer, serializers.ManyRelatedField))
+                    or (isinstance(field, serializers.RelatedField)
+                        and not isinstance(field, serializers.PrimaryKeyRelatedField))):
+                raise ImproperlyConfigured(f'{serializer_class.__name__}.{name} cannot be read from values()')
+            if not isinstance(field, self.PASS_THROUGH):
+                converters.append((len(self.names), field.to_representation))
+            self.names.append(name)
+            self.lookups.append(field.source.replace('.', '__'))
+        self.converters = converters
+        self.row_getter = itemgetter(*self.lookups)
+
+    def values(self, queryset):
+        """
+        The queryset as dicts keyed by lookup, for paginating before serializing.
+        """
+        return queryset.values(*self.lookups)
+
+    def serialize(self, queryset):
+        return self.to_representation(queryset.values_list(*self.lookups))
+
+    async def aserialize(self, queryset):
+        return self.to_representation([row async for row in queryset.values_list(*self.lookups)])
+
+    def serialize_values(self, rows):
+        """
+        Serialize rows produced by values().
+        """
+        return self.to_representation(map(self.row_getter, rows))
+
+    async def aiterate(self, queryset, chunk_size=2000):
+        """
+        Serialize the queryset one row at a time, fetching `chunk_size` rows
+        per round trip, for streaming responses. Yields lists of field values
+        in the order of `names`.
+        """
+        converters = self.converters
+        getter = self.row_getter if len(self.lookups) > 1 else lambda row: (row[self.lookups[0]],)
+        # values_list() runs its query on first use rather than in the
+        # iterator, which aiterator() cannot move off the event loop
+        async for row in queryset.values(*self.lookups).aiterator(chunk_size=chunk_size):
+            row = list(getter(row))
+            for position, convert in converters:
+                if row[position] is not None:
+                    row[position] = convert(row[position])
+            yield row
+
+    def to_representation(self, rows):
+        names, converters = self.names, self.converters
+        if not converters:
+            return [dict(zip(names, row)) for row in rows]
+
+        data = []
+        for row in rows:
+            row = list(row)
+            for position, convert in converters:
+                if row[position] is not None:
+                    row[position] = convert(row[position])
+            data.append(dict(zip(names, row)))
+        return data
 
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
@@ -15,8 +157,11 @@ class EntitySerializer(serializers.ModelSerializer):
         model = Entity
         fields = '__all__'
 
-class AdminUserSerializer(serializers.ModelSerializer):
+class AdminUserSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     office_name = serializers.CharField(source='office.office_name', read_only=True)
+
+    select_related_fields = ['office']
+    prefetch_related_fields = ['groups', 'user_permissions']
     
     class Meta:
         model = AdminUser
@@ -42,18 +187,32 @@ class AdminUserSerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
-class OfficeMasterSerializer(serializers.ModelSerializer):
+class OfficeMasterSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     office_spoc_details = AdminUserSerializer(source='office_spoc', read_only=True)
+
+    serializer_related_field = CachedPrimaryKeyRelatedField
+    select_related_fields = nested('office_spoc', AdminUserSerializer.select_related_fields)
+    prefetch_related_fields = ['entities', *nested('office_spoc', AdminUserSerializer.prefetch_related_fields)]
     
     class Meta:
         model = OfficeMaster
         fields = '__all__'
 
-class HallMasterSerializer(serializers.ModelSerializer):
+class HallMasterSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     office_name = serializers.CharField(source='office.office_name', read_only=True)
     day_spoc_details = AdminUserSerializer(source='day_spoc', read_only=True)
     mid_spoc_details = AdminUserSerializer(source='mid_spoc', read_only=True)
     night_spoc_details = AdminUserSerializer(source='night_spoc', read_only=True)
+
+    serializer_related_field = CachedPrimaryKeyRelatedField
+    select_related_fields = ['office'] + [
+        relation for spoc in ('day_spoc', 'mid_spoc', 'night_spoc')
+        for relation in nested(spoc, AdminUserSerializer.select_related_fields)
+    ]
+    prefetch_related_fields = [
+        relation for spoc in ('day_spoc', 'mid_spoc', 'night_spoc')
+        for relation in nested(spoc, AdminUserSerializer.prefetch_related_fields)
+    ]
     
     class Meta:
         model = HallMaster
@@ -69,10 +228,20 @@ class HallMasterSerializer(serializers.ModelSerializer):
             'image': {'required': False}
         }
 
-class SessionMasterSerializer(serializers.ModelSerializer):
+class SessionMasterSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     preferred_hall_1_details = HallMasterSerializer(source='preferred_hall_1', read_only=True)
     preferred_hall_2_details = HallMasterSerializer(source='preferred_hall_2', read_only=True)
     preferred_hall_3_details = HallMasterSerializer(source='preferred_hall_3', read_only=True)
+
+    serializer_related_field = CachedPrimaryKeyRelatedField
+    select_related_fields = [
+        relation for hall in ('preferred_hall_1', 'preferred_hall_2', 'preferred_hall_3')
+        for relation in nested(hall, HallMasterSerializer.select_related_fields)
+    ]
+    prefetch_related_fields = [
+        relation for hall in ('preferred_hall_1', 'preferred_hall_2', 'preferred_hall_3')
+        for relation in nested(hall, HallMasterSerializer.prefetch_related_fields)
+    ]
     
     class Meta:
         model = SessionMaster
@@ -83,40 +252,123 @@ class InfrastructureSerializer(serializers.ModelSerializer):
         model = Infrastructure
         fields = '__all__'
 
-class SlotMasterSerializer(serializers.ModelSerializer):
+class SlotMasterSerializer(SlotTimeValidationMixin, serializers.ModelSerializer):
     class Meta:
         model = SlotMaster
         fields = '__all__'
+        read_only_fields = ('slot_start', 'slot_end')
+
+    def validate(self, attrs):
+        # slot_start is derived, so the unique_hall_slot constraint is checked here
+        hall = attrs.get('hall', getattr(self.instance, 'hall', None))
+        slot_date = attrs.get('slot_date', getattr(self.instance, 'slot_date', None))
+        slot_time = attrs.get('slot_time', getattr(self.instance, 'slot_time', None))
+        duplicates = SlotMaster.objects.filter(
+            hall=hall, slot_date=slot_date, slot_start=parse_slot_time(slot_time)[0]
+        )
+        if self.instance is not None:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError('This hall already has a slot starting at this time on this date.')
+        return attrs
 
-class BookingSerializer(serializers.ModelSerializer):
+class BookingSerializer(SlotTimeValidationMixin, EagerLoadingMixin, serializers.ModelSerializer):
     office_name = serializers.CharField(source='office.office_name', read_only=True)
     hall_name = serializers.CharField(source='hall.hall_name', read_only=True)
     session_type = serializers.CharField(source='session.session_type', read_only=True)
     hall_category = serializers.CharField(source='hall.category', read_only=True)
+
+    serializer_related_field = CachedPrimaryKeyRelatedField
+    select_related_fields = ['office', 'hall', 'session']
     
     class Meta:
         model = Booking
         fields = '__all__'
-        read_only_fields = ('book_date',)
+        read_only_fields = ('book_date', 'slot_start', 'slot_end')
+        # Approved slot clashes are enforced by the database and reported as 409s
+        validators = []
+
+# Fast read path for booking lists that are only ever serialized
+booking_reader = ValuesReader(BookingSerializer)
+
+class BookingCreateSerializer(SlotTimeValidationMixin, serializers.ModelSerializer):
+    serializer_related_field = CachedPrimaryKeyRelatedField
 
-class BookingCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Booking
         fields = '__all__'
-        read_only_fields = ('book_date', 'status', 'approved')
-class EmailOTPSerializer(serializers.ModelSerializer):
+        read_only_fields = ('book_date', 'status', 'approved', 'slot_start', 'slot_end')
+
+class BookingBulkCreateSerializer(serializers.ModelSerializer):
+    """
+    Validates one payload covering every date in a range and every selected slot.
+    The remaining booking fields are shared by all the bookings it creates.
+    """
+    serializer_related_field = CachedPrimaryKeyRelatedField
+
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    slot_times = serializers.ListField(
+        child=serializers.CharField(max_length=50),
+        allow_empty=False
+    )
+
     class Meta:
-        model = EmailOTP
-        fields = ['email']
+        model = Booking
+        exclude = (
+            'slot_date', 'slot_time', 'slot_start', 'slot_end', 'status',
+            'approved', 'deleted_at', 'is_deleted'
+        )
+
+    def validate_slot_times(self, value):
+        try:
+            return [normalize_slot_time(slot_time) for slot_time in value]
+        except ValueError:
+            raise serializers.ValidationError(INVALID_SLOT_TIME)
+
+    def validate(self, attrs):
+        if attrs['end_date'] < attrs['start_date']:
+            raise serializers.ValidationError('end_date must not be before start_date.')
+
+        # Drop repeated slots but keep the order they were picked in
+        attrs['slot_times'] = list(dict.fromkeys(attrs['slot_times']))
+
+        days = (attrs['end_date'] - attrs['start_date']).days + 1
+        max_bookings = getattr(settings, 'BOOKING_BULK_MAX', 1000)
+        if days * len(attrs['slot_times']) > max_bookings:
+            raise serializers.ValidationError(
+                f'A bulk request may create at most {max_bookings} bookings.'
+            )
+        return attrs
+
+
+class BookingBySessionSerializer(BookingBulkCreateSerializer):
+    """
+    A bulk booking without a hall; the hall is picked from the session's
+    preferred halls.
+    """
+    class Meta(BookingBulkCreateSerializer.Meta):
+        exclude = BookingBulkCreateSerializer.Meta.exclude + ('hall', 'office')
+
+    def validate_session(self, value):
+        if value.is_deleted:
+            raise serializers.ValidationError('This session type has been deleted.')
+        return value
+
+
+class EmailOTPSerializer(serializers.Serializer):
+    email = serializers.EmailField()
 
 
 class VerifyOTPSerializer(serializers.Serializer):
     email = serializers.EmailField()
     otp = serializers.CharField(max_length=6)
-class BlockedDateSerializer(serializers.ModelSerializer):
+class BlockedDateSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     office_name = serializers.CharField(source='office.office_name', read_only=True)
     hall_name = serializers.CharField(source='hall.hall_name', read_only=True)
     created_by_name = serializers.CharField(source='created_by.username', read_only=True)
+
+    select_related_fields = ['office', 'hall', 'created_by']
     
     class Meta:
         model = BlockedDate
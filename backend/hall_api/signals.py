@@ -0,0 +1,35 @@
+"""
+Signals fired when bookings are created or change state.
+"""
+import copy
+
+from django.db import transaction
+from django.dispatch import Signal
+
+# Sent with `changes`, a list of (previous, current) booking pairs, once the
+# transaction that made them has committed. `previous` is None for a new
+# booking and a snapshot of the booking before the change otherwise;
+# `current` is None for a booking that was deleted outright.
+booking_changed = Signal()
+
+# Sent with the same `changes` inside the transaction that made them, for
+# receivers whose writes must commit or roll back with the bookings
+booking_written = Signal()
+
+
+def booking_snapshot(booking):
+    """
+    Copy a booking before it is modified so receivers can see what changed.
+    """
+    return copy.copy(booking)
+
+
+def send_booking_changes(changes):
+    """
+    Announce booking changes. Call it inside the transaction that made them.
+    """
+    changes = list(changes)
+    if changes:
+        sender = (changes[0][1] or changes[0][0]).__class__
+        booking_written.send(sender=sender, changes=changes)
+        transaction.on_commit(lambda: booking_changed.send(sender=sender, changes=changes))
@@ -0,0 +1,139 @@
+"""
+Materialised SlotMaster rows: one per half-hour slot of each hall's
+operating hours.
+
+generate_slots() fills a date horizon in bulk. A booking_written receiver
+keeps slot_status in step with bookings inside the booking's own
+transaction: a slot is Booked while a pending or approved booking covers
+it, and Available otherwise.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import Exists, OuterRef, Q
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .availability import get_days, slot_mask
+from .models import Booking, HallMaster, SlotMaster
+from .signals import booking_written
+from .slots import SLOT_MINUTES, day_slot_starts, format_slot_time
+from .utils import get_blocked_dates
+
+# Booking statuses that hold a slot
+HOLDING_STATUSES = ('Pending', 'Approved')
+
+# Slot intervals OR-ed into one UPDATE
+UPDATE_CHUNK_SIZE = 200
+
+
+def slot_rows(hall, dates):
+    """
+    Unsaved SlotMaster rows for every slot of `hall` on `dates`, Booked
+    where a pending or approved booking already covers them.
+    """
+    days = get_days(hall.id, dates)
+    starts = day_slot_starts(*hall.operating_hours())
+    for slot_date in dates:
+        day = days[slot_date]
+        taken = day.booked | day.pending
+        for start in starts:
+            end = start + SLOT_MINUTES
+            yield SlotMaster(
+                hall_id=hall.id,
+                slot_date=slot_date,
+                slot_time=format_slot_time(start, end),
+                slot_start=start,
+                slot_end=end,
+                slot_status='Booked' if taken & slot_mask(start, end) else 'Available',
+            )
+
+
+def generate_slots(start_date, days, halls=None, chunk_size=1000):
+    """
+    Materialise the slots of `halls` (default: every hall that is neither
+    deleted nor frozen) for `days` days from `start_date`. Sundays and
+    blocked dates are skipped, as in get_next_available_slots. Existing rows
+    are left alone, so the command can be rerun to extend the horizon.
+    Returns the number of rows created.
+    """
+    if halls is None:
+        halls = HallMaster.objects.filter(is_deleted=False, is_freeze=False)
+    end_date = start_date + timedelta(days=days - 1)
+    existing = SlotMaster.objects.filter(slot_date__range=(start_date, end_date))
+    before = existing.count()
+
+    batch = []
+    for hall in halls:
+        blocked_dates = get_blocked_dates(hall, start_date, end_date)
+        dates = [
+            start_date + timedelta(days=i) for i in range(days)
+            if (start_date + timedelta(days=i)).weekday() != 6
+            and start_date + timedelta(days=i) not in blocked_dates
+        ]
+        for row in slot_rows(hall, dates):
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                SlotMaster.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+    if batch:
+        SlotMaster.objects.bulk_create(batch, ignore_conflicts=True)
+
+    return existing.count() - before
+
+
+def _holding(booking):
+    """
+    The (hall_id, slot_date, start, end) a booking holds, if it holds one.
+    """
+    if (booking is None or booking.is_deleted or booking.status not in HOLDING_STATUSES
+            or booking.slot_start is None):
+        return None
+    return booking.hall_id, booking.slot_date, booking.slot_start, booking.slot_end
+
+
+def set_slot_status(hall_id, spans, slot_status):
+    """
+    Set the status of a hall's slots overlapping any of `spans`, a list of
+    (slot_date, start, end), with one UPDATE per chunk of spans. Slots still
+    covered by another holding booking stay Booked.
+    """
+    spans = list(spans)
+    updated = 0
+    for offset in range(0, len(spans), UPDATE_CHUNK_SIZE):
+        overlaps = Q()
+        for slot_date, start, end in spans[offset:offset + UPDATE_CHUNK_SIZE]:
+            overlaps |= Q(slot_date=slot_date, slot_start__lt=end, slot_end__gt=start)
+        slots = SlotMaster.objects.filter(overlaps, hall_id=hall_id)
+        if slot_status == 'Available':
+            slots = slots.exclude(Exists(Booking.objects.filter(
+                hall_id=OuterRef('hall_id'),
+                slot_date=OuterRef('slot_date'),
+                slot_start__lt=OuterRef('slot_end'),
+                slot_end__gt=OuterRef('slot_start'),
+                status__in=HOLDING_STATUSES,
+                is_deleted=False,
+            )))
+        updated += slots.exclude(slot_status=slot_status).update(
+            slot_status=slot_status, updated_at=timezone.now()
+        )
+    return updated
+
+
+@receiver(booking_written)
+def sync_slot_status(sender, changes, **kwargs):
+    released = defaultdict(list)
+    held = defaultdict(list)
+    for previous, current in changes:
+        before, after = _holding(previous), _holding(current)
+        if before == after:
+            continue
+        if before:
+            released[before[0]].append(before[1:])
+        if after:
+            held[after[0]].append(after[1:])
+
+    for hall_id, spans in released.items():
+        set_slot_status(hall_id, spans, 'Available')
+    for hall_id, spans in held.items():
+        set_slot_status(hall_id, spans, 'Booked')
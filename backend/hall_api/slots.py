@@ -0,0 +1,103 @@
+"""
+Helpers for converting slot labels such as "3:00 PM - 3:30 PM" to and from
+minute-of-day intervals.
+"""
+import re
+
+import pytz
+from django.conf import settings
+from django.utils import timezone
+
+SLOT_MINUTES = 30
+MINUTES_PER_DAY = 24 * 60
+
+# Bookable hours used when suggesting free slots, as minutes since midnight
+DAY_START = getattr(settings, 'BOOKING_DAY_START', 9 * 60)
+DAY_END = getattr(settings, 'BOOKING_DAY_END', 18 * 60)
+
+_TIME_PATTERN = re.compile(r'^(\d{1,2}):(\d{1,2})\s*([AaPp][Mm])?$')
+
+
+def parse_time(value):
+    """
+    Parse "3:00 PM", "3:0 PM" or "15:00" into minutes since midnight.
+    """
+    match = _TIME_PATTERN.match(value.strip())
+    if not match:
+        raise ValueError(f'Invalid time: {value!r}')
+
+    hour, minute, period = int(match.group(1)), int(match.group(2)), match.group(3)
+    if period:
+        if not 1 <= hour <= 12:
+            raise ValueError(f'Invalid time: {value!r}')
+        hour = hour % 12 + (12 if period.upper() == 'PM' else 0)
+    if hour > 23 or minute > 59:
+        raise ValueError(f'Invalid time: {value!r}')
+    return hour * 60 + minute
+
+
+def parse_slot_time(label):
+    """
+    Parse a slot label into a (start, end) pair of minutes since midnight.
+    A label that runs past midnight (e.g. "11:30 PM - 12:00 AM") ends at the
+    end of the day.
+    """
+    parts = label.split('-')
+    if len(parts) != 2:
+        raise ValueError(f'Invalid slot time: {label!r}')
+
+    start, end = parse_time(parts[0]), parse_time(parts[1])
+    if end <= start:
+        end = MINUTES_PER_DAY
+    return start, end
+
+
+def format_time(minutes):
+    """
+    Format minutes since midnight the way the booking page labels slots.
+    """
+    hour, minute = divmod(minutes % MINUTES_PER_DAY, 60)
+    period = 'AM' if hour < 12 else 'PM'
+    return f'{hour % 12 or 12}:{minute:02d} {period}'
+
+
+def format_slot_time(start, end):
+    """
+    Format a (start, end) interval as a slot label, e.g. "3:00 PM - 3:30 PM".
+    """
+    return f'{format_time(start)} - {format_time(end)}'
+
+
+def normalize_slot_time(label):
+    """
+    Return the canonical label for a slot, raising ValueError if it cannot be
+    parsed or is not a single slot on the half-hour grid. Bookings only ever
+    hold whole slots, so the approved-slot constraint on (hall, date, start)
+    also rules out overlapping approvals.
+    """
+    start, end = parse_slot_time(label)
+    if start % SLOT_MINUTES or end - start != SLOT_MINUTES:
+        raise ValueError(f'Not a single {SLOT_MINUTES}-minute slot: {label!r}')
+    return format_slot_time(start, end)
+
+
+def local_now():
+    """
+    The current time in the time zone the halls operate in.
+    """
+    tz = pytz.timezone(getattr(settings, 'HALL_TIME_ZONE', 'Asia/Calcutta'))
+    return timezone.now().astimezone(tz)
+
+
+def minute_of_day(value):
+    """
+    Minutes since midnight for a datetime or time.
+    """
+    return value.hour * 60 + value.minute
+
+
+def day_slot_starts(day_start=DAY_START, day_end=DAY_END):
+    """
+    Start minutes of every half-hour slot between day_start and day_end.
+    """
+    return range(day_start, day_end - SLOT_MINUTES + 1, SLOT_MINUTES)
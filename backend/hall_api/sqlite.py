@@ -0,0 +1,30 @@
+"""
+Per-connection SQLite tuning.
+
+Every new SQLite connection gets the PRAGMAs in settings.SQLITE_PRAGMAS.
+With WAL journaling, readers no longer wait for a writer. The busy timeout
+makes a writer wait for the lock instead of failing with "database is
+locked".
+"""
+import re
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_PRAGMA_VALUE = re.compile(r'^-?[A-Za-z0-9_]+$')
+
+
+def apply_pragmas(connection, pragmas):
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            # PRAGMA values cannot be bound as parameters
+            if not _PRAGMA_VALUE.match(str(name)) or not _PRAGMA_VALUE.match(str(value)):
+                raise ValueError(f'Invalid SQLite pragma: {name} = {value!r}')
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite':
+        apply_pragmas(connection, getattr(settings, 'SQLITE_PRAGMAS', {}))
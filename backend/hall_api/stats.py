@@ -0,0 +1,105 @@
+"""
+Maintenance of the DailyBookingStats rollup that the dashboard reads.
+
+The rollup is updated in the same transaction as the booking writes, so the
+two commit or roll back together. Only writes announced through
+send_booking_changes() are counted, as the API and the admin do:
+QuerySet.update(), raw SQL and bulk_create() elsewhere (e.g. seeding
+commands) bypass it, so run rebuild_booking_stats after them.
+"""
+from collections import Counter, defaultdict
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Booking, DailyBookingStats
+from .signals import booking_written
+
+# Booking status -> DailyBookingStats counter column
+STATUS_COLUMNS = {
+    'Pending': 'pending',
+    'Approved': 'approved',
+    'Rejected': 'rejected',
+    'Cancelled': 'cancelled',
+}
+
+KEY_FIELDS = ('office_id', 'hall_id', 'session_id', 'slot_date')
+
+
+def _contribution(booking):
+    """
+    The rollup row and counter a booking is counted under, if any.
+    """
+    if booking is None or booking.is_deleted or booking.status not in STATUS_COLUMNS:
+        return None
+    key = tuple(getattr(booking, field) for field in KEY_FIELDS)
+    return key, STATUS_COLUMNS[booking.status]
+
+
+@receiver(booking_written)
+def update_daily_stats(sender, changes, **kwargs):
+    """
+    Move each changed booking from its old counter to its new one.
+    """
+    deltas = Counter()
+    for previous, current in changes:
+        before, after = _contribution(previous), _contribution(current)
+        if before == after:
+            continue
+        if before:
+            deltas[before] -= 1
+        if after:
+            deltas[after] += 1
+
+    rows = {}
+    for (key, column), delta in deltas.items():
+        if delta:
+            rows.setdefault(key, {})[column] = delta
+    if not rows:
+        return
+
+    # Rows that share the same change (e.g. +4 pending after a bulk booking)
+    # are updated together
+    by_change = defaultdict(list)
+    for key, columns in rows.items():
+        by_change[tuple(sorted(columns.items()))].append(key)
+
+    with transaction.atomic():
+        DailyBookingStats.objects.bulk_create(
+            [DailyBookingStats(**dict(zip(KEY_FIELDS, key))) for key in rows],
+            ignore_conflicts=True
+        )
+        for change, keys in by_change.items():
+            for i in range(0, len(keys), 200):
+                match = reduce(or_, (Q(**dict(zip(KEY_FIELDS, key))) for key in keys[i:i + 200]))
+                DailyBookingStats.objects.filter(match).update(
+                    updated_at=timezone.now(),
+                    **{column: F(column) + delta for column, delta in change}
+                )
+
+
+def rebuild_daily_stats():
+    """
+    Recompute the whole rollup from Booking with one grouped query.
+    Returns the number of rollup rows written.
+    """
+    grouped = (
+        Booking.objects.filter(is_deleted=False)
+        .values('office_id', 'hall_id', 'session_id', 'slot_date')
+        .annotate(**{
+            column: Count('id', filter=Q(status=status))
+            for status, column in STATUS_COLUMNS.items()
+        })
+        .order_by()
+    )
+    with transaction.atomic():
+        DailyBookingStats.objects.all().delete()
+        rows = DailyBookingStats.objects.bulk_create(
+            (DailyBookingStats(**row) for row in grouped.iterator()),
+            batch_size=1000
+        )
+    return len(rows)
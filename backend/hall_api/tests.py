@@ -1,3 +1,894 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import date, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core import mail
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import availability, master_cache, occupancy, outbox, pubsub, slot_master
+from .exceptions import QueryBudgetExceeded
+from .models import (
+    AdminUser, BlockedDate, Booking, DailyBookingStats, EmailOTP, EmailOutbox, HallMaster, OfficeMaster,
+    SessionMaster, SlotMaster,
+)
+from .slots import local_now
+from .utils import queue_email
+
+
+def next_weekday(days_ahead):
+    slot_date = local_now().date() + timedelta(days=days_ahead)
+    while slot_date.weekday() == 6:
+        slot_date += timedelta(days=1)
+    return slot_date
+
+
+class BookingTestCase(TestCase):
+    """
+    An office with one hall, a session type and an admin, with every cache
+    emptied so no test sees rows cached by another.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.office = OfficeMaster.objects.create(
+            office_code='T-O1', office_name='Test Office', office_tag='T', office_street='1 Main Road',
+            office_area='Area', office_city='Chennai', office_state='TN', office_country='India',
+            office_pin_code='600001',
+        )
+        cls.hall = HallMaster.objects.create(office=cls.office, hall_code='T-H1', hall_name='Hall 1', capacity=10)
+        cls.session = SessionMaster.objects.create(session_code='T-S1', session_type='Meeting')
+        cls.admin = AdminUser.objects.create_user(
+            username='admin', password='password', admin_code='T-A1', role=AdminUser.Roles.ADMIN,
+        )
+        cls.slot_date = next_weekday(7)
+
+    def setUp(self):
+        for cache in (availability.cache, master_cache.cache, occupancy.cache):
+            cache.local.clear()
+        caches['default'].clear()
+        self.client = APIClient()
+
+    def booking_data(self, **fields):
+        return {
+            'hall': self.hall.id,
+            'office': self.office.id,
+            'session': self.session.id,
+            'slot_date': str(self.slot_date),
+            'slot_time': '3:00 PM - 3:30 PM',
+            'emp_code': 'E1',
+            'emp_name': 'Employee',
+            'emp_email_id': 'employee@example.com',
+            'emp_mobile_no': '9000000000',
+            'team_name': 'Team',
+            **fields,
+        }
+
+    def book(self, **fields):
+        response = self.client.post('/api/bookings/', self.booking_data(**fields), format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()['id']
+
+
+class BookingWriteTests(BookingTestCase):
+    def test_approving_a_taken_slot_is_a_conflict(self):
+        first = self.book()
+        second = self.book(emp_code='E2')
+        self.client.force_authenticate(self.admin)
+
+        self.assertEqual(self.client.post(f'/api/bookings/{first}/approve/').status_code, 200)
+        response = self.client.post(f'/api/bookings/{second}/approve/')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['conflicting_booking_id'], first)
+        self.assertEqual(Booking.objects.get(pk=second).status, 'Pending')
+
+    def test_overlapping_slot_labels_are_rejected(self):
+        for slot_time in ('3:00 PM - 5:00 PM', '3:15 PM - 3:45 PM'):
+            response = self.client.post('/api/bookings/', self.booking_data(slot_time=slot_time), format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('slot_time', response.json())
+
+    def test_bulk_creates_every_date_and_slot(self):
+        data = self.booking_data(
+            start_date=str(self.slot_date), end_date=str(self.slot_date + timedelta(days=2)),
+            slot_times=['3:00 PM - 3:30 PM', '15:30 - 16:00'],
+        )
+        response = self.client.post('/api/bookings/bulk/', data, format='json')
+
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(len(response.json()), 6)
+        self.assertEqual(
+            set(Booking.objects.values_list('slot_date', 'slot_time')),
+            {
+                (self.slot_date + timedelta(days=day), slot_time)
+                for day in range(3) for slot_time in ('3:00 PM - 3:30 PM', '3:30 PM - 4:00 PM')
+            },
+        )
+
+    def test_bulk_creates_nothing_when_a_slot_is_taken(self):
+        taken = self.book(slot_date=str(self.slot_date + timedelta(days=1)))
+        Booking.objects.filter(pk=taken).update(status='Approved', approved=True)
+        data = self.booking_data(
+            start_date=str(self.slot_date), end_date=str(self.slot_date + timedelta(days=2)),
+            slot_times=['3:00 PM - 3:30 PM'],
+        )
+        response = self.client.post('/api/bookings/bulk/', data, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.json()['errors']), 1)
+        self.assertEqual(Booking.objects.count(), 1)
+
+
+class KeysetPaginationTests(BookingTestCase):
+    SLOTS = ('3:00 PM - 3:30 PM', '3:30 PM - 4:00 PM', '4:00 PM - 4:30 PM', '4:30 PM - 5:00 PM', '5:00 PM - 5:30 PM')
+
+    def walk(self, url, params):
+        ids, response = [], self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200, response.content)
+            ids.extend(row['id'] for row in response.json()['results'])
+            if not response.json()['next']:
+                return ids
+            response = self.client.get(response.json()['next'])
+
+    def test_pages_walk_every_row_in_order(self):
+        # Booked latest first, so id order differs from slot order
+        ids = [self.book(slot_time=slot_time) for slot_time in reversed(self.SLOTS)][::-1]
+
+        self.assertEqual(self.walk('/api/bookings/', {'page_size': 2}), ids)
+
+    def test_rows_added_behind_the_cursor_do_not_shift_pages(self):
+        for slot_time in self.SLOTS[2:]:
+            self.book(slot_time=slot_time)
+        first = self.client.get('/api/bookings/', {'page_size': 2}).json()
+        self.book(slot_time=self.SLOTS[0])
+
+        rest = self.client.get(first['next']).json()['results']
+
+        self.assertEqual([row['slot_time'] for row in rest], [self.SLOTS[4]])
+
+    def test_unpaginated_requests_get_a_plain_list(self):
+        self.book()
+
+        self.assertEqual(len(self.client.get('/api/bookings/').json()), 1)
+
+    def test_malformed_cursors_are_not_found(self):
+        for cursor in ('bad', 'WzFd', 'WyJiYWQiLCAxLCAxXQ=='):
+            response = self.client.get('/api/bookings/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(response.json(), {'detail': 'Invalid cursor'})
+
+    def test_pages_values_querysets(self):
+        ids = [self.book(slot_time=slot_time) for slot_time in self.SLOTS]
+        self.client.force_authenticate(self.admin)
+
+        self.assertEqual(self.walk('/api/pending-approvals/', {'page_size': 3}), ids)
+
+
+class ConditionalGetTests(BookingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.admin)
+
+    def etag(self):
+        response = self.client.get('/api/halls/')
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.etag()
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/halls/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+        self.assertIn('max-age', response['Cache-Control'])
+
+    def test_etag_changes_with_the_data(self):
+        etag = self.etag()
+        HallMaster.objects.create(office=self.office, hall_code='T-H2', hall_name='Hall 2', capacity=5)
+        self.assertNotEqual(self.etag(), etag)
+
+        etag = self.etag()
+        AdminUser.objects.filter(pk=self.admin.pk).update(last_login=local_now())
+        self.assertNotEqual(self.etag(), etag)
+
+    def test_etag_differs_by_url(self):
+        etag = self.etag()
+        response = self.client.get('/api/halls/', {'search': 'Hall'}, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_hall_categories_are_conditional(self):
+        etag = self.client.get('/api/hall-categories/')['ETag']
+        response = self.client.get('/api/hall-categories/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertIn('public', response['Cache-Control'])
+
+
+class NextFreeSlotsTests(BookingTestCase):
+    def setUp(self):
+        super().setUp()
+        HallMaster.objects.filter(pk=self.hall.id).update(opening_time=time(9), closing_time=time(10))
+
+    def next_free(self, **params):
+        return self.client.get(f'/api/halls/{self.hall.id}/next-free/', {'from': str(self.slot_date), **params})
+
+    def day_after(self, slot_date):
+        slot_date += timedelta(days=1)
+        return slot_date + timedelta(days=1) if slot_date.weekday() == 6 else slot_date
+
+    def test_skips_held_slots(self):
+        self.book(slot_time='9:00 AM - 9:30 AM')
+
+        self.assertEqual(self.next_free(count=2).json(), [
+            {'date': str(self.slot_date), 'time': '9:30 AM - 10:00 AM'},
+            {'date': str(self.day_after(self.slot_date)), 'time': '9:00 AM - 9:30 AM'},
+        ])
+
+    def test_skips_blocked_dates_and_sundays(self):
+        BlockedDate.objects.create(office=self.office, blocked_date=self.slot_date)
+        dates = {slot['date'] for slot in self.next_free(count=10).json()}
+
+        self.assertNotIn(str(self.slot_date), dates)
+        self.assertIn(str(self.day_after(self.slot_date)), dates)
+        self.assertFalse(any(date.fromisoformat(slot_date).weekday() == 6 for slot_date in dates))
+
+    def test_frozen_halls_have_no_free_slots(self):
+        HallMaster.objects.filter(pk=self.hall.id).update(is_freeze=True)
+
+        self.assertEqual(self.next_free().json(), [])
+
+    def test_rejects_malformed_parameters(self):
+        for params in ({'count': 'abc'}, {'count': 0}, {'from': 'bad'}):
+            self.assertEqual(self.next_free(**params).status_code, 400)
+
+
+class DailyBookingStatsTests(BookingTestCase):
+    def counts(self):
+        return DailyBookingStats.objects.aggregate(
+            pending=Sum('pending'), approved=Sum('approved'), rejected=Sum('rejected'), cancelled=Sum('cancelled'),
+        )
+
+    def test_rollup_follows_booking_changes(self):
+        approved = self.book()
+        cancelled = self.book(slot_time='4:00 PM - 4:30 PM')
+        deleted = self.book(slot_time='4:30 PM - 5:00 PM')
+        self.book(slot_time='5:00 PM - 5:30 PM')
+        self.client.force_authenticate(self.admin)
+        self.client.post(f'/api/bookings/{approved}/approve/')
+        self.client.post(f'/api/bookings/{cancelled}/cancel/')
+        self.client.delete(f'/api/bookings/{deleted}/')
+
+        self.assertEqual(self.counts(), {'pending': 1, 'approved': 1, 'rejected': 0, 'cancelled': 1})
+        self.assertEqual(
+            self.client.get('/api/booking-stats/').json(),
+            {'pending': 1, 'approved': 1, 'rejected': 1},
+        )
+
+    def test_failed_rollup_update_rolls_the_booking_back(self):
+        with mock.patch.object(DailyBookingStats.objects, 'bulk_create', side_effect=RuntimeError('rollup down')):
+            with self.assertRaises(RuntimeError):
+                self.client.post('/api/bookings/', self.booking_data(), format='json')
+
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(DailyBookingStats.objects.exists())
+
+
+class MasterCacheTests(BookingTestCase):
+    def test_saving_a_row_invalidates_it(self):
+        self.assertEqual(master_cache.get_master(HallMaster, self.hall.id).hall_name, 'Hall 1')
+        hall = HallMaster.objects.get(pk=self.hall.id)
+        hall.hall_name = 'Renamed'
+        hall.save()
+
+        self.assertEqual(master_cache.get_master(HallMaster, self.hall.id).hall_name, 'Renamed')
+
+    def test_callers_get_their_own_copy(self):
+        hall = master_cache.get_master(HallMaster, self.hall.id)
+        hall.hall_name = 'Changed in memory'
+
+        self.assertEqual(master_cache.get_master(HallMaster, self.hall.id).hall_name, 'Hall 1')
+        self.assertIsNot(master_cache.get_master(HallMaster, self.hall.id), hall)
+
+    def test_finds_rows_by_code(self):
+        self.assertEqual(master_cache.get_master_by_code(HallMaster, 'T-H1').pk, self.hall.id)
+        self.hall.hall_code = 'T-H9'
+        self.hall.save()
+        other = HallMaster.objects.create(office=self.office, hall_code='T-H1', hall_name='Hall 2', capacity=5)
+
+        self.assertEqual(master_cache.get_master_by_code(HallMaster, 'T-H1').pk, other.id)
+        with self.assertRaises(HallMaster.DoesNotExist):
+            master_cache.get_master_by_code(HallMaster, 'T-H404')
+
+    def test_deleted_rows_are_not_served(self):
+        session = SessionMaster.objects.create(session_code='T-S2', session_type='Training')
+        master_cache.get_master(SessionMaster, session.id)
+        session.delete()
+
+        with self.assertRaises(SessionMaster.DoesNotExist):
+            master_cache.get_master(SessionMaster, session.id)
+
+
+class SlotMasterTests(BookingTestCase):
+    def statuses(self):
+        return dict(SlotMaster.objects.filter(slot_date=self.slot_date).values_list('slot_time', 'slot_status'))
+
+    def test_generates_every_slot_of_the_day(self):
+        created = slot_master.generate_slots(self.slot_date, 1)
+
+        self.assertEqual(created, SlotMaster.objects.count())
+        self.assertEqual(set(self.statuses().values()), {'Available'})
+        self.assertIn('3:00 PM - 3:30 PM', self.statuses())
+        self.assertEqual(slot_master.generate_slots(self.slot_date, 1), 0)
+
+    def test_generation_marks_held_slots_booked(self):
+        self.book()
+        slot_master.generate_slots(self.slot_date, 1)
+
+        self.assertEqual(self.statuses()['3:00 PM - 3:30 PM'], 'Booked')
+        self.assertEqual(self.statuses()['3:30 PM - 4:00 PM'], 'Available')
+
+    def test_slot_status_follows_booking_changes(self):
+        slot_master.generate_slots(self.slot_date, 1)
+        booking = self.book()
+        self.assertEqual(self.statuses()['3:00 PM - 3:30 PM'], 'Booked')
+
+        self.client.force_authenticate(self.admin)
+        self.client.post(f'/api/bookings/{booking}/cancel/')
+
+        self.assertEqual(self.statuses()['3:00 PM - 3:30 PM'], 'Available')
+
+    def test_failed_slot_sync_rolls_the_booking_back(self):
+        slot_master.generate_slots(self.slot_date, 1)
+        with mock.patch.object(slot_master, 'set_slot_status', side_effect=RuntimeError('sync down')):
+            with self.assertRaises(RuntimeError):
+                self.client.post('/api/bookings/', self.booking_data(), format='json')
+
+        self.assertFalse(Booking.objects.exists())
+        self.assertEqual(set(self.statuses().values()), {'Available'})
+
+
+class EmailOutboxTests(BookingTestCase):
+    def queue(self, **fields):
+        return queue_email('Subject', 'Message', 'noreply@example.com', ['employee@example.com'], **fields)
+
+    def test_approval_queues_the_email_instead_of_sending_it(self):
+        booking = self.book()
+        self.client.force_authenticate(self.admin)
+        self.client.post(f'/api/bookings/{booking}/approve/')
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(outbox.send_batch(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(EmailOutbox.objects.get().status, 'Sent')
+
+    def test_failures_back_off_then_dead_letter(self):
+        email = self.queue()
+        with mock.patch('django.core.mail.EmailMessage.send', side_effect=OSError('SMTP down')):
+            self.assertEqual(outbox.send_batch(), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts, email.last_error), ('Pending', 1, 'SMTP down'))
+            self.assertGreater(email.next_attempt_at, timezone.now())
+            # Not due again until the backoff has passed
+            self.assertEqual(outbox.send_batch(), (0, 0))
+
+            for _ in range(2, outbox.MAX_ATTEMPTS + 1):
+                EmailOutbox.objects.update(next_attempt_at=timezone.now())
+                outbox.send_batch()
+        email.refresh_from_db()
+
+        self.assertEqual((email.status, email.attempts), ('Dead', outbox.MAX_ATTEMPTS))
+        self.assertEqual(outbox.send_batch(), (0, 0))
+
+    def test_a_failed_connection_counts_against_the_batch(self):
+        self.queue()
+        self.queue()
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.open', side_effect=OSError('refused')):
+            self.assertEqual(outbox.send_batch(), (0, 2))
+
+        self.assertEqual(set(EmailOutbox.objects.values_list('attempts', flat=True)), {1})
+
+    def test_expiring_emails_are_cleared_once_sent_and_skipped_once_expired(self):
+        sent = self.queue(expires_at=timezone.now() + timedelta(minutes=5))
+        expired = self.queue(expires_at=timezone.now() - timedelta(minutes=1))
+
+        self.assertEqual(outbox.send_batch(), (1, 0))
+        sent.refresh_from_db()
+        expired.refresh_from_db()
+        self.assertEqual((sent.status, sent.message), ('Sent', ''))
+        self.assertEqual(expired.status, 'Pending')
+
+    def test_retry_delay_doubles_up_to_the_cap(self):
+        self.assertEqual(outbox.retry_delay(1), timedelta(seconds=outbox.BACKOFF_SECONDS))
+        self.assertEqual(outbox.retry_delay(2), timedelta(seconds=outbox.BACKOFF_SECONDS * 2))
+        self.assertEqual(outbox.retry_delay(50), timedelta(seconds=outbox.MAX_BACKOFF_SECONDS))
+
+
+@override_settings(OTP_MAX_ATTEMPTS=3)
+class OTPTests(BookingTestCase):
+    email = 'employee@gmail.com'
+
+    def send(self, otp='123456', **extra):
+        with mock.patch('hall_api.views.generate_otp', return_value=otp):
+            return self.client.post('/api/send-otp/', {'email': self.email}, format='json', **extra)
+
+    def verify(self, otp):
+        return self.client.post('/api/verify-otp/', {'email': self.email, 'otp': otp}, format='json')
+
+    def test_only_a_hash_of_the_code_is_stored(self):
+        self.assertEqual(self.send().status_code, 200)
+
+        email_otp = EmailOTP.objects.get(email=self.email)
+        self.assertNotIn('123456', email_otp.otp_hash)
+        self.assertIn('123456', EmailOutbox.objects.get().message)
+        self.assertEqual(self.verify('123456').json(), {'message': 'OTP verified successfully'})
+        self.assertFalse(EmailOTP.objects.exists())
+
+    def test_a_new_code_replaces_the_pending_one(self):
+        self.send('111111')
+        self.send('222222')
+
+        self.assertEqual(self.verify('111111').json(), {'error': 'Invalid OTP'})
+        self.assertEqual(self.verify('222222').status_code, 200)
+
+    def test_code_is_revoked_after_too_many_wrong_attempts(self):
+        self.send()
+        self.assertEqual(self.verify('000000').json(), {'error': 'Invalid OTP'})
+        self.assertEqual(self.verify('000000').json(), {'error': 'Invalid OTP'})
+        self.assertEqual(
+            self.verify('000000').json(), {'error': 'Too many incorrect attempts. Please request a new OTP'}
+        )
+
+        self.assertEqual(self.verify('123456').json(), {'error': 'Invalid OTP'})
+
+    def test_expired_codes_are_refused(self):
+        self.send()
+        EmailOTP.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(self.verify('123456').json(), {'error': 'OTP expired'})
+        self.assertFalse(EmailOTP.objects.exists())
+
+    def test_sends_are_throttled_per_address_across_ips(self):
+        for ip in range(5):
+            self.assertEqual(self.send(REMOTE_ADDR=f'10.0.0.{ip}').status_code, 200)
+
+        self.assertEqual(self.send(REMOTE_ADDR='10.0.0.9').status_code, 429)
+
+
+class LiveSlotTests(BookingTestCase):
+    async def events(self, url, count):
+        response = await self.async_client.get(url, {'date': str(self.slot_date)})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+        events = []
+        try:
+            for _ in range(count):
+                event, data = (await asyncio.wait_for(anext(stream), 5)).decode().split('\n')[:2]
+                events.append((event.removeprefix('event: '), json.loads(data.removeprefix('data: '))))
+        finally:
+            await stream.aclose()
+        return events
+
+    def book_and_commit(self, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.book(**fields)
+
+    async def test_hall_stream_starts_with_a_snapshot(self):
+        await sync_to_async(self.book_and_commit)()
+
+        [(event, data)] = await self.events(f'/api/halls/{self.hall.id}/live/', 1)
+
+        self.assertEqual(event, 'snapshot')
+        self.assertEqual(data[0]['hall_id'], self.hall.id)
+        self.assertEqual(data[0]['slot_date'], str(self.slot_date))
+        self.assertTrue(data[0]['slots'])
+
+    async def test_booking_changes_are_streamed(self):
+        response = await self.async_client.get(f'/api/offices/{self.office.id}/live/', {'date': str(self.slot_date)})
+        stream = aiter(response.streaming_content)
+        try:
+            await anext(stream)
+            await anext(stream)
+            await sync_to_async(self.book_and_commit)()
+            chunk = (await asyncio.wait_for(anext(stream), 5)).decode()
+        finally:
+            await stream.aclose()
+
+        self.assertTrue(chunk.startswith('event: slots\n'))
+        data = json.loads(chunk.split('\n')[1].removeprefix('data: '))
+        self.assertEqual(data['hall_id'], self.hall.id)
+        self.assertEqual(data['slots'], [{'slot_time': '3:00 PM - 3:30 PM', 'status': 'Pending'}])
+
+    async def test_rejects_unknown_halls_and_bad_dates(self):
+        response = await self.async_client.get('/api/halls/404/live/', {'date': str(self.slot_date)})
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.get(f'/api/halls/{self.hall.id}/live/', {'date': 'bad'})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_slow_subscribers_are_marked_overflowed(self):
+        broker = pubsub.InProcessBroker(maxsize=2)
+        subscription = broker.subscribe(['channel'])
+        for number in range(3):
+            broker.publish('channel', number)
+        await asyncio.sleep(0)
+
+        self.assertTrue(subscription.overflowed)
+        self.assertEqual(await subscription.get(), ('channel', 2))
+        subscription.close()
+        self.assertEqual(broker._subscribers, {})
+
+
+class OccupancyTests(BookingTestCase):
+    def setUp(self):
+        super().setUp()
+        now = local_now().replace(
+            year=self.slot_date.year, month=self.slot_date.month, day=self.slot_date.day, hour=15, minute=10,
+        )
+        patcher = mock.patch.object(occupancy, 'local_now', return_value=now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.force_authenticate(self.admin)
+
+    def approve(self, booking):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post(f'/api/bookings/{booking}/approve/').status_code, 200)
+
+    def test_lists_the_current_and_next_occupants(self):
+        self.approve(self.book(team_name='Now'))
+        self.approve(self.book(slot_time='3:30 PM - 4:00 PM', team_name='Next'))
+        self.book(slot_time='3:30 PM - 4:00 PM', emp_code='E2', team_name='Pending')
+
+        snapshot = self.client.get('/api/occupancy/').json()
+
+        self.assertEqual(snapshot['slot_time'], '3:00 PM - 3:30 PM')
+        self.assertEqual([row['team_name'] for row in snapshot['current']], ['Now'])
+        self.assertEqual(snapshot['next']['slot_time'], '3:30 PM - 4:00 PM')
+        self.assertEqual([row['team_name'] for row in snapshot['next']['occupants']], ['Next'])
+        self.assertEqual(
+            [row['team_name'] for row in self.client.get('/api/current-working-halls/').json()], ['Now'],
+        )
+
+    def test_snapshots_are_cached_until_an_approval_changes_them(self):
+        self.assertEqual(occupancy.get_occupancy(self.office.id)['current'], [])
+        with self.assertNumQueries(0):
+            occupancy.get_occupancy(self.office.id)
+
+        self.approve(self.book())
+
+        self.assertEqual(len(occupancy.get_occupancy(self.office.id)['current']), 1)
+        self.assertEqual(len(occupancy.get_occupancy()['current']), 1)
+
+    def test_filters_by_office(self):
+        self.approve(self.book())
+
+        self.assertEqual(self.client.get('/api/occupancy/', {'office': self.office.id + 1}).json()['current'], [])
+        response = self.client.get('/api/occupancy/', {'office': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'office must be an integer'})
+
+
+class BookingExportTests(BookingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ids = [
+            self.book(slot_time=slot_time, emp_code=f'E{number}')
+            for number, slot_time in enumerate(('4:00 PM - 4:30 PM', '3:00 PM - 3:30 PM', '3:30 PM - 4:00 PM'))
+        ]
+
+    async def export(self, **params):
+        response = await self.async_client.get('/api/bookings/export/', params)
+        self.assertEqual(response.status_code, 200)
+        chunks = [chunk async for chunk in response.streaming_content]
+        return response, chunks, b''.join(chunks).decode()
+
+    async def test_exports_csv_in_slot_order(self):
+        response, _, content = await self.export()
+
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="bookings-', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual([int(row['id']) for row in rows], [self.ids[1], self.ids[2], self.ids[0]])
+        self.assertEqual(rows[0]['hall_name'], 'Hall 1')
+        self.assertEqual(rows[0]['slot_time'], '3:00 PM - 3:30 PM')
+
+    async def test_exports_ndjson_matching_the_filters(self):
+        _, _, content = await self.export(format='ndjson', emp_code='E1')
+
+        [row] = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual((row['id'], row['office_name'], row['status']), (self.ids[1], 'Test Office', 'Pending'))
+
+    @override_settings(BOOKING_EXPORT_BUFFER_BYTES=1, BOOKING_EXPORT_CHUNK_SIZE=2)
+    async def test_streams_in_pieces(self):
+        _, chunks, content = await self.export(format='ndjson')
+
+        self.assertEqual(len(content.splitlines()), 3)
+        self.assertGreaterEqual(len(chunks), 3)
+
+    async def test_rejects_bad_parameters(self):
+        response = await self.async_client.get('/api/bookings/export/', {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'format must be one of: csv, ndjson'})
+
+        response = await self.async_client.get('/api/bookings/export/', {'slot_date': 'bad'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('slot_date', response.json())
+
+
+class ImportMasterDataTests(BookingTestCase):
+    def run_import(self, kind, content, extension='csv', *args):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, f'{kind}.{extension}')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('import_master_data', kind, path, *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_dry_run_reports_the_changes_without_writing(self):
+        stdout, _ = self.run_import(
+            'halls', 'Hall Code,Hall Name,Capacity,Office Code\nT-H1,Hall 1,20,T-O1\nT-H2,Hall 2,5,T-O1\n',
+            'csv', '--dry-run',
+        )
+
+        self.assertIn('+ row 3 T-H2', stdout)
+        self.assertIn("~ row 2 T-H1: capacity: 10 -> 20", stdout)
+        self.assertIn('1 to create, 1 to update, 0 unchanged, 0 invalid', stdout)
+        self.assertEqual(HallMaster.objects.get(hall_code='T-H1').capacity, 10)
+        self.assertFalse(HallMaster.objects.filter(hall_code='T-H2').exists())
+
+    def test_creates_and_updates_by_code(self):
+        master_cache.get_master(HallMaster, self.hall.id)
+        self.run_import(
+            'halls', 'hall_code,hall_name,capacity,office,day_spoc\nT-H1,Main Hall,10,T-O1,\nT-H2,Hall 2,4,T-O1,T-A1\n',
+        )
+
+        self.assertEqual(master_cache.get_master(HallMaster, self.hall.id).hall_name, 'Main Hall')
+        created = HallMaster.objects.get(hall_code='T-H2')
+        self.assertEqual((created.office_id, created.day_spoc_id, created.capacity), (self.office.id, 'T-A1', 4))
+
+    def test_partial_files_leave_other_columns_alone(self):
+        self.run_import('halls', 'hall_code,category\nT-H1,CABIN\n')
+
+        hall = HallMaster.objects.get(pk=self.hall.id)
+        self.assertEqual((hall.category, hall.hall_name, hall.capacity), ('CABIN', 'Hall 1', 10))
+
+    def test_invalid_rows_write_nothing_unless_skipped(self):
+        content = 'hall_code,hall_name,capacity,office_code\nT-H2,Hall 2,5,T-O1\nT-H3,Hall 3,5,T-O404\n'
+        with self.assertRaises(CommandError):
+            self.run_import('halls', content)
+        self.assertFalse(HallMaster.objects.filter(hall_code='T-H2').exists())
+
+        _, stderr = self.run_import('halls', content, 'csv', '--skip-invalid')
+
+        self.assertIn("row 3 T-H3: office: No OfficeMaster with office_code 'T-O404'", stderr)
+        self.assertEqual(
+            list(HallMaster.objects.order_by('hall_code').values_list('hall_code', flat=True)), ['T-H1', 'T-H2'],
+        )
+
+    def test_imports_json(self):
+        self.run_import(
+            'sessions',
+            json.dumps([{'session_code': 'T-S1', 'session_type': 'Training', 'preferred_hall_1': 'T-H1'}]),
+            'json',
+        )
+
+        session = SessionMaster.objects.get(pk=self.session.id)
+        self.assertEqual((session.session_type, session.preferred_hall_1_id), ('Training', self.hall.id))
+
+    def test_unknown_columns_are_refused(self):
+        with self.assertRaisesMessage(CommandError, "Unknown column 'colour' for HallMaster"):
+            self.run_import('halls', 'hall_code,colour\nT-H1,red\n')
+
+
+class HallSearchTests(BookingTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.room = HallMaster.objects.create(
+            office=cls.office, hall_code='T-H2', hall_name='Room 2', capacity=30, category='ROOM', wifi=True,
+            opening_time=time(9), closing_time=time(18),
+        )
+
+    def search(self, **params):
+        params = {'date': str(self.slot_date), 'start_time': '3:00 PM', 'end_time': '4:00 PM', **params}
+        response = self.client.get('/api/halls/search/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [hall['hall_code'] for hall in response.json()]
+
+    def test_halls_held_in_the_window_are_left_out(self):
+        self.assertEqual(self.search(), ['T-H1', 'T-H2'])
+        cancelled = self.book(slot_time='3:30 PM - 4:00 PM', hall=self.room.id)
+        self.client.force_authenticate(self.admin)
+        self.client.post(f'/api/bookings/{cancelled}/cancel/')
+        self.book(slot_time='3:30 PM - 4:00 PM')
+
+        self.assertEqual(self.search(), ['T-H2'])
+        self.assertEqual(self.search(start_time='4:00 PM', end_time='5:00 PM'), ['T-H1', 'T-H2'])
+
+    def test_every_date_of_the_range_must_be_free(self):
+        end_date = self.slot_date + timedelta(days=3)
+        BlockedDate.objects.create(office=self.office, hall=self.room, blocked_date=end_date)
+        self.book(slot_date=str(self.slot_date + timedelta(days=1)))
+
+        self.assertEqual(self.search(date='', start_date=str(self.slot_date), end_date=str(end_date)), [])
+        self.assertEqual(self.search(), ['T-H1', 'T-H2'])
+
+        BlockedDate.objects.create(office=self.office, blocked_date=self.slot_date)
+        self.assertEqual(self.search(), [])
+
+    def test_filters_on_hall_columns(self):
+        self.assertEqual(self.search(min_capacity=20), ['T-H2'])
+        self.assertEqual(self.search(category='HALL,CABIN'), ['T-H1'])
+        self.assertEqual(self.search(amenities='wifi'), ['T-H2'])
+        self.assertEqual(self.search(office=self.office.id + 1), [])
+
+    def test_windows_outside_a_halls_hours_are_left_out(self):
+        self.assertEqual(self.search(start_time='7:00 PM', end_time='8:00 PM'), ['T-H1'])
+        self.assertEqual(self.search(start_time='11:00 PM', end_time='12:00 AM'), ['T-H1'])
+
+    def test_rejects_bad_parameters(self):
+        for params, error in (
+            ({'end_time': '2:00 PM'}, 'end_time must be after start_time'),
+            ({'min_capacity': 'many'}, 'min_capacity must be an integer'),
+            ({'category': 'ATTIC'}, 'Unknown category: ATTIC'),
+            ({'amenities': 'wifi,pool'}, 'Unknown amenities: pool'),
+            ({'date': '', 'start_date': '2026-01-01', 'end_date': '2026-03-01'}, 'Search at most 31 days at a time'),
+        ):
+            params = {'date': str(self.slot_date), 'start_time': '3:00 PM', 'end_time': '4:00 PM', **params}
+            response = self.client.get('/api/halls/search/', params)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'error': error})
+
+
+class BookingBySessionTests(BookingTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.second = HallMaster.objects.create(office=cls.office, hall_code='T-H2', hall_name='Hall 2', capacity=10)
+        cls.third = HallMaster.objects.create(
+            office=cls.office, hall_code='T-H3', hall_name='Hall 3', capacity=10,
+            opening_time=time(9), closing_time=time(15),
+        )
+
+    def prefer(self, *halls):
+        fields = dict(zip(('preferred_hall_1', 'preferred_hall_2', 'preferred_hall_3'), halls))
+        SessionMaster.objects.filter(pk=self.session.id).update(**fields)
+
+    def by_session(self, days=2, **fields):
+        data = self.booking_data(
+            start_date=str(self.slot_date), end_date=str(self.slot_date + timedelta(days=days - 1)),
+            slot_times=['3:00 PM - 3:30 PM'], **fields,
+        )
+        del data['hall'], data['office']
+        return self.client.post('/api/bookings/by-session/', data, format='json')
+
+    def test_books_the_first_free_preference(self):
+        self.prefer(self.hall, self.second, self.third)
+        self.book(slot_date=str(self.slot_date + timedelta(days=1)))
+
+        response = self.by_session()
+
+        self.assertEqual(response.status_code, 201, response.content)
+        body = response.json()
+        self.assertEqual((body['hall'], body['hall_code'], body['preference']), (self.second.id, 'T-H2', 2))
+        self.assertEqual(body['skipped'], [{
+            'preference': 1, 'hall': self.hall.id, 'hall_code': 'T-H1',
+            'reasons': [f'3:00 PM - 3:30 PM on {self.slot_date + timedelta(days=1)} is held by a Pending booking'],
+        }])
+        self.assertEqual(len(body['bookings']), 2)
+        self.assertEqual(
+            set(Booking.objects.filter(hall=self.second).values_list('office_id', 'status')),
+            {(self.office.id, 'Pending')},
+        )
+        self.assertEqual(DailyBookingStats.objects.filter(hall=self.second).aggregate(Sum('pending')), {
+            'pending__sum': 2,
+        })
+
+    def test_explains_why_every_preference_was_skipped(self):
+        self.prefer(self.hall, self.second, self.third)
+        HallMaster.objects.filter(pk=self.hall.id).update(is_freeze=True)
+        BlockedDate.objects.create(office=self.office, hall=self.second, blocked_date=self.slot_date)
+
+        response = self.by_session()
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual([entry['reasons'] for entry in response.json()['skipped']], [
+            ['The hall is frozen'],
+            [f'The hall is blocked on {self.slot_date}'],
+            ["3:00 PM - 3:30 PM is outside the hall's hours (9:00 AM - 3:00 PM)"],
+        ])
+        self.assertFalse(Booking.objects.exists())
+
+    def test_unset_preferences_are_skipped(self):
+        self.prefer(None, self.second)
+
+        response = self.by_session(days=1)
+
+        self.assertEqual(response.json()['preference'], 2)
+        self.assertEqual(response.json()['skipped'][0]['reasons'], ['No hall is set for this preference'])
+
+    def test_deleted_sessions_are_refused(self):
+        SessionMaster.objects.filter(pk=self.session.id).update(is_deleted=True)
+
+        response = self.by_session()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'session': ['This session type has been deleted.']})
+
+
+class QueryBudgetTests(BookingTestCase):
+    @override_settings(QUERY_BUDGET_STRICT=True, QUERY_BUDGET_DEFAULT=1)
+    def test_strict_mode_fails_requests_over_budget(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.post('/api/bookings/', self.booking_data(), format='json')
+
+    @override_settings(QUERY_BUDGET_STRICT=True, QUERY_BUDGET_DEFAULT=1)
+    def test_strict_mode_passes_requests_within_budget(self):
+        self.assertEqual(self.client.get('/api/bookings/').status_code, 200)
+
+    @override_settings(QUERY_BUDGET_STRICT=True, QUERY_BUDGET_DEFAULT=1)
+    async def test_strict_mode_counts_async_requests(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            await self.async_client.get('/api/dashboard-stats/')
+
+    @override_settings(QUERY_BUDGET_HEADER=True)
+    async def test_async_requests_report_their_queries(self):
+        response = await self.async_client.get('/api/dashboard-stats/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(int(response['X-Query-Count']), 0)
+
+
+class AsyncDateValidationTests(BookingTestCase):
+    async def test_available_slots_rejects_a_malformed_date(self):
+        for date in ('bad', '2026-13-45'):
+            response = await self.async_client.get('/api/available-slots/', {'date': date})
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'error': 'date must be in YYYY-MM-DD format'})
+
+    async def test_available_slots_accepts_a_date(self):
+        response = await self.async_client.get('/api/available-slots/', {'date': str(self.slot_date)})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+
+    async def test_booked_slots_rejects_a_malformed_date(self):
+        response = await self.async_client.get(f'/api/halls/{self.hall.id}/booked_slots/', {'date': 'bad'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Date must be in YYYY-MM-DD format'})
+
+    async def test_dashboard_stats_rejects_malformed_filters(self):
+        for params, error in (
+            ({'slot_date': 'bad'}, 'slot_date must be in YYYY-MM-DD format'),
+            ({'slot_date': '2026-13-45'}, 'slot_date must be in YYYY-MM-DD format'),
+            ({'office_id': 'abc'}, 'office_id must be an integer'),
+            ({'session_id': 'abc'}, 'session_id must be an integer'),
+        ):
+            response = await self.async_client.get('/api/dashboard-stats/', params)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'error': error})
+
+    async def test_dashboard_stats_accepts_filters(self):
+        response = await self.async_client.get('/api/dashboard-stats/', {
+            'slot_date': str(self.slot_date), 'office_id': self.office.id, 'session_id': self.session.id,
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_halls'], 1)
@@ -0,0 +1,43 @@
+"""
+Rate limits for the OTP endpoints.
+
+DRF throttles keep a sliding window of request times in the cache. They
+are per process with the default locmem cache; point CACHES at Redis or
+Memcached so the limits hold across workers. Rates are set by the
+otp_* scopes in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'].
+"""
+import hashlib
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class OTPEmailThrottle(SimpleRateThrottle):
+    """
+    OTP emails per recipient address, so one inbox cannot be flooded from
+    many IPs.
+    """
+    scope = 'otp_email'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        ident = hashlib.sha256(email.strip().lower().encode('utf-8')).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class OTPSendIPThrottle(SimpleRateThrottle):
+    """
+    OTP emails requested per client IP.
+    """
+    scope = 'otp_send_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class OTPVerifyIPThrottle(OTPSendIPThrottle):
+    """
+    Verification attempts per client IP, on top of the per-code attempt limit.
+    """
+    scope = 'otp_verify_ip'
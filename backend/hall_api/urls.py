@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register('offices', views.OfficeMasterViewSet)
@@ -14,20 +14,28 @@ router.register('bookings', views.BookingViewSet)
 router.register('blocked-dates', views.BlockedDateViewSet)
 
 urlpatterns = [
+    # Async read endpoints; listed before the router so they take over its routes
+    path('halls/<int:pk>/booked_slots/', async_views.booked_slots, name='hall-booked-slots'),
+    path('halls/<int:pk>/live/', async_views.hall_live_slots, name='hall-live-slots'),
+    path('offices/<int:pk>/live/', async_views.office_live_slots, name='office-live-slots'),
+    path('halls/search/', async_views.search_halls, name='hall-search'),
+    path('halls/available/', async_views.available_halls, name='hallmaster-available'),
+    path('slots/available/', async_views.available_slots, name='slotmaster-available'),
+    path('available-halls/', async_views.available_halls, name='available-halls'),
+    path('available-slots/', async_views.available_slots, name='available-slots'),
+    path('dashboard-stats/', async_views.dashboard_stats, name='dashboard-stats'),
+    path('current-working-halls/', async_views.current_working_halls, name='current-working-halls'),
+    path('occupancy/', async_views.occupancy, name='occupancy'),
+    path('bookings/export/', async_views.booking_export, name='booking-export'),
     path('', include(router.urls)),
 path('booking-stats/', views.BookingViewSet.as_view({'get': 'stats'}), name='booking-stats'),
     # Additional custom endpoints
     path('halls/<int:pk>/bookings/', views.HallMasterViewSet.as_view({'get': 'bookings'}), name='hall-bookings'),
-    path('halls/<int:pk>/booked_slots/', views.HallMasterViewSet.as_view({'get': 'booked_slots'}), name='hall-booked-slots'),
-    path('available-halls/', views.HallMasterViewSet.as_view({'get': 'available'}), name='available-halls'),
-    path('available-slots/', views.SlotMasterViewSet.as_view({'get': 'available'}), name='available-slots'),
     path('employee-bookings/', views.BookingViewSet.as_view({'get': 'employee'}), name='employee-bookings'),
     path('upcoming-bookings/', views.BookingViewSet.as_view({'get': 'upcoming'}), name='upcoming-bookings'),
     # OTP endpoints
     path('send-otp/', views.send_otp, name='send-otp'),
     path('verify-otp/', views.verify_otp, name='verify-otp'),
-    path('dashboard-stats/', views.dashboard_stats, name='dashboard-stats'),
-    path('current-working-halls/', views.current_working_halls, name='current-working-halls'),
     path('pending-approvals/', views.pending_approvals, name='pending-approvals'),
     path('bookings-by-email/', views.BookingViewSet.as_view({'get': 'by_email'}), name='bookings-by-email'),
     path('hall-categories/', views.hall_categories, name='hall-categories'),
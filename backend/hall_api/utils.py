@@ -1,8 +1,9 @@
-import random
-import string
-from django.core.mail import send_mail
+import secrets
+from datetime import timedelta
 from django.conf import settings
-from .models import SlotMaster
+from django.utils import timezone
+from django.db.models import Q
+from .models import BlockedDate, Booking, EmailOutbox
 
 # List of allowed domains - can be extended as needed
 ALLOWED_DOMAINS = ['gmail.com', 'yahoo.com', 'outlook.com']
@@ -18,23 +19,33 @@ def generate_otp():
     """
     Generate a random 6-digit OTP
     """
-    return ''.join(random.choices(string.digits, k=6))
+    return f'{secrets.randbelow(10 ** 6):06d}'
+
+def queue_email(subject, message, from_email, recipient_list, expires_at=None):
+    """
+    Queue an email in the outbox. It is written in the caller's transaction
+    and delivered by the send_outbox command, so the request never waits on SMTP.
+    Give expires_at for messages holding a secret; see EmailOutbox.
+    """
+    return EmailOutbox.objects.create(
+        subject=subject,
+        message=message,
+        from_email=from_email,
+        recipients=list(recipient_list),
+        expires_at=expires_at
+    )
 
 def send_otp_via_email(email, otp):
     """
     Send OTP via email using Django's email backend
     """
     subject = 'Your OTP for Hall Booking System'
-    message = f'Your OTP is: {otp}. This OTP will expire in 5 minutes.'
+    ttl = getattr(settings, 'OTP_TTL_MINUTES', 5)
+    message = f'Your OTP is: {otp}. This OTP will expire in {ttl} minutes.'
     from_email = settings.DEFAULT_FROM_EMAIL if hasattr(settings, 'DEFAULT_FROM_EMAIL') else 'noreply@hallbooking.com'
     
-    send_mail(
-        subject,
-        message,
-        from_email,
-        [email],
-        fail_silently=False,
-    )
+    # The code is cleared from the outbox once sent, and the row deleted once it expires
+    queue_email(subject, message, from_email, [email], expires_at=timezone.now() + timedelta(minutes=ttl))
 def send_booking_confirmation_email(booking):
     """
     Send booking confirmation email to the user.
@@ -52,13 +63,7 @@ def send_booking_confirmation_email(booking):
     """
     from_email = settings.DEFAULT_FROM_EMAIL
     
-    send_mail(
-        subject,
-        message,
-        from_email,
-        [booking.emp_email_id],
-        fail_silently=False,
-    )
+    queue_email(subject, message, from_email, [booking.emp_email_id])
 
 def send_booking_rejection_email(booking, reason="", next_available_slots=None):
     """
@@ -87,52 +92,70 @@ def send_booking_rejection_email(booking, reason="", next_available_slots=None):
     """
     from_email = settings.DEFAULT_FROM_EMAIL
     
-    send_mail(
-        subject,
-        message,
-        from_email,
-        [booking.emp_email_id],
-        fail_silently=False,
+    queue_email(subject, message, from_email, [booking.emp_email_id])
+
+def get_blocked_dates(hall, start_date, end_date=None):
+    """
+    Get the set of dates between start_date and end_date (inclusive) on which
+    the hall is blocked, either directly or through an office-wide block.
+    """
+    end_date = end_date or start_date
+    return set(
+        BlockedDate.objects.filter(
+            Q(hall=hall) | Q(hall__isnull=True, office_id=hall.office_id),
+            blocked_date__range=(start_date, end_date)
+        ).values_list('blocked_date', flat=True)
     )
 
-def get_next_available_slots(hall, count=5):
+def find_conflicting_booking(hall, slot_date, slot_start, exclude_pk=None):
     """
-    Get the next 'count' available slots for a hall.
+    Get the id of the approved booking holding a hall's slot, if there is one.
     """
-    from django.utils import timezone
-    from datetime import timedelta
-    import calendar
-    
+    return Booking.objects.filter(
+        hall=hall,
+        slot_date=slot_date,
+        slot_start=slot_start,
+        status='Approved',
+        is_deleted=False
+    ).exclude(pk=exclude_pk).values_list('id', flat=True).first()
+
+def get_next_available_slots(hall, count=5, start_date=None, horizon_days=30):
+    """
+    Get the next 'count' free slots for a hall, looking horizon_days ahead.
+    A slot is free when no approved or pending booking covers it. Sundays,
+    blocked dates and frozen halls are skipped, and slots that have already
+    started today are not offered.
+    """
+    from .availability import get_days
+    from .slots import SLOT_MINUTES, day_slot_starts, format_slot_time, local_now, minute_of_day
+
+    if hall.is_freeze:
+        return []
+
+    now = local_now()
+    start_date = start_date or now.date()
+    end_date = start_date + timedelta(days=horizon_days - 1)
+    blocked_dates = get_blocked_dates(hall, start_date, end_date)
+    dates = [
+        start_date + timedelta(days=i) for i in range(horizon_days)
+        if (start_date + timedelta(days=i)).weekday() != 6
+        and start_date + timedelta(days=i) not in blocked_dates
+    ]
+    days = get_days(hall.id, dates)
+
     available_slots = []
-    current_date = timezone.now().date()
-    
-    # Try to find available slots for the next 30 days
-    for i in range(30):
-        check_date = current_date + timedelta(days=i)
-        
-        # Skip Sundays (assuming 6 = Sunday in Python's weekday numbering)
-        if check_date.weekday() == 6:
-            continue
-            
-        # Check for available slots on this date
-        slots = SlotMaster.objects.filter(
-            hall=hall,
-            slot_date=check_date,
-            slot_status='Available'
-        ).order_by('slot_time')
-        
-        for slot in slots:
+    for slot_date in dates:
+        day = days[slot_date]
+        taken = day.booked | day.pending
+        for start in day_slot_starts(*hall.operating_hours()):
+            if slot_date < now.date() or (slot_date == now.date() and start <= minute_of_day(now)):
+                continue
+            if taken & (1 << start // SLOT_MINUTES):
+                continue
             available_slots.append({
-                'date': slot.slot_date.strftime('%Y-%m-%d'),
-                'time': slot.slot_time
+                'date': slot_date.strftime('%Y-%m-%d'),
+                'time': format_slot_time(start, start + SLOT_MINUTES)
             })
-            
-            # Stop if we have enough slots
             if len(available_slots) >= count:
-                break
-                
-        # Stop if we have enough slots
-        if len(available_slots) >= count:
-            break
-            
-    return available_slots
\ No newline at end of file
+                return available_slots
+    return available_slots
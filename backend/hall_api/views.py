@@ -4,33 +4,67 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-import pytz
+from django.utils.dateparse import parse_date
+from datetime import timedelta
 from .models import *
 from .serializers import *
-from .utils import send_booking_confirmation_email, send_booking_rejection_email, get_next_available_slots
+from .assignment import assign_hall
+from .conditional import ConditionalGetMixin, conditional_response
+from .exceptions import BookingConflict
+from .master_cache import get_master
+from .signals import booking_snapshot, send_booking_changes
+from .slots import parse_slot_time
+from .pagination import KeysetPagination
+from .utils import send_booking_confirmation_email, send_booking_rejection_email, get_next_available_slots, get_blocked_dates, find_conflicting_booking
 from .permissions import IsAdminOrSuperAdmin
 from rest_framework_simplejwt.views import TokenObtainPairView
 from .serializers import MyTokenObtainPairSerializer
 
+@contextmanager
+def approved_slot_guard(hall, slot_date, slot_time, exclude_pk=None):
+    """
+    Turn a clash with another approved booking on the same slot, caught by the
+    database constraint, into a 409 naming the booking that holds the slot.
+    """
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError:
+        conflicting_id = find_conflicting_booking(hall, slot_date, parse_slot_time(slot_time)[0], exclude_pk)
+        if conflicting_id is None:
+            raise
+        raise BookingConflict(conflicting_id)
+
 class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
 
-class EntityViewSet(viewsets.ModelViewSet):
+class EntityViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     CRUD operations for Entity
     """
     queryset = Entity.objects.filter(is_deleted=False)
     serializer_class = EntitySerializer
     permission_classes = [IsAdminOrSuperAdmin]
+    etag_models = (Entity,)
+    cache_public = True
 
-class OfficeMasterViewSet(viewsets.ModelViewSet):
+class OfficeMasterViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     CRUD operations for OfficeMaster
     """
-    queryset = OfficeMaster.objects.filter(is_deleted=False)
+    queryset = OfficeMasterSerializer.eager_load(OfficeMaster.objects.filter(is_deleted=False))
     serializer_class = OfficeMasterSerializer
     permission_classes = [IsAdminOrSuperAdmin]
+    etag_models = (OfficeMaster, AdminUser)
+    cache_public = True
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['office_city', 'office_state', 'office_country']
     search_fields = ['office_code', 'office_name', 'office_tag']
@@ -40,7 +74,7 @@ class OfficeMasterViewSet(viewsets.ModelViewSet):
     def halls(self, request, pk=None):
         """Get all halls in a specific office"""
         office = self.get_object()
-        halls = HallMaster.objects.filter(office=office, is_freeze=False)
+        halls = HallMasterSerializer.eager_load(HallMaster.objects.filter(office=office, is_freeze=False))
         serializer = HallMasterSerializer(halls, many=True)
         return Response(serializer.data)
 
@@ -53,101 +87,86 @@ class AdminUserViewSet(viewsets.ModelViewSet):
     """
     CRUD operations for AdminUser
     """
-    queryset = AdminUser.objects.all()
+    queryset = AdminUserSerializer.eager_load(AdminUser.objects.all())
     serializer_class = AdminUserSerializer
     permission_classes = [IsAdminOrSuperAdmin]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['office', 'designation', 'shift']
     search_fields = ['admin_code', 'designation']
 
-class HallMasterViewSet(viewsets.ModelViewSet):
+class HallMasterViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     CRUD operations for HallMaster
     """
-    queryset = HallMaster.objects.filter(is_deleted=False)
+    queryset = HallMasterSerializer.eager_load(HallMaster.objects.filter(is_deleted=False))
     serializer_class = HallMasterSerializer
     permission_classes = [IsAdminOrSuperAdmin]
+    etag_models = (HallMaster, OfficeMaster, AdminUser)
+    cache_public = True
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['office', 'capacity']
     search_fields = ['hall_code', 'hall_name']
 
-    @action(detail=False, methods=['get'])
-    def available(self, request):
-        """
-        Get available halls with filtering options
-        Query parameters: office, min_capacity
-        """
-        office_id = request.query_params.get('office')
-        min_capacity = request.query_params.get('min_capacity')
-        
-        queryset = self.get_queryset()
-        
-        if office_id:
-            queryset = queryset.filter(office_id=office_id)
-        if min_capacity:
-            queryset = queryset.filter(capacity__gte=min_capacity)
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
-    
     @action(detail=True, methods=['get'])
     def bookings(self, request, pk=None):
         """Get all bookings for a specific hall"""
         hall = self.get_object()
-        bookings = Booking.objects.filter(hall=hall, is_deleted=False)
+        bookings = BookingSerializer.eager_load(Booking.objects.filter(hall=hall, is_deleted=False))
         serializer = BookingSerializer(bookings, many=True)
         return Response(serializer.data)
 
-    @action(detail=True, methods=['get'])
-    def booked_slots(self, request, pk=None):
-        """Get all booked time slots for a specific hall and date with status information"""
-        hall = self.get_object()
-        date_str = request.query_params.get('date')
-
-        if not date_str:
+    @action(detail=True, methods=['get'], url_path='next-free', permission_classes=[AllowAny])
+    def next_free(self, request, pk=None):
+        """
+        Get the next free slots for a hall.
+        Query parameters: count (default 5, at most 50), from (YYYY-MM-DD, default today)
+        """
+        try:
+            hall = get_master(HallMaster, pk)
+        except (HallMaster.DoesNotExist, ValueError, DjangoValidationError):
+            raise Http404
+        if hall.is_deleted:
+            raise Http404
+        from_param = request.query_params.get('from')
+        try:
+            count = int(request.query_params.get('count', 5))
+            start_date = parse_date(from_param) if from_param else None
+        except ValueError:
+            count, start_date = None, None
+        if not count or count < 1 or (from_param and not start_date):
             return Response(
-                {'error': 'Date parameter is required'},
+                {'error': 'count must be a positive integer and from a date in YYYY-MM-DD format'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        bookings = Booking.objects.filter(
-            hall=hall,
-            slot_date=date_str,
-            is_deleted=False
-        )
-        
-        # Return detailed information about each booking including status
-        booked_slots_info = [
-            {
-                'slot_time': booking.slot_time,
-                'status': booking.status
-            }
-            for booking in bookings
-        ]
-        return Response(booked_slots_info)
+        return Response(get_next_available_slots(hall, count=min(count, 50), start_date=start_date))
 
     def perform_destroy(self, instance):
         instance.is_deleted = True
         instance.deleted_at = timezone.now()
         instance.save()
 
-class SessionMasterViewSet(viewsets.ModelViewSet):
+class SessionMasterViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     CRUD operations for SessionMaster
     """
-    queryset = SessionMaster.objects.all()
+    queryset = SessionMasterSerializer.eager_load(SessionMaster.objects.all())
     serializer_class = SessionMasterSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    etag_models = (SessionMaster, HallMaster, OfficeMaster, AdminUser)
+    cache_public = True
     filter_backends = [filters.SearchFilter]
     search_fields = ['session_code', 'session_type']
 
-class InfrastructureViewSet(viewsets.ModelViewSet):
+class InfrastructureViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     CRUD operations for Infrastructure
     """
     queryset = Infrastructure.objects.all()
     serializer_class = InfrastructureSerializer
     permission_classes = [IsAdminOrSuperAdmin]
+    etag_models = (Infrastructure,)
+    cache_public = True
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['infra_type']
     search_fields = ['infra_code', 'infra_item']
@@ -181,21 +200,10 @@ class SlotMasterViewSet(viewsets.ModelViewSet):
     queryset = SlotMaster.objects.all()
     serializer_class = SlotMasterSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['slot_date', 'slot_status']
 
-    @action(detail=False, methods=['get'])
-    def available(self, request):
-        """Get available slots for a specific date"""
-        date = request.query_params.get('date')
-        if date:
-            queryset = SlotMaster.objects.filter(slot_date=date, slot_status='Available')
-        else:
-            queryset = SlotMaster.objects.filter(slot_status='Available')
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
-
     @action(detail=True, methods=['post'])
     def update_status(self, request, pk=None):
         """Update the status of a slot"""
@@ -217,9 +225,10 @@ class BookingViewSet(viewsets.ModelViewSet):
     """
     CRUD operations for Booking
     """
-    queryset = Booking.objects.filter(is_deleted=False)
+    queryset = BookingSerializer.eager_load(Booking.objects.filter(is_deleted=False))
     serializer_class = BookingSerializer
     permission_classes = [AllowAny]  # Default permission for all actions
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['office', 'hall', 'session', 'status', 'slot_date', 'approved']
     search_fields = ['emp_code', 'emp_name', 'team_name']
@@ -241,15 +250,12 @@ class BookingViewSet(viewsets.ModelViewSet):
         """
         Get booking statistics (pending, approved, rejected).
         """
-        pending_count = Booking.objects.filter(status='Pending', is_deleted=False).count()
-        approved_count = Booking.objects.filter(status='Approved', is_deleted=False).count()
-        rejected_count = Booking.objects.filter(status='Cancelled', is_deleted=False).count()
-
-        return Response({
-            'pending': pending_count,
-            'approved': approved_count,
-            'rejected': rejected_count,
-        })
+        counts = DailyBookingStats.objects.aggregate(
+            pending=Coalesce(Sum('pending'), 0),
+            approved=Coalesce(Sum('approved'), 0),
+            rejected=Coalesce(Sum('cancelled'), 0),
+        )
+        return Response(counts)
 
     def get_serializer_class(self):
         return BookingSerializer
@@ -259,50 +265,153 @@ class BookingViewSet(viewsets.ModelViewSet):
         slot_date = serializer.validated_data.get('slot_date')
         hall = serializer.validated_data.get('hall')
         
-        if BlockedDate.objects.filter(hall=hall, blocked_date=slot_date).exists():
+        if get_blocked_dates(hall, slot_date):
             raise serializers.ValidationError('This hall is blocked for the selected date.')
 
         # Auto-set book_date to current date
-        booking = serializer.save()
-        
-        # Update slot status to booked
-        slot = SlotMaster.objects.filter(
-            slot_date=booking.slot_date,
-            slot_time=booking.slot_time
-        ).first()
-        if slot:
-            slot.slot_status = 'Booked'
-            slot.save()
+        with transaction.atomic():
+            with approved_slot_guard(hall, slot_date, serializer.validated_data.get('slot_time')):
+                booking = serializer.save()
+            # Marks the booking's SlotMaster rows Booked, see slot_master.sync_slot_status
+            send_booking_changes([(None, booking)])
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Create bookings for every date in a range and every selected slot at once.
+        Either all of them are created or none are, with an error per failing slot.
+        """
+        serializer = BookingBulkCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        shared_fields = dict(serializer.validated_data)
+        start_date = shared_fields.pop('start_date')
+        end_date = shared_fields.pop('end_date')
+        slot_times = shared_fields.pop('slot_times')
+        hall = shared_fields['hall']
+
+        dates = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+        blocked_dates = get_blocked_dates(hall, start_date, end_date)
+        slot_starts = {slot_time: parse_slot_time(slot_time)[0] for slot_time in slot_times}
+        approved_slots = set(
+            Booking.objects.filter(
+                hall=hall,
+                slot_date__range=(start_date, end_date),
+                slot_start__in=slot_starts.values(),
+                status='Approved',
+                is_deleted=False
+            ).values_list('slot_date', 'slot_start')
+        )
+
+        errors = []
+        for slot_date in dates:
+            for slot_time in slot_times:
+                if slot_date in blocked_dates:
+                    error = 'This hall is blocked for the selected date.'
+                elif (slot_date, slot_starts[slot_time]) in approved_slots:
+                    error = 'This slot is already booked.'
+                else:
+                    continue
+                errors.append({'slot_date': slot_date, 'slot_time': slot_time, 'error': error})
+
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        bookings = [
+            Booking(slot_date=slot_date, slot_time=slot_time, **shared_fields)
+            for slot_date in dates
+            for slot_time in slot_times
+        ]
+        for booking in bookings:
+            # bulk_create skips save(), so derive the interval columns here
+            booking.set_slot_interval()
+
+        with transaction.atomic():
+            bookings = Booking.objects.bulk_create(bookings)
+            send_booking_changes((None, booking) for booking in bookings)
+
+        serializer = self.get_serializer(bookings, many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], url_path='by-session')
+    def by_session(self, request):
+        """
+        Book every date in a range and every selected slot in the first of the
+        session type's preferred halls that is free for all of them. The response
+        names the preference used and why any before it were skipped.
+        """
+        serializer = BookingBySessionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        shared_fields = dict(serializer.validated_data)
+        start_date = shared_fields.pop('start_date')
+        end_date = shared_fields.pop('end_date')
+        slot_times = shared_fields.pop('slot_times')
+        dates = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
+        # Transactions take the write lock when they start, so no other booking
+        # can take the slots between the check and the insert
+        with transaction.atomic():
+            hall, preference, skipped = assign_hall(shared_fields['session'], dates, slot_times)
+            if hall is None:
+                return Response({
+                    'error': 'None of the preferred halls is free for all the selected slots.',
+                    'skipped': skipped,
+                }, status=status.HTTP_409_CONFLICT)
+
+            office = get_master(OfficeMaster, hall.office_id)
+            bookings = [
+                Booking(slot_date=slot_date, slot_time=slot_time, hall=hall, office=office, **shared_fields)
+                for slot_date in dates
+                for slot_time in slot_times
+            ]
+            for booking in bookings:
+                # bulk_create skips save(), so derive the interval columns here
+                booking.set_slot_interval()
+            bookings = Booking.objects.bulk_create(bookings)
+            send_booking_changes((None, booking) for booking in bookings)
+
+        return Response({
+            'hall': hall.id,
+            'hall_code': hall.hall_code,
+            'preference': preference,
+            'skipped': skipped,
+            'bookings': self.get_serializer(bookings, many=True).data,
+        }, status=status.HTTP_201_CREATED)
+
+    def perform_update(self, serializer):
+        previous = booking_snapshot(serializer.instance)
+        data = serializer.validated_data
+        with transaction.atomic():
+            with approved_slot_guard(
+                data.get('hall', previous.hall),
+                data.get('slot_date', previous.slot_date),
+                data.get('slot_time', previous.slot_time),
+                exclude_pk=previous.pk
+            ):
+                booking = serializer.save()
+            send_booking_changes([(previous, booking)])
 
     def perform_destroy(self, instance):
         # Soft delete
+        previous = booking_snapshot(instance)
         instance.is_deleted = True
-        instance.save()
-        
-        # Update slot status to available
-        slot = SlotMaster.objects.filter(
-            slot_date=instance.slot_date,
-            slot_time=instance.slot_time
-        ).first()
-        if slot:
-            slot.slot_status = 'Available'
-            slot.save()
+        with transaction.atomic():
+            instance.save()
+            # Frees the booking's SlotMaster rows unless another booking holds them
+            send_booking_changes([(previous, instance)])
 
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
         """Approve a booking and send a confirmation email."""
         booking = self.get_object()
         
-        # Update booking status
+        # Update booking status and queue the confirmation email together
+        previous = booking_snapshot(booking)
         booking.status = 'Approved'
-        booking.save()
-        
-        # Send confirmation email
-        try:
+        with transaction.atomic():
+            with approved_slot_guard(booking.hall, booking.slot_date, booking.slot_time, exclude_pk=booking.pk):
+                booking.save()
             send_booking_confirmation_email(booking)
-        except Exception as e:
-            # Log the error, but don't block the response
-            print(f"Error sending confirmation email for booking {booking.id}: {e}")
+            send_booking_changes([(previous, booking)])
             
         serializer = self.get_serializer(booking)
         return Response(serializer.data)
@@ -318,26 +427,16 @@ class BookingViewSet(viewsets.ModelViewSet):
         # Get next available slots
         next_available_slots = get_next_available_slots(booking.hall, count=5)
         
-        # Update booking status
-        booking.status = 'Rejected'
-        booking.approved = False
-        booking.save()
-        
-        # Update slot status to available
-        slot = SlotMaster.objects.filter(
-            slot_date=booking.slot_date,
-            slot_time=booking.slot_time
-        ).first()
-        if slot:
-            slot.slot_status = 'Available'
-            slot.save()
-        
-        # Send rejection email with suggested slots
-        try:
+        with transaction.atomic():
+            # Update booking status
+            previous = booking_snapshot(booking)
+            booking.status = 'Rejected'
+            booking.approved = False
+            booking.save()
+            send_booking_changes([(previous, booking)])
+            
+            # Queue rejection email with suggested slots
             send_booking_rejection_email(booking, reason, next_available_slots)
-        except Exception as e:
-            # Log the error, but don't block the response
-            print(f"Error sending rejection email for booking {booking.id}: {e}")
             
         serializer = self.get_serializer(booking)
         return Response(serializer.data)
@@ -348,18 +447,12 @@ class BookingViewSet(viewsets.ModelViewSet):
         booking = self.get_object()
         
         # Update booking status
+        previous = booking_snapshot(booking)
         booking.status = 'Cancelled'
         booking.approved = False # A cancelled booking is not approved
-        booking.save()
-        
-        # Update slot status to available
-        slot = SlotMaster.objects.filter(
-            slot_date=booking.slot_date,
-            slot_time=booking.slot_time
-        ).first()
-        if slot:
-            slot.slot_status = 'Available'
-            slot.save()
+        with transaction.atomic():
+            booking.save()
+            send_booking_changes([(previous, booking)])
             
         serializer = self.get_serializer(booking)
         return Response(serializer.data)
@@ -369,7 +462,7 @@ class BookingViewSet(viewsets.ModelViewSet):
         """Get bookings for a specific employee"""
         emp_code = request.query_params.get('emp_code')
         if emp_code:
-            queryset = Booking.objects.filter(emp_code=emp_code, is_deleted=False)
+            queryset = self.get_queryset().filter(emp_code=emp_code)
             serializer = self.get_serializer(queryset, many=True)
             return Response(serializer.data)
         return Response(
@@ -380,20 +473,21 @@ class BookingViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
         """Get upcoming bookings"""
-        queryset = Booking.objects.filter(
-            slot_date__gte=timezone.now().date(),
-            is_deleted=False
-        ).order_by('slot_date', 'slot_time')
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = self.get_queryset().filter(
+            slot_date__gte=timezone.now().date()
+        ).order_by('slot_date', 'slot_start')
+
+        page = self.paginate_queryset(booking_reader.values(queryset))
+        if page is not None:
+            return self.get_paginated_response(booking_reader.serialize_values(page))
+        return Response(booking_reader.serialize(queryset))
     
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
     def by_email(self, request):
         """Get bookings for a specific email"""
         emp_email = request.query_params.get('emp_email')
         if emp_email:
-            queryset = Booking.objects.filter(emp_email_id=emp_email, is_deleted=False)
+            queryset = self.get_queryset().filter(emp_email_id=emp_email)
             serializer = self.get_serializer(queryset, many=True)
             return Response(serializer.data)
         return Response(
@@ -404,9 +498,11 @@ class BlockedDateViewSet(viewsets.ModelViewSet):
     """
     CRUD operations for BlockedDate
     """
-    queryset = BlockedDate.objects.all()
+    queryset = BlockedDateSerializer.eager_load(BlockedDate.objects.all())
     serializer_class = BlockedDateSerializer
     permission_classes = [IsAdminOrSuperAdmin]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('blocked_date', 'id')
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['office', 'hall', 'blocked_date']
     search_fields = ['reason']
@@ -440,17 +536,19 @@ class BlockedDateViewSet(viewsets.ModelViewSet):
             
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
 from .models import EmailOTP
 from .serializers import EmailOTPSerializer, VerifyOTPSerializer
 from .utils import is_allowed_domain, generate_otp, send_otp_via_email
+from .throttling import OTPEmailThrottle, OTPSendIPThrottle, OTPVerifyIPThrottle
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([OTPSendIPThrottle, OTPEmailThrottle])
 def send_otp(request):
     """
     Send OTP to the provided email if domain is allowed
@@ -468,31 +566,36 @@ def send_otp(request):
         
         # Generate OTP
         otp = generate_otp()
-        
-        # Delete any existing OTPs for this email
-        EmailOTP.objects.filter(email=email).delete()
-        
-        # Save new OTP to database
-        EmailOTP.objects.create(email=email, otp=otp)
-        
-        # Send OTP via email
-        try:
-            send_otp_via_email(email, otp)
-            return Response(
-                {'message': 'OTP sent successfully'}, 
-                status=status.HTTP_200_OK
-            )
-        except Exception as e:
-            return Response(
-                {'error': f'Failed to send OTP: {str(e)}'}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        now = timezone.now()
+        
+        with transaction.atomic():
+            # Replace any pending OTP for this email in a single upsert
+            EmailOTP.objects.bulk_create(
+                [EmailOTP(
+                    email=email,
+                    otp_hash=EmailOTP.hash_otp(email, otp),
+                    created_at=now,
+                    expires_at=now + timedelta(minutes=getattr(settings, 'OTP_TTL_MINUTES', 5)),
+                )],
+                update_conflicts=True,
+                unique_fields=['email'],
+                update_fields=['otp_hash', 'attempts', 'created_at', 'expires_at'],
             )
+            
+            # Queue OTP email for the outbox sender
+            send_otp_via_email(email, otp)
+
+        return Response(
+            {'message': 'OTP sent successfully'}, 
+            status=status.HTTP_200_OK
+        )
     else:
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([OTPVerifyIPThrottle])
 def verify_otp(request):
     """
     Verify the provided OTP
@@ -502,9 +605,9 @@ def verify_otp(request):
         email = serializer.validated_data['email']
         otp = serializer.validated_data['otp']
         
-        try:
-            email_otp = EmailOTP.objects.get(email=email, otp=otp)
-        except EmailOTP.DoesNotExist:
+        # One lookup on the unique email index
+        email_otp = EmailOTP.objects.filter(email=email).first()
+        if email_otp is None:
             return Response(
                 {'error': 'Invalid OTP'}, 
                 status=status.HTTP_400_BAD_REQUEST
@@ -517,6 +620,23 @@ def verify_otp(request):
                 {'error': 'OTP expired'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
+
+        if not email_otp.check_otp(otp):
+            # Count the miss; the code is revoked once the attempts run out
+            max_attempts = getattr(settings, 'OTP_MAX_ATTEMPTS', 5)
+            counted = EmailOTP.objects.filter(
+                pk=email_otp.pk, attempts__lt=max_attempts - 1
+            ).update(attempts=F('attempts') + 1)
+            if not counted:
+                EmailOTP.objects.filter(pk=email_otp.pk).delete()
+                return Response(
+                    {'error': 'Too many incorrect attempts. Please request a new OTP'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            return Response(
+                {'error': 'Invalid OTP'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         # Delete OTP after successful verification
         email_otp.delete()
@@ -529,139 +649,6 @@ def verify_otp(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 # from rest_framework.permissions import IsAdminUser
 
-@api_view(['GET'])
-@permission_classes([IsAdminOrSuperAdmin])
-def dashboard_stats(request):
-    """
-    Get statistics for the admin dashboard, optionally filtered by office, date, category, and session.
-    """
-    office_id = request.query_params.get('office_id')
-    slot_date = request.query_params.get('slot_date')
-    category = request.query_params.get('category')
-    session_id = request.query_params.get('session_id')
-
-    # Base querysets
-    halls_queryset = HallMaster.objects
-    bookings_queryset = Booking.objects
-
-    if office_id:
-        halls_queryset = halls_queryset.filter(office_id=office_id)
-        bookings_queryset = bookings_queryset.filter(office_id=office_id)
-
-    if slot_date:
-        bookings_queryset = bookings_queryset.filter(slot_date=slot_date)
-
-    if category:
-        halls_queryset = halls_queryset.filter(category=category)
-        # We also need to filter bookings based on the halls of the selected category
-        bookings_queryset = bookings_queryset.filter(hall__category=category)
-    
-    if session_id:
-        bookings_queryset = bookings_queryset.filter(session_id=session_id)
-
-
-    total_halls = halls_queryset.count()
-    available_halls = halls_queryset.filter(is_freeze=False).count()
-    working_halls = halls_queryset.filter(is_freeze=True).count()
-    
-    upcoming_booked_halls = bookings_queryset.filter(
-        status='Approved',
-        slot_date__gte=timezone.now().date()
-    ).count()
-
-    # Add booking status counts
-    pending_bookings = bookings_queryset.filter(status='Pending').count()
-    approved_bookings = bookings_queryset.filter(status='Approved').count()
-    rejected_bookings = bookings_queryset.filter(status='Rejected').count()
-    cancelled_bookings = bookings_queryset.filter(status='Cancelled').count()
-
-    upcoming_bookings = bookings_queryset.filter(
-        status='Approved',
-        slot_date__gte=timezone.now().date()
-    ).order_by('slot_date', 'slot_time')[:5]
-
-    upcoming_bookings_serializer = BookingSerializer(upcoming_bookings, many=True)
-
-    return Response({
-        'total_halls': total_halls,
-        'available_halls': available_halls,
-        'working_halls': working_halls,
-        'upcoming_booked_halls': upcoming_booked_halls,
-        'upcoming_bookings': upcoming_bookings_serializer.data,
-        'pending_bookings': pending_bookings,
-        'approved_bookings': approved_bookings,
-        'rejected_bookings': rejected_bookings,
-        'cancelled_bookings': cancelled_bookings,
-    })
-
-@api_view(['GET'])
-@permission_classes([IsAdminOrSuperAdmin])
-def current_working_halls(request):
-    """
-    Get halls that are currently in use (booked for the current time slot with approved status).
-    """
-    from datetime import datetime, time
-    from django.utils import timezone
-    
-    # Get current time in Asia/Calcutta timezone
-    tz = pytz.timezone('Asia/Calcutta')
-    current_datetime = timezone.now().astimezone(tz)
-    current_time = current_datetime.time()
-    current_date = current_datetime.date()
-    
-    # Determine the current time slot based on current time
-    # Time slots are in 30-minute intervals
-    hour = current_time.hour
-    minute = current_time.minute
-    
-    # Round down to the nearest 30-minute slot
-    if minute < 30:
-        slot_start_minute = 0
-    else:
-        slot_start_minute = 30
-    
-    slot_start_time = time(hour, slot_start_minute)
-    slot_end_time = time(hour, slot_start_minute + 30) if slot_start_minute == 0 else time(hour + 1, 0)
-    
-    # Format the slot time to match the format in the database (e.g., "3:0 PM - 3:30 PM")
-    # Convert to 12-hour format with AM/PM
-    start_hour = slot_start_time.hour
-    start_minute = slot_start_time.minute
-    end_hour = slot_end_time.hour
-    end_minute = slot_end_time.minute
-    
-    # Convert to 12-hour format
-    start_period = "AM" if start_hour < 12 else "PM"
-    end_period = "AM" if end_hour < 12 else "PM"
-    
-    # Convert hour to 12-hour format
-    start_12hour = start_hour if start_hour <= 12 else start_hour - 12
-    start_12hour = 12 if start_12hour == 0 else start_12hour
-    end_12hour = end_hour if end_hour <= 12 else end_hour - 12
-    end_12hour = 12 if end_12hour == 0 else end_12hour
-    
-    current_slot_time = f"{start_12hour}:{start_minute:02d} {start_period} - {end_12hour}:{end_minute:02d} {end_period}"
-    
-    # Find bookings for the current time slot
-    current_bookings = Booking.objects.filter(
-        status='Approved',
-        slot_date=current_date,
-        slot_time=current_slot_time
-    ).select_related('hall').order_by('hall__hall_name')
-    
-    # Create a list of current working halls with team names
-    working_halls = []
-    for booking in current_bookings:
-        working_halls.append({
-            'hall_id': booking.hall.id,
-            'hall_name': booking.hall.hall_name,
-            'team_name': booking.team_name,
-            'slot_time': booking.slot_time,
-            'emp_name': booking.emp_name
-        })
-    
-    return Response(working_halls)
-
 @api_view(['GET'])
 @permission_classes([IsAdminOrSuperAdmin])
 def pending_approvals(request):
@@ -669,11 +656,15 @@ def pending_approvals(request):
     Get bookings that are pending approval.
     """
     pending_bookings = Booking.objects.filter(
-        status='Pending'
-    ).select_related('hall', 'office').order_by('slot_date', 'slot_time')
-    
-    serializer = BookingSerializer(pending_bookings, many=True)
-    return Response(serializer.data)
+        status='Pending',
+        is_deleted=False
+    ).order_by('slot_date', 'slot_start')
+
+    paginator = KeysetPagination()
+    page = paginator.paginate_queryset(booking_reader.values(pending_bookings), request)
+    if page is not None:
+        return paginator.get_paginated_response(booking_reader.serialize_values(page))
+    return Response(booking_reader.serialize(pending_bookings))
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -682,4 +673,9 @@ def hall_categories(request):
     Get all hall categories.
     """
     categories = HallMaster.Categories.choices
-    return Response([category[0] for category in categories])
\ No newline at end of file
+    # The categories only change with a deploy, so the choices are the version
+    return conditional_response(
+        request, repr(categories),
+        lambda: Response([category[0] for category in categories]),
+        public=True
+    )
\ No newline at end of file